@@ -0,0 +1,258 @@
+"""Benchmarks de los operadores del AG y de corridas completas.
+
+Uso:
+    python benchmarks/bench.py --tamanos 58 1000 10000 --salida resultados.json
+    python benchmarks/bench.py --base benchmarks/base.json --tolerancia 0.2
+
+Los resultados se escriben como JSON; con --base se comparan los tiempos contra
+una corrida guardada y el proceso termina con código 1 si alguno empeoró más
+que la tolerancia. También termina con código 1 si la poda por diversidad de
+alguna población de --poblaciones cuesta más que evaluarla.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from catalogo import compilar_catalogo
+from evaluacion import evaluar_poblacion, CacheEvaluaciones
+from genetico import (seleccion_por_torneo, reparar_individuo_suave, reparar_poblacion,
+                      poda_por_diversidad, iterar_algoritmo_genetico, mutar_poblacion)
+from diversidad import filas_diversas
+from poblacion import generar_poblacion_inicial
+from catalogo_sintetico import generar_catalogo_sintetico
+
+AREA = 1000.0
+PRESUPUESTO = 20000.0
+TAM_POBLACION = 100
+# Tope de celdas (individuos x genes) de las poblaciones grandes de la prueba de poda
+MAX_CELDAS_PODA = 2 * 10**7
+
+# =======================
+# MEDICIÓN
+# =======================
+def medir(funcion, repeticiones=5, minimo_segundos=0.2):
+    """Tiempo por llamada de `funcion` (mínimo y mediana entre repeticiones).
+
+    Cada repetición ejecuta la función tantas veces como haga falta para durar
+    al menos `minimo_segundos / repeticiones`, de modo que las operaciones muy
+    cortas no queden dominadas por la resolución del reloj.
+    """
+    inicio = time.perf_counter()
+    funcion()
+    una = max(time.perf_counter() - inicio, 1e-7)
+    llamadas = max(1, int(minimo_segundos / repeticiones / una))
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(llamadas):
+            funcion()
+        tiempos.append((time.perf_counter() - inicio) / llamadas)
+    return {'segundos': min(tiempos), 'mediana': float(np.median(tiempos)), 'llamadas': llamadas * repeticiones}
+
+def poblacion_de_prueba(catalogo, semilla=0):
+    """Población inicial reparada (matriz de genomas), como la que ven los operadores durante la corrida"""
+    rng = np.random.default_rng(semilla)
+    poblacion = generar_poblacion_inicial(catalogo, AREA, PRESUPUESTO, TAM_POBLACION, rng=rng)
+    return reparar_poblacion(poblacion, catalogo, AREA, PRESUPUESTO)
+
+# =======================
+# MICROBENCHMARKS
+# =======================
+def microbenchmarks(catalogo, repeticiones):
+    poblacion = poblacion_de_prueba(catalogo)
+    fitnesses, _ = evaluar_poblacion(poblacion, catalogo, AREA, PRESUPUESTO)
+    # Individuos fuera de los límites para que la reparación tenga trabajo
+    excedidos = poblacion * 3
+    cache = CacheEvaluaciones()
+    evaluar_poblacion(poblacion, catalogo, AREA, PRESUPUESTO, cache=cache)
+
+    operadores = {
+        'evaluar_poblacion': lambda: evaluar_poblacion(poblacion, catalogo, AREA, PRESUPUESTO),
+        'evaluar_poblacion_cache': lambda: evaluar_poblacion(poblacion, catalogo, AREA, PRESUPUESTO, cache=cache),
+        'reparar_individuo_suave': lambda: reparar_individuo_suave(excedidos[0], catalogo, AREA, PRESUPUESTO),
+        'reparar_poblacion': lambda: reparar_poblacion(excedidos, catalogo, AREA, PRESUPUESTO),
+        'seleccion_por_torneo': lambda: seleccion_por_torneo(poblacion, fitnesses, rng=np.random.default_rng(0)),
+        'poda_por_diversidad': lambda: poda_por_diversidad(poblacion, catalogo, AREA, PRESUPUESTO,
+                                                           rng=np.random.default_rng(0)),
+        'generar_poblacion_inicial': lambda: generar_poblacion_inicial(catalogo, AREA, PRESUPUESTO, TAM_POBLACION,
+                                                                       rng=np.random.default_rng(0)),
+    }
+    resultados = {}
+    for nombre, funcion in operadores.items():
+        resultados[nombre] = medir(funcion, repeticiones=repeticiones)
+        print(f"  {nombre:28s} {resultados[nombre]['segundos'] * 1e3:10.3f} ms")
+    return resultados
+
+# =======================
+# PODA CONTRA EVALUACIÓN
+# =======================
+def poblacion_con_parecidos(catalogo, tam_poblacion, semilla=0):
+    """Población de `tam_poblacion` genomas de los que un cuarto son mutantes leves y un octavo copias"""
+    rng = np.random.default_rng(semilla)
+    base = reparar_poblacion(generar_poblacion_inicial(catalogo, AREA, PRESUPUESTO, tam_poblacion * 5 // 8,
+                                                       rng=rng), catalogo, AREA, PRESUPUESTO)
+    mutantes = base[rng.integers(len(base), size=tam_poblacion // 4)]
+    mutar_poblacion(mutantes, np.arange(len(mutantes)), catalogo, AREA, PRESUPUESTO, intensidad=0.05, rng=rng)
+    copias = base[rng.integers(len(base), size=tam_poblacion - len(base) - len(mutantes))]
+    return np.vstack([base, mutantes, copias])
+
+def poda_contra_evaluacion(catalogo, poblaciones, repeticiones):
+    """Tiempo de `filas_diversas` y de `evaluar_poblacion` sobre poblaciones grandes con casi-duplicados"""
+    resultados = {}
+    for tam_poblacion in poblaciones:
+        if tam_poblacion * len(catalogo) > MAX_CELDAS_PODA:
+            continue
+        poblacion = poblacion_con_parecidos(catalogo, tam_poblacion)
+        # Se miden intercaladas y por más tiempo: la razón entre dos tiempos parecidos es sensible al ruido
+        podas, evaluaciones = [], []
+        for _ in range(repeticiones):
+            podas.append(medir(lambda: filas_diversas(poblacion, rng=np.random.default_rng(0)), repeticiones=1))
+            evaluaciones.append(medir(lambda: evaluar_poblacion(poblacion, catalogo, AREA, PRESUPUESTO),
+                                      repeticiones=1))
+        poda = min(podas, key=lambda medicion: medicion['segundos'])
+        evaluacion = min(evaluaciones, key=lambda medicion: medicion['segundos'])
+        razon = poda['segundos'] / evaluacion['segundos']
+        conservadas = int(filas_diversas(poblacion, rng=np.random.default_rng(0)).sum())
+        resultados[str(tam_poblacion)] = {'poda': poda, 'evaluacion': evaluacion, 'razon': razon,
+                                          'conservadas': conservadas}
+        print(f"  poda de {tam_poblacion:6d} genomas {poda['segundos'] * 1e3:10.3f} ms | evaluación "
+              f"{evaluacion['segundos'] * 1e3:10.3f} ms | {razon:5.2f}x | {conservadas} conservadas"
+              f"{'  PODA MÁS CARA QUE EVALUAR' if razon > 1 else ''}")
+    return resultados
+
+# =======================
+# CORRIDAS COMPLETAS
+# =======================
+def corrida_completa(catalogo, generaciones, semilla=0):
+    """Una corrida del AG con su curva de fitness contra tiempo"""
+    cache = CacheEvaluaciones()
+    curva = []
+    inicio = time.perf_counter()
+    for evento in iterar_algoritmo_genetico(catalogo, AREA, PRESUPUESTO, generaciones=generaciones,
+                                            tam_poblacion=TAM_POBLACION, tasa_mutacion=0.2,
+                                            rng=np.random.default_rng(semilla), cache=cache, verbose=False):
+        curva.append([time.perf_counter() - inicio, evento['mejor_fitness']])
+    segundos = time.perf_counter() - inicio
+
+    estadisticas = cache.estadisticas()
+    consultas = estadisticas['aciertos'] + estadisticas['fallos']
+    return {
+        'segundos': segundos,
+        'generaciones': len(curva),
+        'generaciones_por_segundo': len(curva) / segundos,
+        'evaluaciones_por_segundo': consultas / segundos,
+        'evaluaciones_calculadas_por_segundo': estadisticas['fallos'] / segundos,
+        'tasa_aciertos_cache': estadisticas['tasa_aciertos'],
+        'mejor_fitness': curva[-1][1] if curva else None,
+        'curva_fitness_tiempo': curva,
+    }
+
+def memoria_pico(catalogo, generaciones, semilla=0):
+    """Pico de memoria asignada por Python/numpy durante una corrida (en una pasada aparte, tracemalloc la frena)"""
+    tracemalloc.start()
+    for _ in iterar_algoritmo_genetico(catalogo, AREA, PRESUPUESTO, generaciones=generaciones,
+                                       tam_poblacion=TAM_POBLACION, tasa_mutacion=0.2,
+                                       rng=np.random.default_rng(semilla), verbose=False):
+        pass
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico
+
+# =======================
+# COMPARACIÓN CONTRA BASE
+# =======================
+def tiempos(resultados):
+    """Aplana los tiempos comparables: {'58/micro/evaluar_poblacion': segundos, ...}"""
+    planos = {}
+    for tamano, bloque in resultados['catalogos'].items():
+        for nombre, medicion in bloque['micro'].items():
+            planos[f'{tamano}/micro/{nombre}'] = medicion['segundos']
+        for tam_poblacion, medicion in bloque.get('poda', {}).items():
+            planos[f'{tamano}/poda/{tam_poblacion}'] = medicion['poda']['segundos']
+        if 'completa' in bloque:
+            planos[f'{tamano}/completa/segundos_por_generacion'] = 1 / bloque['completa']['generaciones_por_segundo']
+    return planos
+
+def comparar(resultados, base, tolerancia):
+    """Lista de (clave, base, actual, razón) de los tiempos que empeoraron más que la tolerancia"""
+    actuales = tiempos(resultados)
+    regresiones = []
+    for clave, anterior in tiempos(base).items():
+        if clave not in actuales or anterior <= 0:
+            continue
+        razon = actuales[clave] / anterior
+        marca = 'REGRESIÓN' if razon > 1 + tolerancia else ''
+        print(f"  {clave:55s} {razon:6.2f}x {marca}")
+        if marca:
+            regresiones.append((clave, anterior, actuales[clave], razon))
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks del algoritmo genético')
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[58, 1000, 10000],
+                        help='tamaños de catálogo (58 usa el catálogo real)')
+    parser.add_argument('--generaciones', type=int, default=100)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--poblaciones', type=int, nargs='*', default=[1000, 10000],
+                        help='tamaños de población de la prueba de poda contra evaluación')
+    parser.add_argument('--sin-completa', action='store_true', help='solo microbenchmarks')
+    parser.add_argument('--salida', help='archivo JSON donde guardar los resultados')
+    parser.add_argument('--base', help='resultados previos contra los que comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.15)
+    args = parser.parse_args()
+
+    resultados = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'maquina': platform.platform(),
+        'parametros': {'area': AREA, 'presupuesto': PRESUPUESTO, 'tam_poblacion': TAM_POBLACION,
+                       'generaciones': args.generaciones},
+        'catalogos': {},
+    }
+    for tamano in args.tamanos:
+        if tamano == 58:
+            from catalogo_sintetico import RUTA_CATALOGO_REAL
+            with open(RUTA_CATALOGO_REAL, 'r', encoding='utf-8') as f:
+                plantas = json.load(f)
+        else:
+            plantas = generar_catalogo_sintetico(tamano)
+        catalogo = compilar_catalogo(plantas)
+
+        print(f"Catálogo de {tamano} semillas")
+        bloque = {'micro': microbenchmarks(catalogo, args.repeticiones),
+                  'poda': poda_contra_evaluacion(catalogo, args.poblaciones, args.repeticiones)}
+        if not args.sin_completa:
+            bloque['completa'] = corrida_completa(catalogo, args.generaciones)
+            bloque['completa']['memoria_pico_bytes'] = memoria_pico(catalogo, args.generaciones)
+            completa = bloque['completa']
+            print(f"  corrida completa: {completa['generaciones']} gen en {completa['segundos']:.2f} s "
+                  f"({completa['generaciones_por_segundo']:.1f} gen/s, "
+                  f"{completa['evaluaciones_por_segundo']:.0f} eval/s, "
+                  f"pico {completa['memoria_pico_bytes'] / 2**20:.1f} MiB)")
+        resultados['catalogos'][str(tamano)] = bloque
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+    fallo = any(medicion['razon'] > 1 for bloque in resultados['catalogos'].values()
+                for medicion in bloque['poda'].values())
+    if args.base:
+        with open(args.base, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        print(f"Comparación contra {args.base} (tolerancia {args.tolerancia:.0%})")
+        fallo = bool(comparar(resultados, base, args.tolerancia)) or fallo
+    if fallo:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
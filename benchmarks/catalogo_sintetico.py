@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+import numpy as np
+
+RUTA_CATALOGO_REAL = os.path.join(os.path.dirname(__file__), '..', 'data', 'catalogo_semillas.json')
+
+# Campos numéricos del esquema de catalogo_semillas.json y decimales con que se guardan
+CAMPOS = {
+    'tiempo': 0,
+    'rendimiento': 2,
+    'espacio': 2,
+    'fertilizante_por_planta': 2,
+    'trabajadores_requeridos_por_planta': 2,
+    'costo_fertilizante_unitario': 2,
+    'costo_trabajador_unitario': 2,
+    'ganancia_unitaria': 2,
+}
+
+def generar_catalogo_sintetico(n, semilla=0, base=None, dispersion=0.15):
+    """Catálogo de `n` semillas con el mismo esquema y rangos que el catálogo real.
+
+    Cada registro parte de una semilla real elegida al azar y perturba sus
+    valores numéricos con ruido multiplicativo de ±`dispersion`, recortado al
+    rango observado en el catálogo real; así se conservan las correlaciones
+    entre campos (p. ej. espacio y rendimiento) de un mismo cultivo.
+    """
+    if base is None:
+        with open(RUTA_CATALOGO_REAL, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+    rng = np.random.default_rng(semilla)
+    minimos = {campo: min(planta[campo] for planta in base) for campo in CAMPOS}
+    maximos = {campo: max(planta[campo] for planta in base) for campo in CAMPOS}
+
+    catalogo = []
+    origenes = rng.integers(len(base), size=n)
+    ruido = rng.uniform(1 - dispersion, 1 + dispersion, size=(n, len(CAMPOS)))
+    for i, origen in enumerate(origenes):
+        planta = base[origen]
+        registro = {'nombre': f"{planta['nombre']} {i}"}
+        for j, (campo, decimales) in enumerate(CAMPOS.items()):
+            valor = float(np.clip(planta[campo] * ruido[i, j], minimos[campo], maximos[campo]))
+            registro[campo] = int(round(valor)) if decimales == 0 else round(valor, decimales)
+        catalogo.append(registro)
+    return catalogo
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Genera un catálogo sintético de semillas')
+    parser.add_argument('n', type=int, help='número de semillas')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', default='-', help="archivo de salida ('-' para stdout)")
+    args = parser.parse_args()
+
+    catalogo = generar_catalogo_sintetico(args.n, semilla=args.semilla)
+    texto = json.dumps(catalogo, ensure_ascii=False, indent=2)
+    if args.salida == '-':
+        print(texto)
+    else:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto)
@@ -1,157 +1,428 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from genetico import algoritmo_genetico
+import time
+_inicio_importacion = time.perf_counter()
+import gc
+import gzip
 import json
+import logging
 import os
-import matplotlib.pyplot as plt
-import io
-import base64
-
-app = Flask(__name__)
-# Configuración CORS más flexible para desarrollo
-CORS(app, resources={r"/optimize": {"origins": "*"}})
-
-def generar_reporte_individuo(mejor_individuo, catalogo, area_total, presupuesto_total):
-    """Genera un reporte detallado del mejor individuo encontrado"""
-    reporte = {"cultivos": [], "resumen": {}}
-    total_area = 0
-    total_fertilizante = 0
-    total_fertilizante_costo = 0
-    total_trabajadores = 0
-    total_trabajo_costo = 0
-    total_ganancia = 0
-    total_produccion = 0
-    total_tiempo = 0
-    total_plantas = 0
-    tipos_utilizados = 0
-
-    for i, cantidad in enumerate(mejor_individuo):
-        if cantidad == 0:
-            continue
-
-        planta = catalogo[i]
-        tipos_utilizados += 1
-
-        espacio = planta['espacio'] * cantidad
-        fert = planta['fertilizante_por_planta'] * cantidad
-        fert_cost = fert * planta['costo_fertilizante_unitario']
-        trab = planta['trabajadores_requeridos_por_planta'] * cantidad
-        trab_cost = trab * planta['costo_trabajador_unitario']
-        prod = planta['rendimiento'] * cantidad
-        ingreso = prod * planta['ganancia_unitaria']
-        tiempo = planta['tiempo'] * cantidad
-
-        total_area += espacio
-        total_fertilizante += fert
-        total_fertilizante_costo += fert_cost
-        total_trabajadores += trab
-        total_trabajo_costo += trab_cost
-        total_ganancia += ingreso
-        total_produccion += prod
-        total_tiempo += tiempo
-        total_plantas += cantidad
-
-        reporte["cultivos"].append({
-            "nombre": planta['nombre'].capitalize(),
-            "cantidad": cantidad,
-            "area_ocupada": espacio,
-            "produccion": prod,
-            "fertilizante": {"unidades": fert, "costo": fert_cost},
-            "trabajadores": {"unidades": trab, "costo": trab_cost},
-            "ganancia": ingreso
-        })
-
-    tiempo_promedio = total_tiempo / total_plantas if total_plantas > 0 else 0
-    ganancia_neta = total_ganancia - total_fertilizante_costo - total_trabajo_costo
-    produccion_m2 = total_produccion / area_total if area_total > 0 else 0
-
-    reporte["resumen"] = {
-        "area_ocupada": total_area,
-        "fertilizante_costo": total_fertilizante_costo,
-        "trabajo_costo": total_trabajo_costo,
-        "trabajadores": total_trabajadores,
-        "produccion_total": total_produccion,
-        "ganancia_bruta": total_ganancia,
-        "ganancia_neta": ganancia_neta,
-        "tiempo_promedio": tiempo_promedio,
-        "produccion_m2": produccion_m2,
-        "tipos_utilizados": tipos_utilizados,
-        "presupuesto_utilizado": total_fertilizante_costo + total_trabajo_costo,
-        "area_total": area_total,
-        "presupuesto_total": presupuesto_total
-    }
-    return reporte
-
-@app.route('/optimize', methods=['POST'])
+import uuid
+from concurrent.futures import CancelledError
+from flask import Blueprint, Flask, Response, current_app, g, request, jsonify, stream_with_context
+from flask_cors import CORS
+from servicio import (ErrorSolicitud, ErrorCatalogo, RUTA_CATALOGO, leer_parametros, ejecutar_optimizacion,
+                      cargar_catalogo, elegir_del_frente, calentar, parametros_continuacion,
+                      generacion_punto_control, purgar_puntos_control)
+from pareto import OBJETIVOS
+from barrido import leer_escenarios, barrer_escenarios
+from trabajos import GestorTrabajos, ColaLlena
+from cache_resultados import CacheResultados, huella_archivo
+from grafico import CacheGraficos, reducir_historial
+from metricas import RegistroMetricas
+
+# Segundos que tomó importar este módulo y sus dependencias (NumPy, el AG, Flask)
+TIEMPO_IMPORTACION = time.perf_counter() - _inicio_importacion
+
+# Configuración por defecto de `create_app`; cada clave puede venir también de
+# una variable de entorno con el mismo nombre
+CONFIG_POR_DEFECTO = {
+    # Procesos del pool de corridas, trabajos pendientes admitidos y vida de los terminados
+    'AGROGEN_MAX_PROCESOS': 2,
+    'AGROGEN_MAX_PENDIENTES': 32,
+    'AGROGEN_TTL_TRABAJOS': 3600,
+    # Niveles en disco de las cachés de respuestas y de gráficos (None = solo memoria)
+    'AGROGEN_CACHE_DIR': None,
+    'AGROGEN_GRAFICOS_DIR': None,
+    # Cargar el catálogo y calentar el AG al crear la aplicación (antes del fork de los workers)
+    'AGROGEN_PRECARGAR': True,
+    'AGROGEN_CALENTAR': True,
+}
+
+bp = Blueprint('agrogen', __name__)
+
+class Componentes:
+    """Estado compartido de una aplicación: métricas, trabajos y cachés"""
+
+    def __init__(self, config):
+        self.registro = crear_registro()
+        # Pool acotado de procesos para las corridas del algoritmo genético
+        self.gestor_trabajos = GestorTrabajos(
+            ejecutar_optimizacion, max_procesos=int(config['AGROGEN_MAX_PROCESOS']),
+            max_pendientes=int(config['AGROGEN_MAX_PENDIENTES']), ttl_segundos=int(config['AGROGEN_TTL_TRABAJOS']),
+            al_completar=lambda resultado: registrar_corrida(self.registro, resultado))
+        # Caché de respuestas de /optimize, con nivel en disco opcional
+        self.cache_resultados = CacheResultados(capacidad=256, directorio=config['AGROGEN_CACHE_DIR'])
+        # PNG de la evolución del fitness, renderizados solo cuando se piden
+        self.cache_graficos = CacheGraficos(capacidad=64, directorio=config['AGROGEN_GRAFICOS_DIR'])
+
+def componentes():
+    return current_app.extensions['agrogen']
+
+def crear_registro():
+    """Registro de métricas del servicio, expuesto en /metrics"""
+    registro = RegistroMetricas()
+    registro.describir('agrogen_http_duracion_segundos', 'histogram', 'Duración de las solicitudes HTTP')
+    registro.describir('agrogen_optimize_fase_segundos', 'histogram', 'Duración de cada fase de /optimize')
+    registro.describir('agrogen_fase_segundos_total', 'counter', 'Segundos acumulados por fase del algoritmo')
+    registro.describir('agrogen_fase_llamadas_total', 'counter', 'Veces que se ejecutó cada fase del algoritmo')
+    registro.describir('agrogen_eventos_total', 'counter', 'Eventos contados durante las corridas')
+    registro.describir('agrogen_corridas_total', 'counter', 'Corridas terminadas por modo')
+    registro.describir('agrogen_trabajos_activos', 'gauge', 'Trabajos pendientes o en ejecución')
+    registro.describir('agrogen_cache_aciertos', 'gauge', 'Aciertos de la caché de resultados')
+    registro.describir('agrogen_cache_fallos', 'gauge', 'Fallos de la caché de resultados')
+    registro.describir('agrogen_arranque_segundos', 'gauge', 'Duración de cada etapa del arranque de la aplicación')
+    return registro
+
+def registrar_corrida(registro, resultado):
+    """Acumula en el registro el perfil de una corrida terminada"""
+    registro.incrementar('agrogen_corridas_total', modo=resultado['modo'])
+    perfil = resultado.get('perfil')
+    if not perfil:
+        return
+    for nombre, fase in perfil['fases'].items():
+        registro.incrementar('agrogen_fase_segundos_total', fase['segundos'], fase=nombre)
+        registro.incrementar('agrogen_fase_llamadas_total', fase['llamadas'], fase=nombre)
+    for nombre, valor in perfil['contadores'].items():
+        registro.incrementar('agrogen_eventos_total', valor, evento=nombre)
+
+def _opcion(valor):
+    """Valor de configuración leído de una variable de entorno (texto) o ya tipado"""
+    if isinstance(valor, str) and valor.lower() in ('false', '0', 'no', ''):
+        return False
+    return valor
+
+def create_app(config=None):
+    """Crea la aplicación WSGI del servicio.
+
+    `config` sobrescribe `CONFIG_POR_DEFECTO` (y estas, las variables de
+    entorno). Con AGROGEN_PRECARGAR el catálogo se carga y compila aquí, y con
+    AGROGEN_CALENTAR se corre una optimización mínima para inicializar los
+    núcleos de NumPy y el AG. Pensado para un servidor pre-fork con precarga
+    (p. ej. `gunicorn --preload 'app:create_app()'`): todo se hace una vez en
+    el proceso maestro y los workers lo heredan al hacer fork, compartiendo
+    las páginas del catálogo por copia en escritura. Los tiempos de
+    importación, carga y calentamiento quedan en el log y en
+    'agrogen_arranque_segundos'.
+    """
+    inicio = time.perf_counter()
+    app = Flask(__name__)
+    app.config.update({clave: os.environ.get(clave, valor) for clave, valor in CONFIG_POR_DEFECTO.items()})
+    app.config.update(config or {})
+    app.logger.setLevel(logging.INFO)
+    # Configuración CORS más flexible para desarrollo
+    CORS(app, resources={r"/optimize*": {"origins": "*"}, r"/jobs*": {"origins": "*"}})
+
+    partes = Componentes(app.config)
+    app.extensions['agrogen'] = partes
+    app.register_blueprint(bp)
+
+    etapas = {'importacion': TIEMPO_IMPORTACION}
+    if _opcion(app.config['AGROGEN_PRECARGAR']):
+        marca = time.perf_counter()
+        try:
+            catalogo = cargar_catalogo()
+        except ErrorCatalogo as e:
+            # Sin catálogo la aplicación igual arranca: /optimize responderá con el error
+            app.logger.warning(f'No se pudo precargar el catálogo: {e}')
+            catalogo = None
+        etapas['catalogo'] = time.perf_counter() - marca
+        if catalogo is not None and _opcion(app.config['AGROGEN_CALENTAR']):
+            marca = time.perf_counter()
+            calentar(catalogo)
+            etapas['calentamiento'] = time.perf_counter() - marca
+        # Lo creado hasta acá no lo recorre el recolector: los workers no copian esas páginas al hacer fork
+        gc.freeze()
+    etapas['total'] = TIEMPO_IMPORTACION + time.perf_counter() - inicio
+
+    for etapa, segundos in etapas.items():
+        partes.registro.fijar('agrogen_arranque_segundos', segundos, etapa=etapa)
+    app.logger.info('Arranque: ' + ' | '.join(f'{etapa} {segundos * 1000:.0f} ms'
+                                              for etapa, segundos in etapas.items()))
+    return app
+
+# Tipos de contenido que vale la pena comprimir y tamaño mínimo para hacerlo
+TIPOS_COMPRIMIBLES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+MIN_BYTES_GZIP = 500
+
+@bp.before_app_request
+def iniciar_cronometro():
+    g.inicio = time.perf_counter()
+
+@bp.after_app_request
+def medir_latencia(response):
+    """Histograma de latencia por ruta (registrado antes que la compresión, así que la incluye)"""
+    if 'inicio' in g:
+        ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+        componentes().registro.observar('agrogen_http_duracion_segundos', time.perf_counter() - g.inicio,
+                          endpoint=ruta, metodo=request.method, estado=str(response.status_code))
+    return response
+
+@bp.after_app_request
+def comprimir_respuesta(response):
+    """Comprime con gzip las respuestas de texto si el cliente lo acepta (no las transmisiones SSE)"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or response.mimetype not in TIPOS_COMPRIMIBLES
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+    datos = response.get_data()
+    if len(datos) < MIN_BYTES_GZIP:
+        return response
+    response.set_data(gzip.compress(datos, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.headers.add('Vary', 'Accept-Encoding')
+    return response
+
+def resultado_compacto(resultado, max_puntos=None, perfil=False):
+    """Reporte más el historial de fitness, submuestreado si se pidió `max_puntos`, y el perfil si se pidió"""
+    generaciones, fitness = reducir_historial(resultado['historial'], max_puntos)
+    compacto = {'reporte': resultado['reporte'], 'historial': fitness,
+                'cota_lp': resultado['cota_lp'], 'gap': resultado['gap'],
+                'convergio': resultado['convergio'], 'tiempo_agotado': resultado['tiempo_agotado']}
+    if generaciones is not None:
+        compacto['generaciones'] = generaciones
+    if resultado.get('frente'):
+        # Sin los genomas: el cliente elige entre los reportes del frente
+        frente = resultado['frente']
+        compacto['frente'] = {'objetivos': frente['objetivos'], 'reportes': frente['reportes'],
+                              'elegido': frente['elegido']}
+    if resultado.get('cancelado'):
+        compacto['cancelado'] = True
+    if perfil and resultado.get('perfil'):
+        compacto['perfil'] = resultado['perfil']
+    return compacto
+
+def respuesta_cacheada(cuerpo, estado_cache):
+    return Response(cuerpo, mimetype='application/json', headers={
+        'X-Cache': estado_cache,
+        'X-Cache-Hits': str(componentes().cache_resultados.aciertos),
+        'X-Cache-Misses': str(componentes().cache_resultados.fallos),
+    })
+
+@bp.route('/jobs', methods=['POST'])
+def crear_trabajo():
+    try:
+        parametros = leer_parametros(request.get_json(silent=True))
+        # La corrida guarda puntos de control para poder continuarla luego (POST /jobs/<id>/continuar)
+        parametros['punto_control'] = uuid.uuid4().hex
+        purgar_puntos_control(componentes().gestor_trabajos.ttl_segundos)
+        id_trabajo = componentes().gestor_trabajos.enviar(parametros)
+    except ErrorSolicitud as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except ColaLlena as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    return jsonify({'success': True, 'job_id': id_trabajo, 'estado': 'pendiente'}), 202
+
+@bp.route('/jobs/<id_trabajo>/continuar', methods=['POST'])
+def continuar_trabajo(id_trabajo):
+    """Nuevo trabajo que retoma la corrida de uno terminado por {"generaciones": N} generaciones más"""
+    gestor = componentes().gestor_trabajos
+    info = gestor.estado(id_trabajo)
+    if info is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    if info['estado'] in ('pendiente', 'ejecutando'):
+        return jsonify({'success': False, 'error': 'El trabajo aún no terminó'}), 409
+    # Los modos exacto y pareto (y las corridas de /optimize) no dejan punto de control
+    originales = gestor.parametros(id_trabajo)
+    if not originales.get('punto_control') or generacion_punto_control(originales['punto_control']) is None:
+        return jsonify({'success': False, 'error': 'El trabajo no tiene un punto de control para continuar'}), 409
+    try:
+        parametros = parametros_continuacion(originales, request.get_json(silent=True), uuid.uuid4().hex)
+    except ErrorSolicitud as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        nuevo = gestor.enviar(parametros)
+    except ColaLlena as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    return jsonify({'success': True, 'job_id': nuevo, 'continua': id_trabajo, 'estado': 'pendiente',
+                    'generaciones': parametros['generaciones']}), 202
+
+@bp.route('/jobs/<id_trabajo>', methods=['GET'])
+def consultar_trabajo(id_trabajo):
+    info = componentes().gestor_trabajos.estado(id_trabajo)
+    if info is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    if info.get('resultado'):
+        info['resultado'] = resultado_compacto(info['resultado'], request.args.get('max_puntos', type=int),
+                                               perfil=request.args.get('perfil', '').lower() in ('1', 'true'))
+    return jsonify({'success': info['estado'] != 'error', **info})
+
+@bp.route('/jobs/<id_trabajo>/chart.png', methods=['GET'])
+def grafico_trabajo(id_trabajo):
+    """Gráfico de evolución del fitness de un trabajo terminado, renderizado bajo demanda"""
+    info = componentes().gestor_trabajos.estado(id_trabajo)
+    if info is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    if not info.get('resultado'):
+        return jsonify({'success': False, 'error': 'El trabajo aún no tiene resultado'}), 409
+
+    clave, png = componentes().cache_graficos.obtener(info['resultado']['historial'])
+    if request.if_none_match.contains(clave):
+        return Response(status=304)
+    respuesta = Response(png, mimetype='image/png')
+    respuesta.set_etag(clave)
+    respuesta.headers['Cache-Control'] = 'public, max-age=3600'
+    return respuesta
+
+@bp.route('/jobs/<id_trabajo>/frente', methods=['GET'])
+def punto_frente(id_trabajo):
+    """Punto del frente de Pareto de un trabajo terminado según los pesos de la query (?ganancia_neta=2&...)"""
+    info = componentes().gestor_trabajos.estado(id_trabajo)
+    if info is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    frente = (info.get('resultado') or {}).get('frente')
+    if not frente:
+        return jsonify({'success': False, 'error': 'El trabajo no tiene un frente de Pareto'}), 409
+    pesos = {nombre: request.args[nombre] for nombre in OBJETIVOS if nombre in request.args}
+    try:
+        return jsonify({'success': True, **elegir_del_frente(frente, pesos or None)})
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Pesos inválidos: {e}'}), 400
+
+@bp.route('/jobs/<id_trabajo>', methods=['DELETE'])
+def cancelar_trabajo(id_trabajo):
+    if not componentes().gestor_trabajos.cancelar(id_trabajo):
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    return jsonify({'success': True, 'job_id': id_trabajo, 'estado': 'cancelado'})
+
+def evento_sse(tipo, datos):
+    return f"event: {tipo}\ndata: {json.dumps(datos)}\n\n"
+
+def transmitir_trabajo(id_trabajo, cancelar_al_desconectar):
+    """Respuesta SSE con el progreso de un trabajo: 'inicio', un 'progreso' por generación y 'fin'"""
+    def flujo():
+        try:
+            yield evento_sse('inicio', {'job_id': id_trabajo})
+            for progreso in componentes().gestor_trabajos.eventos(id_trabajo):
+                yield evento_sse('progreso', progreso)
+            info = componentes().gestor_trabajos.estado(id_trabajo)
+            if info.get('resultado'):
+                info['resultado'] = resultado_compacto(info['resultado'])
+            yield evento_sse('fin', info)
+        except GeneratorExit:
+            # El cliente cerró la conexión: se detiene la corrida si así se pidió
+            if cancelar_al_desconectar:
+                componentes().gestor_trabajos.cancelar(id_trabajo)
+            raise
+
+    return Response(stream_with_context(flujo()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/jobs/<id_trabajo>/events', methods=['GET'])
+def eventos_trabajo(id_trabajo):
+    if componentes().gestor_trabajos.estado(id_trabajo) is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    return transmitir_trabajo(id_trabajo, cancelar_al_desconectar=False)
+
+@bp.route('/optimize/stream', methods=['GET'])
+def optimize_stream():
+    """Lanza una optimización (parámetros en la query) y transmite su progreso por SSE"""
+    try:
+        parametros = leer_parametros(request.args.to_dict())
+        id_trabajo = componentes().gestor_trabajos.enviar(parametros)
+    except ErrorSolicitud as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except ColaLlena as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    return transmitir_trabajo(id_trabajo, cancelar_al_desconectar=True)
+
+@bp.route('/optimize/sweep', methods=['POST'])
+def optimize_sweep():
+    """Resuelve una grilla o lista de escenarios (área, presupuesto) y transmite cada resultado como una línea NDJSON"""
+    try:
+        # Los procesos del barrido no superan los del pool de corridas
+        escenarios, procesos = leer_escenarios(request.get_json(silent=True),
+                                               max_procesos=int(current_app.config['AGROGEN_MAX_PROCESOS']))
+        catalogo = cargar_catalogo()
+    except ErrorSolicitud as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except ErrorCatalogo as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    def flujo():
+        for indice, resultado, error in barrer_escenarios(escenarios, catalogo, procesos=procesos):
+            linea = {'indice': indice, 'area': escenarios[indice]['area'], 'budget': escenarios[indice]['budget']}
+            if error is not None:
+                linea.update({'success': False, 'error': str(error)})
+            elif resultado is None:
+                linea.update({'success': False, 'error': 'La optimización no encontró solución'})
+            else:
+                registrar_corrida(componentes().registro, resultado)
+                linea.update({'success': True, **resultado_compacto(resultado, escenarios[indice]['max_puntos'],
+                                                                    escenarios[indice]['perfil'])})
+            yield json.dumps(linea) + '\n'
+
+    return Response(stream_with_context(flujo()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no'})
+
+@bp.route('/optimize', methods=['POST'])
 def optimize():
+    partes = componentes()
     try:
         # Validación de datos de entrada
-        data = request.get_json()
-        if not data:
-            return jsonify({'success': False, 'error': 'No se recibieron datos'}), 400
-        
-        area_total = float(data.get('area', 0))
-        presupuesto_total = float(data.get('budget', 0))
-        
-        if area_total <= 0 or presupuesto_total <= 0:
-            return jsonify({'success': False, 'error': 'Área y presupuesto deben ser mayores a 0'}), 400
-
-        # Carga del catálogo con manejo de errores
-        json_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'catalogo_semillas.json')
-        absolute_path = os.path.abspath(json_path)
-        print(f"Buscando archivo en: {absolute_path}")
-        
+        parametros = leer_parametros(request.get_json(silent=True))
+
+        # Solicitudes repetidas (mismos parámetros, semilla y catálogo) salen de la caché. Solo se
+        # cachean corridas reproducibles: sin semilla el resultado es al azar, con 'deadline_ms'
+        # depende de cuánto se alcanzó a correr y con 'arranque', de las consultas anteriores
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                catalogo = json.load(f)
+            hash_catalogo = huella_archivo(RUTA_CATALOGO)
         except FileNotFoundError:
-            return jsonify({'success': False, 'error': f'Archivo no encontrado: {absolute_path}'}), 500
-        except json.JSONDecodeError:
-            return jsonify({'success': False, 'error': 'Error al decodificar el archivo JSON'}), 500
-
-        # Ejecución del algoritmo genético
-        mejor, fitness, historial = algoritmo_genetico(
-            catalogo=catalogo,
-            area_total=area_total,
-            presupuesto_total=presupuesto_total,
-            generaciones=300,
-            tam_poblacion=100,
-            tasa_mutacion=0.2,
-            elitismo=True
-        )
-        
-        from evaluacion import evaluar_individuo
-        evaluacion = evaluar_individuo(mejor, catalogo, area_total, presupuesto_total)
-        
-        reporte = generar_reporte_individuo(mejor, catalogo, area_total, presupuesto_total)
-        
-        # Generar gráfico de evolución del fitness
-        plt.figure(figsize=(10, 5))
-        plt.plot(historial, marker='o', color='green')
-        plt.title("Evolución del Fitness por Generación")
-        plt.xlabel("Generación")
-        plt.ylabel("Fitness del Mejor Individuo")
-        plt.grid(True)
-        plt.tight_layout()
-        
-        img = io.BytesIO()
-        plt.savefig(img, format='png')
-        img.seek(0)
-        plot_data = base64.b64encode(img.getvalue()).decode('utf-8')
-        plt.close()
-        
-        return jsonify({
+            raise ErrorCatalogo(f'Archivo no encontrado: {os.path.abspath(RUTA_CATALOGO)}')
+        cacheable = (parametros['semilla'] is not None and parametros['deadline_ms'] is None
+                     and not parametros['arranque'])
+        if cacheable:
+            inicio = time.perf_counter()
+            cuerpo = partes.cache_resultados.obtener(parametros, hash_catalogo)
+            partes.registro.observar('agrogen_optimize_fase_segundos', time.perf_counter() - inicio, fase='cache')
+            if cuerpo is not None:
+                return respuesta_cacheada(cuerpo, 'HIT')
+
+        # Envoltorio síncrono sobre el sistema de trabajos
+        inicio = time.perf_counter()
+        # Nadie lee su progreso ni puede cancelarlo: sin seguimiento
+        id_trabajo = partes.gestor_trabajos.enviar(parametros, seguimiento=False)
+        try:
+            resultado = partes.gestor_trabajos.esperar(id_trabajo)
+        except CancelledError:
+            resultado = None
+        partes.registro.observar('agrogen_optimize_fase_segundos', time.perf_counter() - inicio, fase='ejecucion')
+        # La tarea devuelve None si se canceló antes de tener una solución
+        if resultado is None:
+            return jsonify({'success': False, 'job_id': id_trabajo,
+                            'error': 'La optimización se canceló antes de encontrar una solución'}), 409
+
+        inicio = time.perf_counter()
+        cuerpo = json.dumps({
             'success': True,
-            'reporte': reporte,
-            'grafico': plot_data
-        })
+            **resultado_compacto(resultado, parametros['max_puntos'], parametros['perfil'])
+        }).encode('utf-8')
+        partes.registro.observar('agrogen_optimize_fase_segundos', time.perf_counter() - inicio, fase='serializacion')
+        if cacheable and not resultado.get('cancelado') and not resultado.get('tiempo_agotado'):
+            partes.cache_resultados.guardar(parametros, hash_catalogo, cuerpo)
+        return respuesta_cacheada(cuerpo, 'MISS' if cacheable else 'BYPASS')
 
+    except ErrorSolicitud as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except ColaLlena as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except ErrorCatalogo as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
     except Exception as e:
-        app.logger.error(f"Error en /optimize: {str(e)}")
+        current_app.logger.error(f"Error en /optimize: {str(e)}")
         return jsonify({
             'success': False,
             'error': f'Error interno del servidor: {str(e)}'
         }), 500
 
+@bp.route('/metrics', methods=['GET'])
+def metricas():
+    """Métricas en el formato de texto de Prometheus"""
+    partes = componentes()
+    partes.registro.fijar('agrogen_trabajos_activos', partes.gestor_trabajos.activos())
+    partes.registro.fijar('agrogen_cache_aciertos', partes.cache_resultados.aciertos)
+    partes.registro.fijar('agrogen_cache_fallos', partes.cache_resultados.fallos)
+    return Response(partes.registro.exportar(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    create_app().run(debug=_opcion(os.environ.get('AGROGEN_DEBUG', False)), host='0.0.0.0', port=5000)
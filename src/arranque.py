@@ -0,0 +1,111 @@
+import json
+import math
+import os
+import threading
+import numpy as np
+from catalogo import compilar_catalogo
+from exacto import redondeo_lp
+from genetico import mutacion_conservadora
+
+# =======================
+# ALMACÉN DE SOLUCIONES PREVIAS
+# =======================
+class AlmacenSoluciones:
+    """Mejores genomas de corridas anteriores, por catálogo y (área, presupuesto).
+
+    Vive en memoria de cada proceso y, si se indica `directorio`, también en
+    disco (un archivo por consulta), de modo que los procesos del pool y los
+    reinicios del servidor comparten las soluciones. Cada consulta guarda la
+    solución de su última corrida y por catálogo se conservan a lo sumo
+    `capacidad` consultas (las más recientes).
+    """
+
+    def __init__(self, capacidad=500, directorio=None):
+        self.capacidad = capacidad
+        self.directorio = directorio
+        self._entradas = {}
+        self._lock = threading.Lock()
+
+    def _carpeta(self, hash_catalogo):
+        return os.path.join(self.directorio, hash_catalogo[:16])
+
+    def registrar(self, hash_catalogo, area_total, presupuesto_total, genoma):
+        entrada = {
+            'area': float(area_total),
+            'presupuesto': float(presupuesto_total),
+            'genoma': [int(x) for x in genoma],
+        }
+        clave = (round(entrada['area'], 2), round(entrada['presupuesto'], 2))
+        with self._lock:
+            entradas = self._entradas.setdefault(hash_catalogo, {})
+            entradas.pop(clave, None)
+            entradas[clave] = entrada
+            while len(entradas) > self.capacidad:
+                del entradas[next(iter(entradas))]
+
+        if self.directorio:
+            carpeta = self._carpeta(hash_catalogo)
+            os.makedirs(carpeta, exist_ok=True)
+            ruta = os.path.join(carpeta, f'{clave[0]}_{clave[1]}.json')
+            temporal = f'{ruta}.{os.getpid()}.tmp'
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(entrada, f)
+            os.replace(temporal, ruta)
+
+    def _todas(self, hash_catalogo):
+        with self._lock:
+            entradas = dict(self._entradas.get(hash_catalogo, {}))
+        if self.directorio and os.path.isdir(self._carpeta(hash_catalogo)):
+            for nombre in os.listdir(self._carpeta(hash_catalogo)):
+                if not nombre.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(self._carpeta(hash_catalogo), nombre), 'r', encoding='utf-8') as f:
+                        entrada = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                entradas.setdefault((round(entrada['area'], 2), round(entrada['presupuesto'], 2)), entrada)
+        return list(entradas.values())
+
+    def vecinos(self, hash_catalogo, area_total, presupuesto_total, k=3, distancia_max=0.5):
+        """Hasta `k` soluciones de las consultas más cercanas (distancia relativa en área y presupuesto)"""
+        def distancia(entrada):
+            return math.hypot(math.log(entrada['area'] / area_total),
+                              math.log(entrada['presupuesto'] / presupuesto_total))
+
+        cercanas = [e for e in self._todas(hash_catalogo) if distancia(e) <= distancia_max]
+        cercanas.sort(key=distancia)
+        return cercanas[:k]
+
+# =======================
+# POBLACIÓN DE ARRANQUE
+# =======================
+def escalar_genoma(genoma, area_origen, presupuesto_origen, area_total, presupuesto_total):
+    """Ajusta un genoma a nuevas restricciones escalando todas las cantidades por igual.
+
+    El factor es el menor de los cocientes de área y presupuesto, así que si el
+    genoma era factible en su consulta lo sigue siendo en la nueva.
+    """
+    factor = min(area_total / area_origen, presupuesto_total / presupuesto_origen)
+    return [int(x * factor) for x in genoma]
+
+def poblacion_arranque(catalogo, area_total, presupuesto_total, vecinos=(), mutantes=2, rng=None):
+    """Genomas para sembrar la población inicial.
+
+    Incluye las soluciones de consultas vecinas escaladas a las nuevas
+    restricciones y el redondeo de la relajación lineal, cada uno con unas
+    pocas variantes mutadas.
+    """
+    catalogo = compilar_catalogo(catalogo)
+    rng = rng if rng is not None else np.random.default_rng()
+    base = [escalar_genoma(vecino['genoma'], vecino['area'], vecino['presupuesto'], area_total, presupuesto_total)
+            for vecino in vecinos if len(vecino['genoma']) == len(catalogo)]
+    base.append(redondeo_lp(catalogo, area_total, presupuesto_total))
+
+    iniciales = []
+    for genoma in base:
+        iniciales.append(genoma)
+        for _ in range(mutantes):
+            iniciales.append(mutacion_conservadora(genoma, catalogo, area_total, presupuesto_total,
+                                                   intensidad=1.0, rng=rng))
+    return iniciales
@@ -0,0 +1,135 @@
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from arranque import AlmacenSoluciones
+from servicio import ErrorSolicitud, leer_parametros, ejecutar_optimizacion
+
+# Máximo de escenarios por barrido
+MAX_ESCENARIOS = 400
+# Distancia relativa (ver `distancia_escenarios`) hasta la que un escenario resuelto siembra a otro
+DISTANCIA_VECINOS = 0.5
+
+# =======================
+# PROCESOS TRABAJADORES
+# =======================
+# Cada proceso recibe el catálogo compilado una sola vez al arrancar
+_catalogo_proceso = None
+
+def _inicializar_proceso(catalogo):
+    global _catalogo_proceso
+    _catalogo_proceso = catalogo
+
+def _resolver_escenario(parametros, vecinos):
+    return ejecutar_optimizacion(parametros, catalogo=_catalogo_proceso, vecinos=vecinos)
+
+# =======================
+# ESCENARIOS
+# =======================
+def leer_escenarios(data, max_procesos=None):
+    """Parámetros de cada escenario de un barrido y procesos con que resolverlo.
+
+    Acepta una lista explícita (`escenarios: [{area, budget}, ...]`) o una
+    grilla (`areas: [...]` y `budgets: [...]`, producto cartesiano). El resto de
+    los campos se aplican a todos los escenarios. `procesos` es opcional y se
+    limita a `max_procesos` (por defecto, los núcleos de la máquina) y a la
+    cantidad de escenarios.
+    """
+    if not data:
+        raise ErrorSolicitud('No se recibieron datos')
+    if not isinstance(data, dict):
+        raise ErrorSolicitud('El cuerpo debe ser un objeto JSON')
+    if 'escenarios' in data:
+        if not isinstance(data['escenarios'], list):
+            raise ErrorSolicitud("'escenarios' debe ser una lista")
+        puntos = [(e.get('area'), e.get('budget')) for e in data['escenarios'] if isinstance(e, dict)]
+    elif 'areas' in data and 'budgets' in data:
+        if not isinstance(data['areas'], list) or not isinstance(data['budgets'], list):
+            raise ErrorSolicitud("'areas' y 'budgets' deben ser listas")
+        puntos = list(itertools.product(data['areas'], data['budgets']))
+    else:
+        raise ErrorSolicitud("Se requiere 'escenarios' o bien 'areas' y 'budgets'")
+    if not puntos:
+        raise ErrorSolicitud('El barrido no tiene escenarios')
+    if len(puntos) > MAX_ESCENARIOS:
+        raise ErrorSolicitud(f'Demasiados escenarios (máximo {MAX_ESCENARIOS})')
+
+    procesos = data.get('procesos')
+    try:
+        procesos = int(procesos) if procesos not in (None, '') else None
+    except (TypeError, ValueError):
+        raise ErrorSolicitud('procesos debe ser un entero')
+    if procesos is not None and procesos < 1:
+        raise ErrorSolicitud('procesos debe ser al menos 1')
+    max_procesos = max_procesos or os.cpu_count() or 1
+    procesos = min(procesos or max_procesos, max_procesos, len(puntos))
+
+    comunes = {clave: valor for clave, valor in data.items()
+               if clave not in ('escenarios', 'areas', 'budgets', 'procesos')}
+    escenarios = [leer_parametros({**comunes, 'area': area, 'budget': presupuesto}) for area, presupuesto in puntos]
+    return escenarios, procesos
+
+def distancia_escenarios(a, b):
+    """Distancia relativa en área y presupuesto (la misma de `AlmacenSoluciones.vecinos`)"""
+    return math.hypot(math.log(a['area'] / b['area']), math.log(a['budget'] / b['budget']))
+
+def barrer_escenarios(escenarios, catalogo, procesos=None):
+    """Resuelve los escenarios en un pool de procesos y los entrega a medida que terminan.
+
+    Genera tuplas (índice, resultado, error). Cada escenario arranca en caliente
+    desde las soluciones ya obtenidas de sus vecinos en el mismo barrido, así
+    que se despachan por oleadas: primero los que ya tienen algún vecino
+    resuelto, y en frío solo los que no tienen ningún vecino en curso (el
+    primero de cada zona). Si el consumidor deja de iterar, se cancelan los
+    escenarios aún no iniciados.
+    """
+    procesos = min(len(escenarios), procesos or os.cpu_count() or 1)
+    orden = sorted(range(len(escenarios)),
+                   key=lambda i: (math.log(escenarios[i]['area']), math.log(escenarios[i]['budget'])))
+    vecindad = [[j for j in range(len(escenarios))
+                 if j != i and distancia_escenarios(escenarios[i], escenarios[j]) <= DISTANCIA_VECINOS]
+                for i in range(len(escenarios))]
+    resueltos = AlmacenSoluciones(capacidad=len(escenarios))
+    terminado = [False] * len(escenarios)
+    pendientes = list(orden)
+
+    def siguiente(en_curso):
+        """Próximo escenario a despachar, o None si conviene esperar a que termine alguno"""
+        iniciados = set(en_curso.values())
+        for indice in pendientes:
+            if any(terminado[j] for j in vecindad[indice]):
+                return indice
+        for indice in pendientes:
+            if not any(j in iniciados for j in vecindad[indice]):
+                return indice
+        return None
+
+    pool = ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_proceso, initargs=(catalogo,))
+    try:
+        en_curso = {}
+        while pendientes or en_curso:
+            while pendientes and len(en_curso) < procesos:
+                indice = siguiente(en_curso)
+                if indice is None:
+                    break
+                pendientes.remove(indice)
+                parametros = escenarios[indice]
+                vecinos = resueltos.vecinos('barrido', parametros['area'], parametros['budget'],
+                                            distancia_max=DISTANCIA_VECINOS)
+                en_curso[pool.submit(_resolver_escenario, parametros, vecinos)] = indice
+
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                indice = en_curso.pop(futuro)
+                terminado[indice] = True
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    yield indice, None, e
+                    continue
+                if resultado is not None:
+                    resueltos.registrar('barrido', escenarios[indice]['area'], escenarios[indice]['budget'],
+                                        resultado['genoma'])
+                yield indice, resultado, None
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+# Hash por ruta junto con el (mtime, tamaño) con que se calculó
+_huellas = {}
+
+def huella_archivo(ruta):
+    """Hash SHA-256 del contenido de un archivo, recalculado solo si cambian su mtime o tamaño"""
+    info = os.stat(ruta)
+    firma = (info.st_mtime_ns, info.st_size)
+    memo = _huellas.get(ruta)
+    if memo is None or memo[0] != firma:
+        with open(ruta, 'rb') as f:
+            memo = (firma, hashlib.sha256(f.read()).hexdigest())
+        _huellas[ruta] = memo
+    return memo[1]
+
+class CacheResultados:
+    """Caché de respuestas de /optimize con un nivel LRU en memoria y otro opcional en disco.
+
+    La clave combina los parámetros normalizados de la solicitud (área y
+    presupuesto redondeados, parámetros del AG y semilla) con el hash del
+    catálogo. Los valores son los bytes de la respuesta ya serializada, de modo
+    que un acierto se devuelve sin volver a codificar JSON. Cuando cambia el
+    hash del catálogo se vacía la memoria y se borran del disco las entradas del
+    catálogo anterior.
+    """
+
+    def __init__(self, capacidad=256, directorio=None):
+        self.capacidad = capacidad
+        self.directorio = directorio
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+        self._hash_catalogo = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def clave(parametros, hash_catalogo):
+        normalizados = dict(parametros)
+        normalizados['area'] = round(float(parametros['area']), 2)
+        normalizados['budget'] = round(float(parametros['budget']), 2)
+        texto = json.dumps({'parametros': normalizados, 'catalogo': hash_catalogo}, sort_keys=True)
+        return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+    def _ruta(self, hash_catalogo, clave):
+        return os.path.join(self.directorio, hash_catalogo[:16], f'{clave}.json')
+
+    def _verificar_catalogo(self, hash_catalogo):
+        """Invalida todo lo guardado si el catálogo cambió desde la última consulta"""
+        if hash_catalogo == self._hash_catalogo:
+            return
+        self._entradas.clear()
+        self._hash_catalogo = hash_catalogo
+        if self.directorio and os.path.isdir(self.directorio):
+            for nombre in os.listdir(self.directorio):
+                if nombre != hash_catalogo[:16]:
+                    shutil.rmtree(os.path.join(self.directorio, nombre), ignore_errors=True)
+
+    def obtener(self, parametros, hash_catalogo):
+        """Bytes de la respuesta guardada o None; actualiza los contadores"""
+        clave = self.clave(parametros, hash_catalogo)
+        with self._lock:
+            self._verificar_catalogo(hash_catalogo)
+            cuerpo = self._entradas.get(clave)
+            if cuerpo is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return cuerpo
+
+        if self.directorio:
+            try:
+                with open(self._ruta(hash_catalogo, clave), 'rb') as f:
+                    cuerpo = f.read()
+            except OSError:
+                cuerpo = None
+
+        with self._lock:
+            if cuerpo is None:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            self._guardar_en_memoria(clave, cuerpo)
+            return cuerpo
+
+    def guardar(self, parametros, hash_catalogo, cuerpo):
+        clave = self.clave(parametros, hash_catalogo)
+        with self._lock:
+            self._verificar_catalogo(hash_catalogo)
+            self._guardar_en_memoria(clave, cuerpo)
+
+        if self.directorio:
+            ruta = self._ruta(hash_catalogo, clave)
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            temporal = f'{ruta}.{os.getpid()}.tmp'
+            with open(temporal, 'wb') as f:
+                f.write(cuerpo)
+            os.replace(temporal, ruta)
+
+    def _guardar_en_memoria(self, clave, cuerpo):
+        self._entradas[clave] = cuerpo
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
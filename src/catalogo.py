@@ -0,0 +1,269 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import shutil
+import numpy as np
+
+# Campos numéricos del JSON y atributo del catálogo compilado en que se guardan
+CAMPOS = {
+    'tiempo': 'tiempo',
+    'rendimiento': 'rendimiento',
+    'espacio': 'espacio',
+    'fertilizante_por_planta': 'fertilizante',
+    'trabajadores_requeridos_por_planta': 'trabajadores',
+    'costo_fertilizante_unitario': 'costo_fertilizante',
+    'costo_trabajador_unitario': 'costo_trabajador',
+    'ganancia_unitaria': 'ganancia_unitaria',
+}
+
+# Versión del formato binario en columnas
+VERSION_FORMATO = 1
+
+class CatalogoCompilado:
+    """Catálogo de semillas en forma columnar con constantes por semilla precalculadas.
+
+    Se construye una sola vez a partir de la lista de diccionarios del JSON y se
+    comparte entre el evaluador, los operadores genéticos, el inicializador y los
+    reportes. Cada atributo numérico es un vector con una posición por semilla.
+    """
+
+    def __init__(self, plantas):
+        plantas = list(plantas)
+        self._plantas = plantas
+        self._huella = None
+        self.origen = None
+        self.nombres = [planta['nombre'] for planta in plantas]
+        # Atributos originales del catálogo
+        for campo, atributo in CAMPOS.items():
+            setattr(self, atributo, np.array([planta[campo] for planta in plantas], dtype=float))
+        self._derivar()
+
+    @classmethod
+    def desde_columnas(cls, nombres, columnas, origen=None):
+        """Catálogo a partir de sus columnas (p. ej. arreglos mapeados de un catálogo binario).
+
+        `columnas` tiene un vector por campo del JSON; `origen` es la carpeta de
+        la que se cargaron, y permite enviar el catálogo a otros procesos sin
+        copiar los datos.
+        """
+        catalogo = cls.__new__(cls)
+        catalogo._plantas = None
+        catalogo._huella = None
+        catalogo.origen = origen
+        catalogo.nombres = list(nombres)
+        for campo, atributo in CAMPOS.items():
+            setattr(catalogo, atributo, columnas[campo])
+        catalogo._derivar()
+        return catalogo
+
+    def __reduce__(self):
+        # Un catálogo cargado de disco viaja como su carpeta: cada proceso la mapea por su cuenta. Si la
+        # generación ya se borró (se compiló otra dos veces), viajan las columnas
+        if self.origen is not None:
+            if os.path.isdir(self.origen):
+                return abrir_generacion, (self.origen,)
+            columnas = {campo: np.array(getattr(self, atributo)) for campo, atributo in CAMPOS.items()}
+            return CatalogoCompilado.desde_columnas, (self.nombres, columnas)
+        return CatalogoCompilado, (self.plantas,)
+
+    @property
+    def plantas(self):
+        """Registros del catálogo como diccionarios (se arman bajo demanda si se cargó en columnas)"""
+        if self._plantas is None:
+            self._plantas = [
+                {'nombre': nombre, **{campo: float(getattr(self, atributo)[i]) for campo, atributo in CAMPOS.items()}}
+                for i, nombre in enumerate(self.nombres)
+            ]
+        return self._plantas
+
+    @property
+    def huella(self):
+        """Hash (16 bytes) del contenido del catálogo: dos catálogos con las mismas semillas tienen la misma"""
+        if self._huella is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(json.dumps(self.nombres).encode('utf-8'))
+            for atributo in CAMPOS.values():
+                h.update(np.ascontiguousarray(getattr(self, atributo), dtype=float).tobytes())
+            self._huella = h.digest()
+        return self._huella
+
+    def _derivar(self):
+        # Constantes por planta
+        self.costo_fertilizante_planta = self.fertilizante * self.costo_fertilizante
+        self.costo_trabajo_planta = self.trabajadores * self.costo_trabajador
+        self.costo_unitario = (self.fertilizante * self.costo_fertilizante +
+                               self.trabajadores * self.costo_trabajador)
+        self.ingreso_unitario = self.rendimiento * self.ganancia_unitaria
+        self.ganancia_neta_unitaria = self.ingreso_unitario - self.costo_unitario
+
+        # Eficiencia usada por la reparación: ingreso por unidad de costo
+        self.eficiencia = self.ingreso_unitario / np.maximum(self.costo_unitario, 1)
+        self.orden_eficiencia = np.argsort(self.eficiencia, kind='stable')
+
+        # Rentabilidad por unidad de espacio y tiempo, y su ranking descendente
+        rentabilidad_espacial = np.divide(self.ganancia_neta_unitaria, self.espacio,
+                                          out=np.zeros(len(self)), where=self.espacio > 0)
+        rentabilidad_temporal = np.divide(self.ganancia_neta_unitaria, self.tiempo,
+                                          out=np.zeros(len(self)), where=self.tiempo > 0)
+        self.rentabilidad = rentabilidad_espacial * 0.7 + rentabilidad_temporal * 0.3
+        self.orden_rentabilidad = np.argsort(-self.rentabilidad, kind='stable')
+
+    def uso_recursos(self, matriz):
+        """Área, costo de fertilizante y costo de trabajo de cada fila de una matriz de cantidades.
+
+        Se suma fila a fila (no con BLAS) para que el resultado de un genoma no
+        dependa de con qué otros se evalúe: la reparación y el evaluador deben
+        coincidir exactamente al decidir si un genoma respeta las restricciones.
+        """
+        return ((matriz * self.espacio).sum(axis=1),
+                (matriz * self.costo_fertilizante_planta).sum(axis=1),
+                (matriz * self.costo_trabajo_planta).sum(axis=1))
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __getitem__(self, indice):
+        return self.plantas[indice]
+
+def compilar_catalogo(catalogo):
+    """Devuelve el catálogo compilado; si ya lo está, lo reutiliza sin copiarlo"""
+    if isinstance(catalogo, CatalogoCompilado):
+        return catalogo
+    return CatalogoCompilado(catalogo)
+
+# =======================
+# VALIDACIÓN
+# =======================
+def validar_plantas(plantas):
+    """Verifica el esquema del catálogo JSON; lanza ValueError con el primer problema encontrado"""
+    if not isinstance(plantas, list) or not plantas:
+        raise ValueError('El catálogo debe ser una lista no vacía de semillas')
+    nombres = set()
+    for i, planta in enumerate(plantas):
+        if not isinstance(planta, dict):
+            raise ValueError(f'La entrada {i} no es un objeto')
+        nombre = planta.get('nombre')
+        if not isinstance(nombre, str) or not nombre:
+            raise ValueError(f'La entrada {i} no tiene nombre')
+        if nombre in nombres:
+            raise ValueError(f"Nombre repetido: '{nombre}'")
+        nombres.add(nombre)
+        for campo in CAMPOS:
+            valor = planta.get(campo)
+            if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                raise ValueError(f"'{nombre}': el campo '{campo}' falta o no es numérico")
+            if not math.isfinite(valor) or valor < 0:
+                raise ValueError(f"'{nombre}': el campo '{campo}' debe ser un número finito no negativo")
+
+# =======================
+# FORMATO BINARIO EN COLUMNAS
+# =======================
+# Un catálogo compilado se guarda en una carpeta <nombre>.columnas junto al JSON.
+# Cada compilación escribe una subcarpeta (generación) con un .npy por campo y
+# meta.json (versión, nombres y archivo fuente); `actual.json` apunta a la
+# generación vigente. Las columnas se abren con mmap en solo lectura, así que
+# todos los procesos comparten las mismas páginas y arrancan sin parsear JSON.
+
+def ruta_binaria(ruta_json):
+    return os.path.abspath(os.path.splitext(ruta_json)[0] + '.columnas')
+
+def _firma_fuente(ruta_json):
+    info = os.stat(ruta_json)
+    return {'mtime_ns': info.st_mtime_ns, 'tamano': info.st_size}
+
+def guardar_catalogo(plantas, directorio, fuente=None, generacion=None):
+    """Escribe una generación del catálogo (ya validado) y la marca como vigente.
+
+    Devuelve la ruta de la generación. Si otro proceso escribió la misma
+    generación al mismo tiempo, se conserva la suya.
+    """
+    catalogo = compilar_catalogo(plantas)
+    generacion = generacion or hashlib.sha256(
+        json.dumps(catalogo.plantas, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    destino = os.path.join(directorio, generacion)
+    if not os.path.isdir(destino):
+        temporal = f'{destino}.{os.getpid()}.tmp'
+        os.makedirs(temporal, exist_ok=True)
+        for campo, atributo in CAMPOS.items():
+            np.save(os.path.join(temporal, f'{campo}.npy'), getattr(catalogo, atributo))
+        with open(os.path.join(temporal, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version': VERSION_FORMATO, 'semillas': len(catalogo), 'nombres': catalogo.nombres}, f,
+                      ensure_ascii=False)
+        try:
+            os.rename(temporal, destino)
+        except OSError:
+            shutil.rmtree(temporal, ignore_errors=True)
+
+    puntero = os.path.join(directorio, 'actual.json')
+    try:
+        with open(puntero, 'r', encoding='utf-8') as f:
+            anterior = json.load(f).get('generacion')
+    except (FileNotFoundError, ValueError):
+        anterior = None
+    temporal = f'{puntero}.{os.getpid()}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({'generacion': generacion, 'fuente': fuente}, f)
+    os.replace(temporal, puntero)
+
+    # Se borran las generaciones viejas salvo la anterior, que puede estar abierta en procesos que aún la
+    # envían por su carpeta (ver `CatalogoCompilado.__reduce__`); los que ya la tengan mapeada no se ven afectados
+    for nombre in os.listdir(directorio):
+        if nombre not in (generacion, anterior, 'actual.json') and not nombre.endswith('.tmp'):
+            ruta = os.path.join(directorio, nombre)
+            if os.path.isdir(ruta):
+                shutil.rmtree(ruta, ignore_errors=True)
+    return destino
+
+def abrir_generacion(ruta):
+    """Catálogo compilado con las columnas de una generación mapeadas en memoria (solo lectura)"""
+    with open(os.path.join(ruta, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != VERSION_FORMATO:
+        raise ValueError(f"Versión de formato no soportada: {meta.get('version')}")
+    columnas = {campo: np.load(os.path.join(ruta, f'{campo}.npy'), mmap_mode='r') for campo in CAMPOS}
+    if any(len(columna) != meta['semillas'] for columna in columnas.values()) or \
+            len(meta['nombres']) != meta['semillas']:
+        raise ValueError(f'Catálogo binario inconsistente: {ruta}')
+    return CatalogoCompilado.desde_columnas(meta['nombres'], columnas, origen=ruta)
+
+def abrir_catalogo(directorio, ruta_json=None):
+    """Abre la generación vigente de un catálogo binario.
+
+    Con `ruta_json` devuelve None si el catálogo no existe o quedó
+    desactualizado (el JSON cambió de fecha de modificación o de tamaño).
+    """
+    try:
+        with open(os.path.join(directorio, 'actual.json'), 'r', encoding='utf-8') as f:
+            puntero = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if ruta_json is not None and puntero.get('fuente') != _firma_fuente(ruta_json):
+        return None
+    try:
+        return abrir_generacion(os.path.join(directorio, puntero['generacion']))
+    except FileNotFoundError:
+        return None
+
+def compilar_archivo(ruta_json, directorio=None):
+    """Valida el catálogo JSON, lo escribe en formato binario y lo devuelve abierto con mmap"""
+    directorio = directorio or ruta_binaria(ruta_json)
+    fuente = _firma_fuente(ruta_json)
+    with open(ruta_json, 'rb') as f:
+        datos = f.read()
+    plantas = json.loads(datos)
+    validar_plantas(plantas)
+    generacion = hashlib.sha256(datos).hexdigest()[:16]
+    return abrir_generacion(guardar_catalogo(plantas, directorio, fuente=fuente, generacion=generacion))
+
+def main():
+    parser = argparse.ArgumentParser(description='Compila un catálogo de semillas JSON al formato binario en columnas')
+    parser.add_argument('ruta', help='catálogo JSON')
+    parser.add_argument('--salida', help='carpeta de salida (por defecto, <ruta sin extensión>.columnas)')
+    args = parser.parse_args()
+    catalogo = compilar_archivo(args.ruta, args.salida)
+    print(f'{len(catalogo)} semillas compiladas en {catalogo.origen}')
+
+if __name__ == '__main__':
+    main()
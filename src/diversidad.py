@@ -0,0 +1,140 @@
+import numpy as np
+
+# =======================
+# DETECCIÓN DE CASI-DUPLICADOS
+# =======================
+# La similitud entre dos genomas es la fracción de genes iguales. En vez de
+# comparar cada individuo con todos los demás, los genomas se agrupan en
+# cubetas por hash y solo se comparan los que comparten alguna: por cada banda
+# (locality-sensitive hashing), una por MinHash de los pares (gen, cantidad)
+# sembrados. Como la mayoría de los genes valen 0, dos genomas muy parecidos
+# comparten casi todos esos pares y caen en la misma cubeta con probabilidad
+# alta (los duplicados exactos, en todas), mientras que genomas distintos se
+# reparten en cubetas chicas. Cada fila se compara solo con la primera fila de
+# cada cubeta suya (la que tiene prioridad y casi siempre se conserva), así que
+# el número de comparaciones es lineal en la población; todas se hacen a la
+# vez, por bloques.
+
+# Celdas (pares x genes) que se comparan por bloque, para acotar la memoria
+CELDAS_POR_BLOQUE = 1 << 22
+# Las firmas de cubeta son de 31 bits: caben con el número de fila en una sola
+# clave de 64 bits que se ordena de una vez (una colisión solo agrega una comparación)
+MASCARA_FIRMA = (1 << 31) - 1
+# Rondas vectorizadas al resolver descartes antes de terminar fila por fila
+RONDAS_VECTORIZADAS = 8
+# Se combinan con las firmas para que las cubetas de bandas distintas no se mezclen (hasta 64 bandas)
+_CONSTANTES_BANDA = np.random.default_rng(0).integers(0, MASCARA_FIRMA, size=64, dtype=np.int64)
+
+def _constantes(rng, forma):
+    """Enteros impares de 32 bits al azar (multiplicar por ellos mezcla los bits)"""
+    return rng.integers(1, 1 << 32, size=forma, dtype=np.uint32) | 1
+
+def firmas_por_banda(matriz, bandas, hashes_por_banda, rng):
+    """Cubeta de cada fila en cada banda: una firma MinHash (bandas x filas).
+
+    Cada banda combina `hashes_por_banda` MinHash de los pares (gen, cantidad)
+    no nulos de la fila: dos filas comparten la cubeta de una banda con
+    probabilidad J^hashes_por_banda, con J la similitud de Jaccard de esos pares.
+    """
+    n_filas, n_genes = matriz.shape
+    firmas = np.zeros((bandas, n_filas), dtype=np.int64)
+    plana = matriz.ravel()
+    posiciones = np.flatnonzero(plana != 0)
+    if len(posiciones) == 0:
+        return firmas
+    filas = posiciones // n_genes
+    conteos = np.bincount(filas, minlength=n_filas)
+    con_genes = conteos > 0
+    inicios = (np.cumsum(conteos) - conteos)[con_genes]
+
+    # Hash base (32 bits) de cada par (gen, cantidad)
+    multiplicadores, mezcla_base = _constantes(rng, n_genes), _constantes(rng, 1)
+    base = plana[posiciones].astype(np.uint32) * multiplicadores[posiciones - filas * n_genes]
+    base ^= base >> 15
+    base *= mezcla_base
+
+    # Cada MinHash permuta el hash base con otras constantes
+    xor, mezcla = _constantes(rng, (2, bandas * hashes_por_banda, 1))
+    permutados = base ^ xor
+    permutados *= mezcla
+    minimos = np.minimum.reduceat(permutados, inicios, axis=1).astype(np.int64)
+    minimos = minimos.reshape(bandas, hashes_por_banda, -1)
+    firma = minimos[:, 0]
+    for h in range(1, hashes_por_banda):
+        firma = firma * 0x9E3779B1 + minimos[:, h]
+    firma = (firma ^ (firma >> 31)) & MASCARA_FIRMA
+    if con_genes.all():
+        return firma
+    firmas[:, con_genes] = firma
+    return firmas
+
+def pares_candidatos(firmas):
+    """Pares (i, j), j < i, de filas que comparten cubeta, con j la primera fila de la cubeta.
+
+    Los pares salen ordenados por i y sin repetir.
+    """
+    n_cubetas, n_filas = firmas.shape
+    claves = (firmas ^ _CONSTANTES_BANDA[:n_cubetas, None]) << 32 | np.arange(n_filas)
+    claves = np.sort(claves.ravel())
+    cubeta = claves >> 32
+    filas = claves & 0xFFFFFFFF
+    inicio = np.r_[True, cubeta[1:] != cubeta[:-1]]
+    primera = filas[np.flatnonzero(inicio)[np.cumsum(inicio) - 1]]
+    repetida = ~inicio
+    pares = filas[repetida] * n_filas + primera[repetida]
+    # Un mismo par puede salir de varias cubetas
+    pares = np.sort(pares)
+    distintos = np.ones(len(pares), dtype=bool)
+    distintos[1:] = pares[1:] != pares[:-1]
+    pares = pares[distintos]
+    return pares // n_filas, pares % n_filas
+
+def similitud_pares(matriz, i, j):
+    """Fracción de genes iguales entre las filas i[k] y j[k], por bloques de pares"""
+    similitud = np.empty(len(i))
+    paso = max(1, CELDAS_POR_BLOQUE // max(1, matriz.shape[1]))
+    for inicio in range(0, len(i), paso):
+        fin = inicio + paso
+        similitud[inicio:fin] = (matriz[i[inicio:fin]] == matriz[j[inicio:fin]]).mean(axis=1)
+    return similitud
+
+def filas_diversas(poblacion, umbral_similitud=0.95, bandas=3, hashes_por_banda=2, rng=None):
+    """Máscara de las filas que se conservan al eliminar casi-duplicados.
+
+    Las filas se recorren en orden (las primeras, p. ej. la élite, tienen
+    prioridad) y se descarta cada fila cuya similitud con alguna fila anterior
+    ya conservada alcance el umbral. Solo se comparan filas que comparten una
+    cubeta (ver `firmas_por_banda` y `pares_candidatos`): a lo sumo
+    `bandas` comparaciones por fila, todas vectorizadas.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    matriz = np.asarray(poblacion).reshape(len(poblacion), -1)
+    if len(matriz) == 0 or matriz.shape[1] == 0:
+        return np.ones(len(matriz), dtype=bool)
+
+    pares_i, pares_j = pares_candidatos(firmas_por_banda(matriz, bandas, hashes_por_banda, rng))
+    parecidas = similitud_pares(matriz, pares_i, pares_j) >= umbral_similitud
+    return resolver_descartes(len(matriz), pares_i[parecidas], pares_j[parecidas])
+
+def resolver_descartes(n_filas, pares_i, pares_j):
+    """Conservadas tras descartar cada i cuya j parecida (j < i) siga conservada.
+
+    Equivale a recorrer los pares en orden de i. Se resuelven por rondas
+    vectorizadas: los pares cuya j ya no depende de otra fila se deciden de una
+    vez. Si quedan cadenas largas tras `RONDAS_VECTORIZADAS`, el resto de los
+    pares (que siguen ordenados por i) se recorre en Python.
+    """
+    conservadas = np.ones(n_filas, dtype=bool)
+    for _ in range(RONDAS_VECTORIZADAS):
+        if len(pares_i) == 0:
+            return conservadas
+        pendiente = np.zeros(n_filas, dtype=bool)
+        pendiente[pares_i] = True
+        resuelto = ~pendiente[pares_j]
+        conservadas[pares_i[resuelto & conservadas[pares_j]]] = False
+        quedan = ~resuelto & conservadas[pares_i]
+        pares_i, pares_j = pares_i[quedan], pares_j[quedan]
+    for i, j in zip(pares_i.tolist(), pares_j.tolist()):
+        if conservadas[i] and conservadas[j]:
+            conservadas[i] = False
+    return conservadas
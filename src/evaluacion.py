@@ -1,175 +1,398 @@
+import hashlib
+import struct
+from collections import OrderedDict
 import numpy as np
+from catalogo import compilar_catalogo
+from genoma import como_matriz
 
-def evaluar_individuo(individuo, catalogo, area_total, presupuesto_total):
-    """Evalúa un individuo y devuelve métricas detalladas"""
-    area_ocupada = 0
-    suma_tiempo = 0
-    total_cantidad = 0
-    ganancia_bruta = 0
-    costo_total_fertilizante = 0
-    costo_total_trabajo = 0
-    produccion_total = 0
-    trabajadores_utilizados = 0
-    tipos_cultivo = 0
-    max_dominancia = 0
-
-    for i, cantidad in enumerate(individuo):
-        if cantidad == 0:
-            continue
-        planta = catalogo[i]
-        tipos_cultivo += 1
-
-        espacio_total = planta['espacio'] * cantidad
-        tiempo_total = planta['tiempo'] * cantidad
-        produccion = planta['rendimiento'] * cantidad
-        ingreso = produccion * planta['ganancia_unitaria']
-        costo_fertilizante = planta['fertilizante_por_planta'] * cantidad * planta['costo_fertilizante_unitario']
-        costo_trabajo = planta['trabajadores_requeridos_por_planta'] * cantidad * planta['costo_trabajador_unitario']
-        trabajadores = planta['trabajadores_requeridos_por_planta'] * cantidad
-
-        area_ocupada += espacio_total
-        suma_tiempo += tiempo_total
-        total_cantidad += cantidad
-        ganancia_bruta += ingreso
-        costo_total_fertilizante += costo_fertilizante
-        costo_total_trabajo += costo_trabajo
-        produccion_total += produccion
-        trabajadores_utilizados += trabajadores
-
-        # Calcular dominancia de esta planta
-        if area_total > 0:
-            dominancia = espacio_total / area_total
-            max_dominancia = max(max_dominancia, dominancia)
+# Orden de las métricas crudas cuando se guardan como fila en la caché
+CAMPOS_METRICAS = ('ganancia_neta', 'uso_terreno', 'tiempo_promedio', 'costo_fertilizante',
+                   'costo_trabajo', 'produccion_por_m2', 'produccion_total', 'tipos_cultivo',
+                   'trabajadores_requeridos', 'valido', 'penalizacion')
 
-    # Verificar restricciones
-    exceso_area = max(0, area_ocupada - area_total)
-    exceso_presupuesto = max(0, (costo_total_fertilizante + costo_total_trabajo) - presupuesto_total)
+# Holgura relativa con que se comparan los usos de área y presupuesto con sus
+# capacidades: sumas de punto flotante en distinto orden no deben volver
+# inválido un genoma que llena exactamente el terreno o el presupuesto
+TOLERANCIA_CAPACIDAD = 1e-9
 
-    # Si viola restricciones, aplicar penalización
-    if exceso_area > 0 or exceso_presupuesto > 0:
-        penalizacion_area = (exceso_area / area_total) * 100 if area_total > 0 else 0
-        penalizacion_presupuesto = (exceso_presupuesto / presupuesto_total) * 100 if presupuesto_total > 0 else 0
-        penalizacion_total = penalizacion_area + penalizacion_presupuesto
-        ganancia_neta = -(1000 + penalizacion_total * 1000)
+def dentro_de_capacidad(uso, capacidad):
+    """True donde `uso` no supera `capacidad` (con la tolerancia relativa)"""
+    return uso <= capacidad * (1 + TOLERANCIA_CAPACIDAD)
 
-        return {
-            'ganancia_neta': ganancia_neta,
-            'uso_terreno': area_ocupada / area_total if area_total > 0 else 0,
-            'tiempo_promedio': suma_tiempo / total_cantidad if total_cantidad > 0 else 0,
-            'costo_fertilizante': costo_total_fertilizante,
-            'costo_trabajo': costo_total_trabajo,
-            'produccion_por_m2': 0,
-            'produccion_total': produccion_total,
-            'tipos_cultivo': tipos_cultivo,
-            'trabajadores_requeridos': trabajadores_utilizados,
-            'valido': False,
-            'penalizacion': penalizacion_total
-        }
+# =======================
+# TOTALES POR GENOMA Y EVALUACIÓN DELTA
+# =======================
+class TotalesGenoma:
+    """Sumas por genoma de las que salen todas las métricas crudas, en columnas (una posición por fila).
+
+    Cuando cambia un solo gen, `delta` da los totales nuevos con O(1) trabajo
+    por cambio, sin recorrer el resto del genoma, y `aplicar` los incorpora.
+    La mayor área ocupada por una sola semilla (dominancia) también se
+    actualiza en O(1), salvo cuando baja justo el gen dominante: `delta` la
+    sobreestima (penaliza de más) y `aplicar` recalcula esa fila.
+    """
+
+    CAMPOS = ('area', 'costo_fertilizante', 'costo_trabajo', 'suma_tiempo', 'cantidad', 'produccion',
+              'ingreso', 'trabajadores', 'tipos', 'area_maxima')
+
+    def __init__(self, columnas):
+        self.columnas = columnas
+
+    def __getitem__(self, campo):
+        return self.columnas[campo]
+
+    def __len__(self):
+        return len(self.columnas['area'])
+
+    @classmethod
+    def desde_matriz(cls, matriz, catalogo):
+        area, costo_fertilizante, costo_trabajo = catalogo.uso_recursos(matriz)
+        return cls({
+            'area': area,
+            'costo_fertilizante': costo_fertilizante,
+            'costo_trabajo': costo_trabajo,
+            'suma_tiempo': matriz @ catalogo.tiempo,
+            'cantidad': matriz.sum(axis=1),
+            'produccion': matriz @ catalogo.rendimiento,
+            'ingreso': matriz @ catalogo.ingreso_unitario,
+            'trabajadores': matriz @ catalogo.trabajadores,
+            'tipos': np.count_nonzero(matriz, axis=1),
+            'area_maxima': ((matriz * catalogo.espacio).max(axis=1) if matriz.shape[1] > 0
+                            else np.zeros(len(matriz))),
+        })
+
+    def delta(self, filas, genes, actuales, nuevas, catalogo):
+        """Totales de `filas` si el gen `genes` de cada una pasara de `actuales` a `nuevas` (sin modificar nada)"""
+        cambio = np.asarray(nuevas, dtype=np.int64) - actuales
+        c = {campo: self.columnas[campo][filas] for campo in self.CAMPOS}
+        return TotalesGenoma({
+            'area': c['area'] + cambio * catalogo.espacio[genes],
+            'costo_fertilizante': c['costo_fertilizante'] + cambio * catalogo.costo_fertilizante_planta[genes],
+            'costo_trabajo': c['costo_trabajo'] + cambio * catalogo.costo_trabajo_planta[genes],
+            'suma_tiempo': c['suma_tiempo'] + cambio * catalogo.tiempo[genes],
+            'cantidad': c['cantidad'] + cambio,
+            'produccion': c['produccion'] + cambio * catalogo.rendimiento[genes],
+            'ingreso': c['ingreso'] + cambio * catalogo.ingreso_unitario[genes],
+            'trabajadores': c['trabajadores'] + cambio * catalogo.trabajadores[genes],
+            'tipos': c['tipos'] + (np.asarray(nuevas) > 0) - (np.asarray(actuales) > 0),
+            'area_maxima': np.maximum(c['area_maxima'], nuevas * catalogo.espacio[genes]),
+        })
+
+    def aplicar(self, filas, genes, nuevas, matriz, catalogo):
+        """Escribe los cambios en `matriz` y actualiza los totales (una fila distinta por cambio)"""
+        actuales = matriz[filas, genes]
+        nuevos = self.delta(filas, genes, actuales, nuevas, catalogo)
+        # Si bajó el gen dominante, la nueva dominancia puede ser otro gen
+        bajo_dominante = (nuevas < actuales) & (actuales * catalogo.espacio[genes] >= nuevos['area_maxima'])
+        matriz[filas, genes] = nuevas
+        for campo in self.CAMPOS:
+            self.columnas[campo][filas] = nuevos[campo]
+        recalcular = filas[bajo_dominante]
+        if len(recalcular):
+            self.columnas['area_maxima'][recalcular] = (matriz[recalcular] * catalogo.espacio).max(axis=1)
+
+def metricas_desde_totales(totales, area_total, presupuesto_total):
+    """Métricas crudas (como `calcular_metricas`) a partir de los totales de cada genoma"""
+    n = len(totales)
+    area_ocupada = totales['area']
+    costo_fertilizante = totales['costo_fertilizante']
+    costo_trabajo = totales['costo_trabajo']
+    total_cantidad = totales['cantidad']
+    produccion_total = totales['produccion']
+    trabajadores = totales['trabajadores']
 
-    # Individuo válido
-    tiempo_promedio = suma_tiempo / total_cantidad if total_cantidad > 0 else 0
-    ganancia_neta = ganancia_bruta - costo_total_fertilizante - costo_total_trabajo
-    produccion_por_m2 = produccion_total / area_total if area_total > 0 else 0
-    uso_terreno = area_ocupada / area_total if area_total > 0 else 0
+    # Dominancia: fracción del terreno que ocupa la planta más extendida
+    max_dominancia = totales['area_maxima'] / area_total if area_total > 0 else np.zeros(n)
+
+    # Verificar restricciones
+    exceso_area = np.maximum(0, area_ocupada - area_total)
+    exceso_presupuesto = np.maximum(0, (costo_fertilizante + costo_trabajo) - presupuesto_total)
+    valido = (dentro_de_capacidad(area_ocupada, area_total) &
+              dentro_de_capacidad(costo_fertilizante + costo_trabajo, presupuesto_total))
+
+    penalizacion_area = (exceso_area / area_total) * 100 if area_total > 0 else np.zeros(n)
+    penalizacion_presupuesto = (exceso_presupuesto / presupuesto_total) * 100 if presupuesto_total > 0 else np.zeros(n)
+    penalizacion_restricciones = penalizacion_area + penalizacion_presupuesto
 
     # Penalización por dominancia excesiva (umbral 0.6)
-    penalizacion_dominancia = max(0, (max_dominancia - 0.6) * 100) if max_dominancia > 0.6 else 0
+    penalizacion_dominancia = np.where(max_dominancia > 0.6, np.maximum(0, (max_dominancia - 0.6) * 100), 0)
 
     # Penalización por uso excesivo de trabajadores
     max_trabajadores_esperados = area_total * 0.3 / 0.2
-    penalizacion_trabajadores = max(0, (trabajadores_utilizados - max_trabajadores_esperados) / max_trabajadores_esperados) * 10 if max_trabajadores_esperados > 0 else 0
+    if max_trabajadores_esperados > 0:
+        penalizacion_trabajadores = np.maximum(0, (trabajadores - max_trabajadores_esperados) / max_trabajadores_esperados) * 10
+    else:
+        penalizacion_trabajadores = np.zeros(n)
+
+    tiempo_promedio = np.divide(totales['suma_tiempo'], total_cantidad,
+                                out=np.zeros(n), where=total_cantidad > 0)
+    uso_terreno = area_ocupada / area_total if area_total > 0 else np.zeros(n)
+    produccion_por_m2 = produccion_total / area_total if area_total > 0 else np.zeros(n)
 
     return {
-        'ganancia_neta': ganancia_neta,
+        'ganancia_neta': np.where(valido, totales['ingreso'] - costo_fertilizante - costo_trabajo,
+                                  -(1000 + penalizacion_restricciones * 1000)),
         'uso_terreno': uso_terreno,
         'tiempo_promedio': tiempo_promedio,
-        'costo_fertilizante': costo_total_fertilizante,
-        'costo_trabajo': costo_total_trabajo,
-        'produccion_por_m2': produccion_por_m2,
+        'costo_fertilizante': costo_fertilizante,
+        'costo_trabajo': costo_trabajo,
+        'produccion_por_m2': np.where(valido, produccion_por_m2, 0),
         'produccion_total': produccion_total,
-        'tipos_cultivo': tipos_cultivo,
-        'trabajadores_requeridos': trabajadores_utilizados,
-        'valido': True,
-        'penalizacion': penalizacion_dominancia + penalizacion_trabajadores
+        'tipos_cultivo': totales['tipos'],
+        'trabajadores_requeridos': trabajadores,
+        'valido': valido,
+        'penalizacion': np.where(valido, penalizacion_dominancia + penalizacion_trabajadores,
+                                 penalizacion_restricciones)
     }
 
-def evaluar_poblacion(poblacion, catalogo, area_total, presupuesto_total):
-    """Evalúa toda la población y calcula fitness normalizado con múltiples objetivos"""
-    evaluaciones = [evaluar_individuo(ind, catalogo, area_total, presupuesto_total)
-                   for ind in poblacion]
+def calcular_metricas(poblacion, catalogo, area_total, presupuesto_total):
+    """Calcula las métricas crudas de toda la población con operaciones matriciales.
+
+    `poblacion` es una matriz de enteros (individuos x genes) y `catalogo` un
+    `CatalogoCompilado`; el resultado es un diccionario de vectores con una
+    posición por individuo.
+    """
+    matriz = como_matriz(poblacion, len(catalogo))
+    return metricas_desde_totales(TotalesGenoma.desde_matriz(matriz, catalogo), area_total, presupuesto_total)
+
+class EvaluacionIndividuo:
+    """Evaluación completa de un genoma, guardada en columnas.
+
+    `cultivos` tiene un vector por métrica (cantidad, área, fertilizante,
+    trabajadores, producción, ingreso, tiempo) con una posición por semilla
+    sembrada; `indices` y `nombres` identifican esas semillas. `metricas` son las
+    métricas crudas del evaluador y `resumen` los totales del reporte. Se arma
+    una sola vez y de ella salen el reporte HTTP y el de consola.
+    """
+
+    def __init__(self, indices, nombres, cultivos, metricas, area_total, presupuesto_total):
+        self.indices = indices
+        self.nombres = nombres
+        self.cultivos = cultivos
+        self.metricas = metricas
+        self.area_total = area_total
+        self.presupuesto_total = presupuesto_total
+        self.resumen = self._resumir()
 
-    # Separar individuos válidos e inválidos
-    evaluaciones_validas = [e for e in evaluaciones if e['valido']]
-    evaluaciones_invalidas = [e for e in evaluaciones if not e['valido']]
+    def __len__(self):
+        return len(self.indices)
+
+    @classmethod
+    def desde_genoma(cls, individuo, catalogo, area_total, presupuesto_total, metricas=None):
+        """Evalúa `individuo`; si ya se tienen sus métricas crudas (p. ej. de la
+        evaluación de la población) se pasan en `metricas` y no se recalculan."""
+        catalogo = compilar_catalogo(catalogo)
+        if metricas is None:
+            metricas = calcular_metricas([individuo], catalogo, area_total, presupuesto_total)
+        metricas = {clave: np.asarray(valor).reshape(-1)[0].item() for clave, valor in metricas.items()}
+
+        genoma = np.asarray(individuo)
+        indices = np.flatnonzero(genoma)
+        cantidad = genoma[indices].astype(np.int64)
+        fertilizante = catalogo.fertilizante[indices] * cantidad
+        trabajadores = catalogo.trabajadores[indices] * cantidad
+        produccion = catalogo.rendimiento[indices] * cantidad
+        cultivos = {
+            'cantidad': cantidad,
+            'area_ocupada': catalogo.espacio[indices] * cantidad,
+            'fertilizante': fertilizante,
+            'costo_fertilizante': fertilizante * catalogo.costo_fertilizante[indices],
+            'trabajadores': trabajadores,
+            'costo_trabajo': trabajadores * catalogo.costo_trabajador[indices],
+            'produccion': produccion,
+            'ganancia': produccion * catalogo.ganancia_unitaria[indices],
+            'tiempo': catalogo.tiempo[indices] * cantidad,
+        }
+        nombres = [catalogo.nombres[i] for i in indices]
+        return cls(indices, nombres, cultivos, metricas, area_total, presupuesto_total)
+
+    def _resumir(self):
+        c = self.cultivos
+        total_plantas = int(c['cantidad'].sum())
+        costo_fertilizante = float(c['costo_fertilizante'].sum())
+        costo_trabajo = float(c['costo_trabajo'].sum())
+        ganancia_bruta = float(c['ganancia'].sum())
+        produccion_total = float(c['produccion'].sum())
+        return {
+            'area_ocupada': float(c['area_ocupada'].sum()),
+            'fertilizante_costo': costo_fertilizante,
+            'trabajo_costo': costo_trabajo,
+            'trabajadores': float(c['trabajadores'].sum()),
+            'produccion_total': produccion_total,
+            'ganancia_bruta': ganancia_bruta,
+            'ganancia_neta': ganancia_bruta - costo_fertilizante - costo_trabajo,
+            'tiempo_promedio': float(c['tiempo'].sum()) / total_plantas if total_plantas > 0 else 0.0,
+            'produccion_m2': produccion_total / self.area_total if self.area_total > 0 else 0.0,
+            'tipos_utilizados': len(self.indices),
+            'presupuesto_utilizado': costo_fertilizante + costo_trabajo,
+            'area_total': self.area_total,
+            'presupuesto_total': self.presupuesto_total,
+        }
 
-    fitnesses = []
+    def a_dict(self):
+        """Forma JSON del reporte: una entrada por cultivo sembrado y el resumen"""
+        c = {clave: valores.tolist() for clave, valores in self.cultivos.items()}
+        cultivos = [{
+            'nombre': nombre.capitalize(),
+            'cantidad': c['cantidad'][j],
+            'area_ocupada': c['area_ocupada'][j],
+            'produccion': c['produccion'][j],
+            'fertilizante': {'unidades': c['fertilizante'][j], 'costo': c['costo_fertilizante'][j]},
+            'trabajadores': {'unidades': c['trabajadores'][j], 'costo': c['costo_trabajo'][j]},
+            'ganancia': c['ganancia'][j]
+        } for j, nombre in enumerate(self.nombres)]
+        return {'cultivos': cultivos, 'resumen': dict(self.resumen)}
 
-    # Si no hay individuos válidos, asignar fitness muy bajo a todos
-    if not evaluaciones_validas:
-        for e in evaluaciones:
-            if e['valido']:
-                fitnesses.append(0.1)
+def evaluar_individuo(individuo, catalogo, area_total, presupuesto_total):
+    """Evalúa un individuo y devuelve métricas detalladas"""
+    return EvaluacionIndividuo.desde_genoma(individuo, catalogo, area_total, presupuesto_total).metricas
+
+class CacheEvaluaciones:
+    """Caché LRU de métricas crudas por genoma.
+
+    La clave es un hash compacto (16 bytes) del genoma junto con la huella del
+    catálogo, el área y el presupuesto, de modo que una misma caché puede
+    compartirse entre corridas y catálogos. Solo se guardan métricas crudas: la
+    normalización del fitness depende de la población y se recalcula en cada
+    generación.
+
+    Es opcional: calcular las métricas es un par de productos por fila, así que
+    hashear cada genoma solo compensa con catálogos grandes y poblaciones que se
+    repiten mucho (ver `benchmarks/bench.py`, `evaluar_poblacion_cache`).
+    """
+
+    def __init__(self, capacidad=50000):
+        self.capacidad = capacidad
+        self.aciertos = 0
+        self.fallos = 0
+        self._filas = OrderedDict()
+
+    def __len__(self):
+        return len(self._filas)
+
+    def claves(self, matriz, catalogo, area_total, presupuesto_total):
+        prefijo = catalogo.huella + struct.pack('<dd', area_total, presupuesto_total)
+        return [hashlib.blake2b(prefijo + fila.tobytes(), digest_size=16).digest() for fila in matriz]
+
+    def metricas(self, poblacion, catalogo, area_total, presupuesto_total):
+        """Métricas de la población, calculando solo los genomas que no están en caché"""
+        matriz = como_matriz(poblacion, len(catalogo))
+        claves = self.claves(matriz, catalogo, area_total, presupuesto_total)
+        tabla = np.empty((len(matriz), len(CAMPOS_METRICAS)))
+
+        pendientes = {}
+        for i, clave in enumerate(claves):
+            fila = self._filas.get(clave)
+            if fila is not None:
+                self._filas.move_to_end(clave)
+                tabla[i] = fila
+                self.aciertos += 1
             else:
-                fitness_invalido = max(-1.0, -0.1 - (e['penalizacion'] / 100))
-                fitnesses.append(fitness_invalido)
-        return fitnesses, evaluaciones
-
-    # Calcular rangos para normalización SOLO con individuos válidos
-    ganancias_validas = [e['ganancia_neta'] for e in evaluaciones_validas]
-    producciones_validas = [e['produccion_total'] for e in evaluaciones_validas]  # Maximizar producción total
-    usos_terreno_validos = [e['uso_terreno'] for e in evaluaciones_validas]      # Maximizar aprovechamiento
-    tiempos_validos = [e['tiempo_promedio'] for e in evaluaciones_validas if e['tiempo_promedio'] > 0]  # Minimizar tiempo
-    trabajadores_validos = [e['trabajadores_requeridos'] for e in evaluaciones_validas]
-
-    # Valores para normalización
-    ganancia_max = max(ganancias_validas) if ganancias_validas else 1
-    ganancia_min = min(ganancias_validas) if ganancias_validas else 0
-    produccion_max = max(producciones_validas) if producciones_validas else 1
-    uso_terreno_max = max(usos_terreno_validos) if usos_terreno_validos else 1
-    tiempo_max = max(tiempos_validos) if tiempos_validos else 1
-    tiempo_min = min(tiempos_validos) if tiempos_validos else 0
-    trabajadores_min = min(trabajadores_validos) if trabajadores_validos else 0
-    trabajadores_max = max(trabajadores_validos) if trabajadores_validos else 1
-
-    # Evitar divisiones por cero
-    ganancia_rango = max(ganancia_max - ganancia_min, 1)
-    produccion_rango = max(produccion_max, 1)
-    tiempo_rango = max(tiempo_max - tiempo_min, 1)
-    trabajadores_rango = max(trabajadores_max - trabajadores_min, 1)
-
-    # Calcular fitness para cada individuo
-    for e in evaluaciones:
-        if not e['valido']:
-            fitness_invalido = max(-1.0, -0.1 - (e['penalizacion'] / 100))
-            fitnesses.append(fitness_invalido)
-            continue
-
-        # Normalizar objetivos para individuos válidos
-        obj_ganancia = (e['ganancia_neta'] - ganancia_min) / ganancia_rango if ganancia_rango > 0 else 0  # Maximizar ganancias
-        obj_produccion = e['produccion_total'] / produccion_max if produccion_max > 0 else 0  # Maximizar producción
-        obj_terreno = e['uso_terreno'] / uso_terreno_max if uso_terreno_max > 0 else 0  # Maximizar aprovechamiento
-        if tiempo_rango > 0 and e['tiempo_promedio'] > 0:
-            obj_tiempo = 1 - ((e['tiempo_promedio'] - tiempo_min) / tiempo_rango)  # Minimizar tiempo
-        else:
-            obj_tiempo = 1
-        obj_trabajadores = 1 - ((e['trabajadores_requeridos'] - trabajadores_min) / trabajadores_rango) if trabajadores_rango > 0 else 1  # Minimizar trabajadores (opcional)
-
-        # Bonus por diversificación
-        bonus_diversidad = min(e['tipos_cultivo'] * 0.2 / 20, 0.2) if 20 > 0 else 0  # Máximo 20 tipos como referencia
-
-        # Penalización por dominancia excesiva
-        penalizacion_dominancia = e['penalizacion'] * 0.1
-
-        # Fitness ponderado con los cuatro objetivos
-        fitness = (0.25 * obj_ganancia +    # Maximizar ganancias
-                   0.25 * obj_produccion +  # Maximizar producción
-                   0.25 * obj_terreno +     # Maximizar aprovechamiento del terreno
-                   0.25 * obj_tiempo +      # Minimizar tiempo de producción
-                   bonus_diversidad -
-                   penalizacion_dominancia)
-
-        # Asegurar que el fitness esté en rango [0.1, 1.0] para individuos válidos
-        fitness = max(0.1, min(1.0, fitness))
-        fitnesses.append(fitness)
-
-    return fitnesses, evaluaciones
\ No newline at end of file
+                pendientes.setdefault(clave, []).append(i)
+                self.fallos += 1
+
+        if pendientes:
+            primeras = [posiciones[0] for posiciones in pendientes.values()]
+            nuevas = calcular_metricas(matriz[primeras], catalogo, area_total, presupuesto_total)
+            nuevas = np.column_stack([nuevas[campo] for campo in CAMPOS_METRICAS]).astype(float)
+            for fila, (clave, posiciones) in zip(nuevas, pendientes.items()):
+                tabla[posiciones] = fila
+                self._filas[clave] = fila
+            while len(self._filas) > self.capacidad:
+                self._filas.popitem(last=False)
+
+        metricas = {campo: tabla[:, j] for j, campo in enumerate(CAMPOS_METRICAS)}
+        metricas['valido'] = metricas['valido'].astype(bool)
+        metricas['tipos_cultivo'] = metricas['tipos_cultivo'].astype(np.int64)
+        return metricas
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0,
+            'entradas': len(self._filas)
+        }
+
+def normalizacion_fitness(metricas):
+    """Rangos de normalización de los objetivos, medidos SOLO sobre los individuos válidos (None si no hay)"""
+    valido = metricas['valido']
+    if not valido.any():
+        return None
+
+    ganancias_validas = metricas['ganancia_neta'][valido]
+    tiempos_validos = metricas['tiempo_promedio'][valido]
+    tiempos_validos = tiempos_validos[tiempos_validos > 0]
+    ganancia_max = ganancias_validas.max()
+    ganancia_min = ganancias_validas.min()
+    tiempo_max = tiempos_validos.max() if len(tiempos_validos) else 1
+    tiempo_min = tiempos_validos.min() if len(tiempos_validos) else 0
+    return {
+        'ganancia_min': ganancia_min,
+        # Evitar divisiones por cero
+        'ganancia_rango': max(ganancia_max - ganancia_min, 1),
+        'produccion_max': metricas['produccion_total'][valido].max(),
+        'uso_terreno_max': metricas['uso_terreno'][valido].max(),
+        'tiempo_min': tiempo_min,
+        'tiempo_rango': max(tiempo_max - tiempo_min, 1),
+    }
+
+def fitness_normalizado(metricas, normalizacion, recortar=True):
+    """Fitness ponderado de cada individuo con rangos de normalización dados.
+
+    Con `recortar=False` no se acota a [0.1, 1.0]: la búsqueda local lo usa para
+    comparar vecinos que pueden quedar fuera de los rangos de la población.
+    """
+    fitness_invalido = np.maximum(-1.0, -0.1 - (metricas['penalizacion'] / 100))
+    produccion_max = normalizacion['produccion_max']
+    uso_terreno_max = normalizacion['uso_terreno_max']
+
+    # Normalizar objetivos
+    obj_ganancia = (metricas['ganancia_neta'] - normalizacion['ganancia_min']) / normalizacion['ganancia_rango']  # Maximizar ganancias
+    obj_produccion = metricas['produccion_total'] / produccion_max if produccion_max > 0 else 0  # Maximizar producción
+    obj_terreno = metricas['uso_terreno'] / uso_terreno_max if uso_terreno_max > 0 else 0  # Maximizar aprovechamiento
+    obj_tiempo = np.where(metricas['tiempo_promedio'] > 0,
+                          1 - ((metricas['tiempo_promedio'] - normalizacion['tiempo_min']) /
+                               normalizacion['tiempo_rango']), 1)  # Minimizar tiempo
+
+    # Bonus por diversificación (máximo 20 tipos como referencia)
+    bonus_diversidad = np.minimum(metricas['tipos_cultivo'] * 0.2 / 20, 0.2)
+
+    # Penalización por dominancia excesiva
+    penalizacion_dominancia = metricas['penalizacion'] * 0.1
+
+    # Fitness ponderado con los cuatro objetivos
+    fitness = (0.25 * obj_ganancia +    # Maximizar ganancias
+               0.25 * obj_produccion +  # Maximizar producción
+               0.25 * obj_terreno +     # Maximizar aprovechamiento del terreno
+               0.25 * obj_tiempo +      # Minimizar tiempo de producción
+               bonus_diversidad -
+               penalizacion_dominancia)
+
+    # Asegurar que el fitness esté en rango [0.1, 1.0] para individuos válidos
+    if recortar:
+        fitness = np.clip(fitness, 0.1, 1.0)
+    return np.where(metricas['valido'], fitness, fitness_invalido)
+
+def calcular_fitness(metricas):
+    """Calcula el fitness normalizado con múltiples objetivos a partir de las métricas de la población"""
+    normalizacion = normalizacion_fitness(metricas)
+    # Si no hay individuos válidos, todos reciben el fitness de penalización
+    if normalizacion is None:
+        return np.maximum(-1.0, -0.1 - (metricas['penalizacion'] / 100))
+    return fitness_normalizado(metricas, normalizacion)
+
+def evaluar_poblacion(poblacion, catalogo, area_total, presupuesto_total, cache=None):
+    """Evalúa toda la población y calcula fitness normalizado con múltiples objetivos.
+
+    Devuelve el vector de fitness y las métricas como diccionario de vectores.
+    Si se pasa una `CacheEvaluaciones`, las métricas crudas de genomas ya vistos
+    se toman de ella.
+    """
+    catalogo = compilar_catalogo(catalogo)
+    if cache is None:
+        metricas = calcular_metricas(poblacion, catalogo, area_total, presupuesto_total)
+    else:
+        metricas = cache.metricas(poblacion, catalogo, area_total, presupuesto_total)
+    return calcular_fitness(metricas), metricas
@@ -0,0 +1,238 @@
+import numpy as np
+from catalogo import compilar_catalogo
+from evaluacion import EvaluacionIndividuo
+
+# =======================
+# COTA DE LA RELAJACIÓN LINEAL
+# =======================
+# Con objetivo de solo ganancia, el problema es un programa entero con dos
+# restricciones:
+#     max  Σ g_i x_i   s.a.  Σ e_i x_i <= área,  Σ c_i x_i <= presupuesto,  x_i >= 0 entero
+# El dual de su relajación lineal tiene dos variables (u para el área, v para el
+# presupuesto): min área·u + presupuesto·v  s.a.  e_i u + c_i v >= g_i. Para v
+# fijo el mejor u es max(0, max_i (g_i - c_i v) / e_i), así que basta minimizar
+# una función convexa de una variable.
+
+def _candidatos(catalogo):
+    """Semillas que pueden aportar ganancia (las demás siempre valen 0 en el óptimo)"""
+    return np.flatnonzero((catalogo.ganancia_neta_unitaria > 0) &
+                          (catalogo.espacio > 0) & (catalogo.costo_unitario > 0))
+
+def _precio_area(ganancia, espacio, costo, v):
+    return max(0.0, float(((ganancia - costo * v) / espacio).max()))
+
+def cota_lp(catalogo, area_total, presupuesto_total, iteraciones=100):
+    """Cota superior de la ganancia neta alcanzable (relajación lineal, resuelta por su dual).
+
+    Devuelve un diccionario con la cota y los precios duales `u` (por m²) y `v`
+    (por unidad de presupuesto). Cualquier par de precios duales factible da una
+    cota válida, así que el resultado nunca subestima el óptimo entero.
+    """
+    catalogo = compilar_catalogo(catalogo)
+    indices = _candidatos(catalogo)
+    if len(indices) == 0 or area_total <= 0 or presupuesto_total <= 0:
+        return {'cota': 0.0, 'u': 0.0, 'v': 0.0}
+    ganancia = catalogo.ganancia_neta_unitaria[indices]
+    espacio = catalogo.espacio[indices]
+    costo = catalogo.costo_unitario[indices]
+
+    def dual(v):
+        return area_total * _precio_area(ganancia, espacio, costo, v) + presupuesto_total * v
+
+    # Búsqueda ternaria sobre v en [0, max g/c] (más allá el dual solo crece)
+    bajo, alto = 0.0, float((ganancia / costo).max())
+    for _ in range(iteraciones):
+        m1 = bajo + (alto - bajo) / 3
+        m2 = alto - (alto - bajo) / 3
+        if dual(m1) <= dual(m2):
+            alto = m2
+        else:
+            bajo = m1
+    v = min((bajo, alto, 0.0), key=dual)
+    u = _precio_area(ganancia, espacio, costo, v)
+    return {'cota': area_total * u + presupuesto_total * v, 'u': u, 'v': v}
+
+# =======================
+# RAMIFICACIÓN Y ACOTAMIENTO
+# =======================
+# Con los precios duales (u, v), el costo reducido de cada semilla es
+# r_i = u e_i + v c_i - g_i >= 0, y toda solución cumple
+#     ganancia <= cota - Σ r_i x_i
+# Las semillas básicas (r_i = 0, a lo sumo dos salvo degeneración) se resuelven
+# exactamente en cada hoja enumerando la cantidad de una de ellas; el resto se
+# ramifica, y como cada unidad consume r_i de la holgura cota - incumbente, casi
+# todas quedan fijadas en 0 en cuanto se tiene una buena solución inicial.
+
+def _maximo_unidades(espacio, costo, area, presupuesto):
+    return max(0, int(min(area // espacio, presupuesto // costo)))
+
+def _resolver_basicas(basicas, catalogo, area, presupuesto):
+    """Mejor asignación entera de hasta dos semillas básicas en la capacidad restante"""
+    if not basicas:
+        return 0.0, {}
+    g = catalogo.ganancia_neta_unitaria
+    e = catalogo.espacio
+    c = catalogo.costo_unitario
+    if len(basicas) == 1:
+        i = basicas[0]
+        x = _maximo_unidades(e[i], c[i], area, presupuesto)
+        return x * g[i], {i: x}
+
+    a, b = basicas
+    if _maximo_unidades(e[a], c[a], area, presupuesto) > _maximo_unidades(e[b], c[b], area, presupuesto):
+        a, b = b, a
+    xa = np.arange(_maximo_unidades(e[a], c[a], area, presupuesto) + 1)
+    xb = np.minimum((area - xa * e[a]) // e[b], (presupuesto - xa * c[a]) // c[b])
+    xb = np.maximum(xb, 0).astype(np.int64)
+    valores = xa * g[a] + xb * g[b]
+    mejor = int(np.argmax(valores))
+    return float(valores[mejor]), {a: int(xa[mejor]), b: int(xb[mejor])}
+
+def _base_lineal(catalogo, relajacion):
+    """Costos reducidos, semillas básicas (hasta dos) y semillas sobre las que ramificar"""
+    g = catalogo.ganancia_neta_unitaria
+    indices = _candidatos(catalogo)
+    reducido = relajacion['u'] * catalogo.espacio + relajacion['v'] * catalogo.costo_unitario - g
+    tolerancia = 1e-9 * max(1.0, float(np.abs(g).max()) if len(g) else 1.0)
+    basicas = [int(i) for i in indices[np.argsort(reducido[indices], kind='stable')]
+               if reducido[i] <= tolerancia][:2]
+    ramificables = [int(i) for i in indices if int(i) not in basicas]
+    return reducido, basicas, ramificables
+
+def _redondear(catalogo, reducido, basicas, ramificables, area_total, presupuesto_total):
+    """Redondeo de la relajación: básicas en su mejor asignación entera y relleno voraz por costo reducido"""
+    g = catalogo.ganancia_neta_unitaria
+    e = catalogo.espacio
+    c = catalogo.costo_unitario
+    valor, asignacion = _resolver_basicas(basicas, catalogo, area_total, presupuesto_total)
+    area = area_total - sum(x * e[i] for i, x in asignacion.items())
+    presupuesto = presupuesto_total - sum(x * c[i] for i, x in asignacion.items())
+    for i in sorted(ramificables, key=lambda i: reducido[i]):
+        x = _maximo_unidades(e[i], c[i], area, presupuesto)
+        if x > 0:
+            asignacion[i] = asignacion.get(i, 0) + x
+            valor += x * g[i]
+            area -= x * e[i]
+            presupuesto -= x * c[i]
+    return valor, asignacion
+
+def redondeo_lp(catalogo, area_total, presupuesto_total):
+    """Genoma entero factible obtenido al redondear la solución de la relajación lineal"""
+    catalogo = compilar_catalogo(catalogo)
+    reducido, basicas, ramificables = _base_lineal(catalogo, cota_lp(catalogo, area_total, presupuesto_total))
+    _, asignacion = _redondear(catalogo, reducido, basicas, ramificables, area_total, presupuesto_total)
+    individuo = [0] * len(catalogo)
+    for i, x in asignacion.items():
+        individuo[i] = int(x)
+    return individuo
+
+def resolver_exacto(catalogo, area_total, presupuesto_total, max_nodos=200000, cancelado=None):
+    """Maximiza la ganancia neta con ramificación y acotamiento sobre los costos reducidos.
+
+    Devuelve un diccionario con el individuo, su ganancia, la cota lineal, el
+    historial de incumbentes y `optimo`: True si la búsqueda terminó (la
+    solución es óptima para el objetivo de ganancia), False si se agotaron los
+    `max_nodos` o se canceló, en cuyo caso se devuelve la mejor encontrada.
+    """
+    catalogo = compilar_catalogo(catalogo)
+    relajacion = cota_lp(catalogo, area_total, presupuesto_total)
+    cota = relajacion['cota']
+    g = catalogo.ganancia_neta_unitaria
+    e = catalogo.espacio
+    c = catalogo.costo_unitario
+
+    reducido, basicas, ramificables = _base_lineal(catalogo, relajacion)
+    mejor_valor, mejor_asignacion = _redondear(catalogo, reducido, basicas, ramificables,
+                                               area_total, presupuesto_total)
+    historial = [float(mejor_valor)]
+
+    # Solo se ramifica sobre semillas que caben en la holgura; las de mayor costo reducido primero
+    holgura = cota - mejor_valor
+    ramificables = sorted((i for i in ramificables if reducido[i] < holgura), key=lambda i: -reducido[i])
+
+    nodos = 0
+    completo = True
+    # Cada entrada: (nivel, área restante, presupuesto restante, costo reducido usado, ganancia, camino)
+    pila = [(0, area_total, presupuesto_total, 0.0, 0.0, None)]
+    while pila:
+        nodos += 1
+        if nodos > max_nodos or (cancelado is not None and nodos % 1000 == 0 and cancelado()):
+            completo = False
+            break
+        nivel, area, presupuesto, usado, valor, camino = pila.pop()
+        margen = 1e-9 * max(1.0, abs(mejor_valor))
+        if cota - usado <= mejor_valor + margen:
+            continue
+
+        if nivel == len(ramificables):
+            valor_basicas, asignacion = _resolver_basicas(basicas, catalogo, area, presupuesto)
+            if valor + valor_basicas > mejor_valor + margen:
+                while camino is not None:
+                    i, x, camino = camino
+                    if x:
+                        asignacion[i] = x
+                mejor_valor, mejor_asignacion = valor + valor_basicas, asignacion
+                historial.append(float(mejor_valor))
+            continue
+
+        i = ramificables[nivel]
+        limite = _maximo_unidades(e[i], c[i], area, presupuesto)
+        if reducido[i] > 0:
+            limite = min(limite, int((cota - mejor_valor - usado) / reducido[i]))
+        # Se apila de mayor a menor para explorar primero x = 0
+        for x in range(limite, -1, -1):
+            pila.append((nivel + 1, area - x * e[i], presupuesto - x * c[i],
+                         usado + x * reducido[i], valor + x * g[i], (i, x, camino)))
+
+    individuo = [0] * len(catalogo)
+    for i, x in mejor_asignacion.items():
+        individuo[i] = int(x)
+    return {
+        'individuo': individuo,
+        'ganancia': float(mejor_valor),
+        'cota': float(cota),
+        'gap': calcular_gap(mejor_valor, cota),
+        'optimo': completo,
+        'nodos': nodos,
+        'historial': historial,
+    }
+
+def calcular_gap(ganancia, cota):
+    """Brecha relativa entre una ganancia y la cota superior"""
+    if cota <= 0:
+        return 0.0
+    return max(0.0, (cota - ganancia) / cota)
+
+def evento_exacto(resultado):
+    """Progreso final de una búsqueda exacta, con las claves de los eventos del AG"""
+    return {
+        'generacion': len(resultado['historial']),
+        'mejor_fitness': resultado['ganancia'],
+        'fitness_actual': resultado['ganancia'],
+        'validos': None,
+        'tam_poblacion': None,
+        'mejor': None,
+        'gap': resultado['gap'],
+        'convergio': resultado['optimo'],
+        'tiempo_agotado': False,
+    }
+
+def algoritmo_exacto(catalogo, area_total, presupuesto_total, max_nodos=200000, cancelado=None, al_generar=None,
+                     verbose=True):
+    """Modo exacto con la misma salida que `algoritmo_genetico`: (mejor individuo, ganancia, historial, evaluación).
+
+    El historial es la sucesión de soluciones incumbentes de la búsqueda.
+    `al_generar` recibe un único evento final (ver `evento_exacto`).
+    """
+    catalogo = compilar_catalogo(catalogo)
+    resultado = resolver_exacto(catalogo, area_total, presupuesto_total, max_nodos=max_nodos, cancelado=cancelado)
+    evaluacion = EvaluacionIndividuo.desde_genoma(resultado['individuo'], catalogo, area_total, presupuesto_total)
+    if not evaluacion.metricas['valido']:
+        raise RuntimeError('La solución exacta no respeta las restricciones')
+    if verbose:
+        estado = 'óptima' if resultado['optimo'] else f"sin probar optimalidad ({resultado['nodos']} nodos)"
+        print(f"Solución exacta {estado}: ganancia {resultado['ganancia']:.2f} | "
+              f"cota LP {resultado['cota']:.2f} | gap {resultado['gap']:.4%}")
+    if al_generar is not None:
+        al_generar(evento_exacto(resultado))
+    return resultado['individuo'], resultado['ganancia'], resultado['historial'], evaluacion
@@ -1,105 +1,226 @@
-import random
+import time
 import numpy as np
-from evaluacion import evaluar_poblacion
-from poblacion import generar_poblacion_inicial
+from evaluacion import (evaluar_poblacion, EvaluacionIndividuo, TotalesGenoma,
+                        metricas_desde_totales, normalizacion_fitness, fitness_normalizado, dentro_de_capacidad)
+from poblacion import generar_poblacion_inicial, max_posible
+from catalogo import compilar_catalogo
+from genoma import TIPO_GENOMA, como_matriz
+from seleccion import seleccionar_parejas, seleccion_torneo
+from diversidad import filas_diversas
+from exacto import cota_lp, calcular_gap, resolver_exacto, algoritmo_exacto, evento_exacto
+from perfilado import PERFILADOR_NULO
+from puntos_control import guardar_punto_control, retomar_estados
+
+MODOS = ('genetico', 'exacto', 'auto', 'pareto')
+# Tamaño de catálogo hasta el que el modo 'auto' intenta primero la solución exacta
+LIMITE_EXACTO = 2000
+# Parada temprana: generaciones sin mejora toleradas y mínimo de generaciones
+PACIENCIA = 30
+MIN_GENERACIONES = 50
+# Peso de la última generación en la estimación del costo por individuo (modo con límite de tiempo)
+SUAVIZADO_COSTO = 0.5
 
 # =======================
 # SELECCIÓN POR TORNEO
 # =======================
-def seleccion_por_torneo(poblacion, fitnesses, k=3):
-    seleccionados = []
-    for _ in range(len(poblacion)):
-        indices_positivos = [i for i, f in enumerate(fitnesses) if f > 0]
-        indices_torneo = random.sample(indices_positivos, k) if len(indices_positivos) >= k else indices_positivos
-        if indices_torneo:
-            mejor_idx = max(indices_torneo, key=lambda i: fitnesses[i])
-            seleccionados.append(poblacion[mejor_idx])
-        else:
-            seleccionados.append(random.choice(poblacion))
-    return seleccionados
+def seleccion_por_torneo(poblacion, fitnesses, k=3, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    poblacion = np.asarray(poblacion)
+    fitnesses = np.asarray(fitnesses, dtype=float)
+    candidatos = np.flatnonzero(fitnesses > 0)
+    if len(candidatos) == 0:
+        return poblacion[rng.integers(0, len(poblacion), size=len(poblacion))]
+    return poblacion[candidatos[seleccion_torneo(fitnesses[candidatos], len(poblacion), rng, k=k)]]
 
 # =======================
 # CRUZA UNIFORME
 # =======================
-def cruza_uniforme(padre1, padre2, prob_cruza=0.5):
-    hijo1, hijo2 = [], []
-    for gen1, gen2 in zip(padre1, padre2):
-        if random.random() < prob_cruza:
-            hijo1.append(gen2)
-            hijo2.append(gen1)
-        else:
-            hijo1.append(gen1)
-            hijo2.append(gen2)
-    return hijo1, hijo2
+def cruza_uniforme(padre1, padre2, prob_cruza=0.5, rng=None):
+    """Intercambia cada gen con probabilidad `prob_cruza`.
+
+    Acepta dos genomas o dos matrices de padres (una pareja por fila) y
+    devuelve los dos hijos (o las dos matrices de hijos). Con matrices,
+    `prob_cruza` puede ser una columna con una probabilidad por pareja.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    padre1, padre2 = np.asarray(padre1), np.asarray(padre2)
+    intercambio = rng.random(padre1.shape) < prob_cruza
+    return np.where(intercambio, padre2, padre1), np.where(intercambio, padre1, padre2)
 
 # =======================
 # MUTACIÓN CONSERVADORA
 # =======================
-def mutacion_conservadora(individuo, catalogo, area_total, presupuesto_total, intensidad=0.3):
-    nuevo = individuo.copy()
-    if random.random() < intensidad:
-        gen_mutado = random.randint(0, len(nuevo) - 1)
-        area_usada_otros = 0
-        costo_usado_otros = 0
-        for i, cantidad in enumerate(nuevo):
-            if i == gen_mutado or cantidad == 0:
-                continue
-            planta = catalogo[i]
-            area_usada_otros += planta['espacio'] * cantidad
-            costo_usado_otros += cantidad * (
-                planta['fertilizante_por_planta'] * planta['costo_fertilizante_unitario'] +
-                planta['trabajadores_requeridos_por_planta'] * planta['costo_trabajador_unitario']
-            )
-        planta_mutada = catalogo[gen_mutado]
-        area_disponible = area_total - area_usada_otros
-        presupuesto_disponible = presupuesto_total - costo_usado_otros
-        max_por_area = int(area_disponible // planta_mutada['espacio']) if planta_mutada['espacio'] > 0 else 0
-        costo_unitario = (
-            planta_mutada['fertilizante_por_planta'] * planta_mutada['costo_fertilizante_unitario'] +
-            planta_mutada['trabajadores_requeridos_por_planta'] * planta_mutada['costo_trabajador_unitario']
-        )
-        max_por_presupuesto = int(presupuesto_disponible // costo_unitario) if costo_unitario > 0 else 0
-        max_permitido = max(0, min(max_por_area, max_por_presupuesto))
-        nuevo[gen_mutado] = random.randint(0, max_permitido) if max_permitido > 0 else 0
-    else:
-        genes_no_cero = [i for i, x in enumerate(nuevo) if x > 0]
-        if genes_no_cero:
-            gen_ajustar = random.choice(genes_no_cero)
-            ajuste = random.choice([-1, 1])
-            nuevo[gen_ajustar] = max(0, nuevo[gen_ajustar] + ajuste)
-    return nuevo
+def mutar_poblacion(matriz, filas, catalogo, area_total, presupuesto_total, intensidad=0.3, rng=None):
+    """Muta en sitio las `filas` indicadas de la matriz de población.
+
+    Con probabilidad `intensidad` una fila recibe una cantidad nueva al azar en
+    un gen cualquiera, acotada por el área y el presupuesto que dejan libres los
+    demás genes; si no, uno de sus genes no nulos sube o baja una unidad. Los
+    recursos usados se llevan en un `TotalesGenoma` que se actualiza por delta.
+    """
+    catalogo = compilar_catalogo(catalogo)
+    rng = rng if rng is not None else np.random.default_rng()
+    filas = np.asarray(filas, dtype=np.int64)
+    if len(filas) == 0:
+        return matriz
+    sub = matriz[filas]
+    totales = TotalesGenoma.desde_matriz(sub, catalogo)
+    reinicio = rng.random(len(filas)) < intensidad
+
+    # Cantidad nueva en un gen al azar, dentro de lo que dejan libre los demás genes
+    elegidas = np.flatnonzero(reinicio)
+    if len(elegidas):
+        genes = rng.integers(0, sub.shape[1], size=len(elegidas))
+        sin_gen = totales.delta(elegidas, genes, sub[elegidas, genes], 0, catalogo)
+        max_permitido = max_posible(catalogo, genes, area_total - sin_gen['area'],
+                                    presupuesto_total - sin_gen['costo_fertilizante'] - sin_gen['costo_trabajo'])
+        totales.aplicar(elegidas, genes, rng.integers(0, max_permitido + 1), sub, catalogo)
+
+    # Ajuste de ±1 en uno de los genes no nulos
+    elegidas = np.flatnonzero(~reinicio)
+    if len(elegidas):
+        no_nulos = sub[elegidas] > 0
+        cuenta = no_nulos.sum(axis=1)
+        posicion = (rng.random(len(elegidas)) * cuenta).astype(np.int64)
+        genes = np.argmax(np.cumsum(no_nulos, axis=1) > posicion[:, None], axis=1)
+        ajuste = np.where(rng.random(len(elegidas)) < 0.5, 1, -1)
+        con_genes = cuenta > 0
+        elegidas, genes, ajuste = elegidas[con_genes], genes[con_genes], ajuste[con_genes]
+        totales.aplicar(elegidas, genes, np.maximum(0, sub[elegidas, genes].astype(np.int64) + ajuste), sub, catalogo)
+
+    matriz[filas] = sub
+    return matriz
+
+def mutacion_conservadora(individuo, catalogo, area_total, presupuesto_total, intensidad=0.3, rng=None):
+    """Versión de `mutar_poblacion` para un solo genoma; devuelve una copia mutada"""
+    catalogo = compilar_catalogo(catalogo)
+    nuevo = como_matriz(individuo, len(catalogo)).copy()
+    mutar_poblacion(nuevo, [0], catalogo, area_total, presupuesto_total, intensidad=intensidad, rng=rng)
+    return nuevo[0].tolist() if isinstance(individuo, list) else nuevo[0]
+
+# =======================
+# BÚSQUEDA LOCAL (ETAPA MEMÉTICA)
+# =======================
+def ascenso_colina(matriz, filas, catalogo, area_total, presupuesto_total, referencia, pasos=20,
+                   movimientos=8, paso_maximo=3, rng=None):
+    """Ascenso de colina en sitio sobre las `filas` de la matriz; devuelve los movimientos aceptados.
+
+    En cada paso cada fila prueba `movimientos` cambios de ±k unidades (k hasta
+    `paso_maximo`) en un solo gen y se queda con el mejor si mejora su fitness.
+    Los vecinos se puntúan con evaluación delta (`TotalesGenoma`), sin recorrer
+    el genoma, y con la normalización de las métricas `referencia` de la
+    población, de modo que el puntaje es comparable con el del AG. Solo se
+    aceptan vecinos que dejan el margen de capacidad o que no usan más recursos.
+    """
+    catalogo = compilar_catalogo(catalogo)
+    rng = rng if rng is not None else np.random.default_rng()
+    normalizacion = normalizacion_fitness(referencia)
+    filas = np.asarray(filas, dtype=np.int64)
+    if normalizacion is None or len(filas) == 0 or pasos <= 0:
+        return 0
+
+    sub = matriz[filas]
+    totales = TotalesGenoma.desde_matriz(sub, catalogo)
+    puntaje = fitness_normalizado(metricas_desde_totales(totales, area_total, presupuesto_total),
+                                  normalizacion, recortar=False)
+    n_filas, n_genes = sub.shape
+    candidatas = np.repeat(np.arange(n_filas), movimientos)
+    aceptados = 0
+    for _ in range(pasos):
+        # La mitad de los movimientos toca un gen ya sembrado; el resto, cualquiera
+        no_nulos = sub[candidatas] > 0
+        cuenta = no_nulos.sum(axis=1)
+        posicion = (rng.random(len(candidatas)) * cuenta).astype(np.int64)
+        genes = np.where((rng.random(len(candidatas)) < 0.5) & (cuenta > 0),
+                         np.argmax(np.cumsum(no_nulos, axis=1) > posicion[:, None], axis=1),
+                         rng.integers(0, n_genes, size=len(candidatas)))
+        actuales = sub[candidatas, genes].astype(np.int64)
+        k = rng.integers(1, paso_maximo + 1, size=len(candidatas)) * np.where(rng.random(len(candidatas)) < 0.5, 1, -1)
+        nuevas = np.clip(actuales + k, 0, np.iinfo(TIPO_GENOMA).max - 1)
+
+        vecinos = totales.delta(candidatas, genes, actuales, nuevas, catalogo)
+        puntaje_vecinos = fitness_normalizado(metricas_desde_totales(vecinos, area_total, presupuesto_total),
+                                              normalizacion, recortar=False)
+        costo = vecinos['costo_fertilizante'] + vecinos['costo_trabajo']
+        cabe = ((dentro_de_capacidad(vecinos['area'], area_total) | (nuevas < actuales)) &
+                (dentro_de_capacidad(costo, presupuesto_total) | (nuevas < actuales)))
+        puntaje_vecinos = np.where(cabe & (nuevas != actuales), puntaje_vecinos, -np.inf).reshape(n_filas, movimientos)
+
+        mejor = np.argmax(puntaje_vecinos, axis=1)
+        mejora = np.flatnonzero(puntaje_vecinos[np.arange(n_filas), mejor] > puntaje)
+        if len(mejora) == 0:
+            continue
+        elegidos = mejora * movimientos + mejor[mejora]
+        totales.aplicar(mejora, genes[elegidos], nuevas[elegidos], sub, catalogo)
+        puntaje[mejora] = puntaje_vecinos[mejora, mejor[mejora]]
+        aceptados += len(mejora)
+
+    matriz[filas] = sub
+    return aceptados
 
 # =======================
 # REPARACIÓN SUAVE
 # =======================
+def reparar_poblacion(poblacion, catalogo, area_total, presupuesto_total, perfilador=PERFILADOR_NULO):
+    """Repara en bloque todos los individuos que violan área o presupuesto.
+
+    Para cada fila infactible se retiran, empezando por los genes menos
+    eficientes, tantas unidades como hagan falta para cubrir el exceso de área
+    y de presupuesto en un solo paso: los totales acumulados de lo ya retirado
+    indican cuánto exceso queda al llegar a cada gen. Devuelve una matriz nueva
+    en la que todas las filas son factibles. El `perfilador` cuenta las filas
+    reparadas ('reparaciones') y las pasadas del bucle ('iteraciones_reparacion').
+    """
+    catalogo = compilar_catalogo(catalogo)
+    matriz = como_matriz(poblacion, len(catalogo)).copy()
+    orden = catalogo.orden_eficiencia
+    espacio = catalogo.espacio[orden]
+    costo_unitario = catalogo.costo_unitario[orden]
+
+    primera = True
+    while True:
+        area_usada, costo_fertilizante, costo_trabajo = catalogo.uso_recursos(matriz)
+        costo_usado = costo_fertilizante + costo_trabajo
+        infactibles = np.flatnonzero((~dentro_de_capacidad(area_usada, area_total) |
+                                      ~dentro_de_capacidad(costo_usado, presupuesto_total)) &
+                                     matriz.any(axis=1))
+        if primera:
+            perfilador.contar('reparaciones', len(infactibles))
+            primera = False
+        if len(infactibles) == 0:
+            return matriz
+        perfilador.contar('iteraciones_reparacion')
+
+        cantidades = matriz[infactibles][:, orden]
+        exceso_area = (area_usada[infactibles] - area_total)[:, None]
+        exceso_costo = (costo_usado[infactibles] - presupuesto_total)[:, None]
+
+        # Exceso pendiente al llegar a cada gen si se vaciaron todos los anteriores
+        area_genes = cantidades * espacio
+        costo_genes = cantidades * costo_unitario
+        pendiente_area = exceso_area - (np.cumsum(area_genes, axis=1) - area_genes)
+        pendiente_costo = exceso_costo - (np.cumsum(costo_genes, axis=1) - costo_genes)
+
+        # Unidades necesarias en cada gen para cubrir lo pendiente
+        necesarias_area = np.ceil(np.divide(pendiente_area, espacio, out=np.zeros_like(pendiente_area),
+                                            where=(pendiente_area > 0) & (espacio > 0)))
+        necesarias_costo = np.ceil(np.divide(pendiente_costo, costo_unitario, out=np.zeros_like(pendiente_costo),
+                                             where=(pendiente_costo > 0) & (costo_unitario > 0)))
+        quitar = np.minimum(cantidades, np.maximum(necesarias_area, necesarias_costo).astype(np.int64))
+
+        # Si el redondeo dejó alguna fila sin cambios, se retira una unidad del gen menos eficiente
+        atascadas = np.flatnonzero(~quitar.any(axis=1))
+        if len(atascadas):
+            primero = np.argmax(cantidades[atascadas] > 0, axis=1)
+            quitar[atascadas, primero] = np.minimum(cantidades[atascadas, primero], 1)
+
+        reparadas = matriz[infactibles]
+        reparadas[:, orden] = cantidades - quitar
+        matriz[infactibles] = reparadas
+
 def reparar_individuo_suave(individuo, catalogo, area_total, presupuesto_total):
-    nuevo = individuo.copy()
-    max_iteraciones = 50
-    iteracion = 0
-    while iteracion < max_iteraciones:
-        area_usada = sum(catalogo[i]['espacio'] * cantidad for i, cantidad in enumerate(nuevo))
-        costo_usado = sum(cantidad * (
-            catalogo[i]['fertilizante_por_planta'] * catalogo[i]['costo_fertilizante_unitario'] +
-            catalogo[i]['trabajadores_requeridos_por_planta'] * catalogo[i]['costo_trabajador_unitario']
-        ) for i, cantidad in enumerate(nuevo))
-        if area_usada <= area_total and costo_usado <= presupuesto_total:
-            break
-        genes_no_cero = [(i, cantidad) for i, cantidad in enumerate(nuevo) if cantidad > 0]
-        if not genes_no_cero:
-            break
-        eficiencias = []
-        for i, cantidad in genes_no_cero:
-            planta = catalogo[i]
-            costo_unitario = (
-                planta['fertilizante_por_planta'] * planta['costo_fertilizante_unitario'] +
-                planta['trabajadores_requeridos_por_planta'] * planta['costo_trabajador_unitario']
-            )
-            eficiencia = (planta['rendimiento'] * planta['ganancia_unitaria']) / max(costo_unitario, 1)
-            eficiencias.append((i, eficiencia))
-        gen_a_reducir = min(eficiencias, key=lambda x: x[1])[0]
-        nuevo[gen_a_reducir] = max(0, nuevo[gen_a_reducir] - 1)
-        iteracion += 1
-    return nuevo
+    reparado = reparar_poblacion([individuo], catalogo, area_total, presupuesto_total)[0]
+    return reparado.tolist() if isinstance(individuo, list) else reparado
 
 # =======================
 # PODA POR DIVERSIDAD
@@ -110,92 +231,355 @@ def calcular_similitud(ind1, ind2):
     iguales = sum(1 for a, b in zip(ind1, ind2) if a == b)
     return iguales / len(ind1)
 
-def poda_por_diversidad(poblacion, umbral_similitud=0.95):
-    poblacion_filtrada = []
-    for ind in poblacion:
-        es_similar = any(calcular_similitud(ind, otro) >= umbral_similitud for otro in poblacion_filtrada)
-        if not es_similar:
-            poblacion_filtrada.append(ind)
-    while len(poblacion_filtrada) < len(poblacion):
-        poblacion_filtrada.append(random.choice(poblacion))
-    return poblacion_filtrada
+def poda_por_diversidad(poblacion, catalogo, area_total, presupuesto_total, umbral_similitud=0.95, rng=None):
+    catalogo = compilar_catalogo(catalogo)
+    rng = rng if rng is not None else np.random.default_rng()
+    poblacion = como_matriz(poblacion, len(catalogo))
+    poblacion_filtrada = poblacion[filas_diversas(poblacion, umbral_similitud=umbral_similitud, rng=rng)]
+    # Se rellena con mutantes fuertes de los conservados en lugar de copias; si la
+    # poda se llevó más de la mitad (población colapsada) la mitad del relleno son
+    # individuos nuevos, que cuestan bastante más de generar
+    faltantes = len(poblacion) - len(poblacion_filtrada)
+    if faltantes == 0:
+        return poblacion_filtrada
+    n_nuevos = faltantes // 2 if faltantes > len(poblacion) // 2 else 0
+    mutantes = poblacion_filtrada[rng.integers(len(poblacion_filtrada), size=faltantes - n_nuevos)]
+    mutar_poblacion(mutantes, np.arange(len(mutantes)), catalogo, area_total, presupuesto_total,
+                    intensidad=1.0, rng=rng)
+    if n_nuevos == 0:
+        return np.vstack([poblacion_filtrada, mutantes])
+    nuevos = generar_poblacion_inicial(catalogo, area_total, presupuesto_total, n_nuevos, rng=rng)
+    return np.vstack([poblacion_filtrada, mutantes, como_matriz(nuevos, len(catalogo))])
 
 # =======================
 # ALGORITMO GENÉTICO
 # =======================
-def algoritmo_genetico(catalogo, area_total, presupuesto_total,
-                      generaciones=100, tam_poblacion=50, tasa_mutacion=0.1, elitismo=True):
-    poblacion = generar_poblacion_inicial(catalogo, area_total, presupuesto_total, tam_poblacion)
-    poblacion = [reparar_individuo_suave(ind, catalogo, area_total, presupuesto_total) for ind in poblacion]
-    
-    mejor_fitness_por_generacion = []
-    mejor_individuo_global = None
-    mejor_fitness_global = -float('inf')
-    generaciones_sin_mejora = 0
-    elite_size = max(3, int(tam_poblacion * 0.2)) if elitismo else 0
-
-    for gen in range(generaciones):
-        fitnesses, evaluaciones = evaluar_poblacion(poblacion, catalogo, area_total, presupuesto_total)
-        if fitnesses:
-            idx_mejor = np.argmax(fitnesses)
-            fitness_actual = fitnesses[idx_mejor]
-            if fitness_actual > mejor_fitness_global:
-                mejor_fitness_global = fitness_actual
-                mejor_individuo_global = poblacion[idx_mejor].copy()
-                generaciones_sin_mejora = 0
-                print(f"🎯 Nueva mejor solución en generación {gen+1}: {fitness_actual:.4f}")
+def crear_estado(catalogo, area_total, presupuesto_total, tam_poblacion, rng=None, iniciales=None):
+    """Estado inicial de una corrida: población reparada, mejor global e historial.
+
+    `iniciales` son genomas de arranque en caliente (p. ej. de consultas
+    previas); ocupan a lo sumo la mitad de la población y el resto se genera al
+    azar para conservar diversidad.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    iniciales = como_matriz(iniciales if iniciales is not None else [], len(catalogo))[:tam_poblacion // 2]
+    aleatorios = generar_poblacion_inicial(catalogo, area_total, presupuesto_total,
+                                           tam_poblacion - len(iniciales), rng=rng)
+    poblacion = np.vstack([iniciales, como_matriz(aleatorios, len(catalogo))])
+    return {
+        'poblacion': reparar_poblacion(poblacion, catalogo, area_total, presupuesto_total),
+        'mejor_individuo': None,
+        'mejor_fitness': -float('inf'),
+        # Evaluación completa del mejor individuo (la que usan los reportes)
+        'mejor_evaluacion': None,
+        'historial': [],
+        'mejor_ganancia': -float('inf'),
+        'generaciones_sin_mejora': 0,
+        'generacion': 0,
+        'convergio': False,
+        'tiempo_agotado': False,
+        # Corrida terminada y retomada: completa las generaciones pedidas sin parada por convergencia
+        'sin_parada_temprana': False,
+        # Tamaño de población vigente y segundos por individuo, para ajustarse a un límite de tiempo
+        'tam_efectivo': tam_poblacion,
+        'costo_individuo': None,
+        'rng': rng,
+    }
+
+def resumen_genoma(individuo, catalogo, max_cultivos=5):
+    """Resumen compacto de un genoma para reportar el progreso de una corrida"""
+    cantidades = np.asarray(individuo)
+    usados = np.flatnonzero(cantidades)
+    principales = usados[np.argsort(-cantidades[usados], kind='stable')][:max_cultivos]
+    return {
+        'tipos_cultivo': int(len(usados)),
+        'plantas': int(cantidades.sum()),
+        'principales': [{'nombre': catalogo.nombres[i], 'cantidad': int(cantidades[i])} for i in principales]
+    }
+
+def iterar_generaciones(estado, catalogo, area_total, presupuesto_total, generaciones,
+                        tam_poblacion=50, tasa_mutacion=0.1, elitismo=True, metodo_seleccion='torneo',
+                        cache=None, verbose=True, cancelado=None, cota_superior=None, gap_objetivo=None,
+                        perfilador=PERFILADOR_NULO, limite=None, horizonte=None, busqueda_local=0):
+    """Generador que avanza el estado una generación por iteración y emite su progreso.
+
+    Para al completar `generaciones`, al converger, al cancelarse o al agotar el plazo `limite`.
+    """
+    rng = estado['rng']
+    poblacion = estado['poblacion']
+    horizonte = horizonte if horizonte is not None else estado['generacion'] + generaciones
+    tam_minimo = min(tam_poblacion, max(10, tam_poblacion // 4))
+
+    for _ in range(generaciones):
+        tam = estado['tam_efectivo']
+        elite_size = max(3, int(tam * 0.2)) if elitismo else 0
+        inicio_generacion = time.monotonic()
+        if cancelado is not None and cancelado():
+            if verbose:
+                print(f"Corrida cancelada en generación {estado['generacion']}")
+            break
+        gen = estado['generacion']
+        aciertos_previos = cache.aciertos if cache is not None else 0
+        with perfilador.fase('evaluacion'):
+            fitnesses, evaluaciones = evaluar_poblacion(poblacion, catalogo, area_total, presupuesto_total, cache=cache)
+        perfilador.contar('evaluaciones', len(poblacion))
+        if cache is not None:
+            perfilador.contar('aciertos_cache', cache.aciertos - aciertos_previos)
+        if len(fitnesses):
+            idx_mejor = int(np.argmax(fitnesses))
+            fitness_actual = float(fitnesses[idx_mejor])
+            if fitness_actual > estado['mejor_fitness']:
+                estado['mejor_fitness'] = fitness_actual
+                estado['mejor_individuo'] = poblacion[idx_mejor].copy()
+                estado['mejor_ganancia'] = float(evaluaciones['ganancia_neta'][idx_mejor])
+                estado['mejor_evaluacion'] = EvaluacionIndividuo.desde_genoma(
+                    estado['mejor_individuo'], catalogo, area_total, presupuesto_total,
+                    metricas={clave: valores[idx_mejor] for clave, valores in evaluaciones.items()})
+                estado['generaciones_sin_mejora'] = 0
+                if verbose:
+                    print(f"🎯 Nueva mejor solución en generación {gen+1}: {fitness_actual:.4f}")
             else:
-                generaciones_sin_mejora += 1
-            mejor_fitness_por_generacion.append(mejor_fitness_global)
-            individuos_validos = sum(1 for e in evaluaciones if e['valido'])
-            print(f"Gen {gen+1:3d} | Mejor Global: {mejor_fitness_global:.4f} | Actual: {fitness_actual:.4f} | Válidos: {individuos_validos}/{len(poblacion)}")
-        
-        nueva_poblacion = []
+                estado['generaciones_sin_mejora'] += 1
+            estado['historial'].append(estado['mejor_fitness'])
+            individuos_validos = int(evaluaciones['valido'].sum())
+            if verbose:
+                print(f"Gen {gen+1:3d} | Mejor Global: {estado['mejor_fitness']:.4f} | Actual: {fitness_actual:.4f} | Válidos: {individuos_validos}/{len(poblacion)}")
 
         # Elitismo
-        if elitismo and fitnesses:
-            indices_ordenados = sorted(range(len(fitnesses)), key=lambda i: fitnesses[i], reverse=True)
-            for i in range(min(elite_size, len(indices_ordenados))):
-                if fitnesses[indices_ordenados[i]] > 0:
-                    nueva_poblacion.append(poblacion[indices_ordenados[i]].copy())
-
-        # Reproducción
-        while len(nueva_poblacion) < tam_poblacion:
-            indices_validos = [i for i, f in enumerate(fitnesses) if f > 0]
-            if len(indices_validos) >= 2:
-                padres_validos = [poblacion[i] for i in indices_validos]
-                fitnesses_validos = [fitnesses[i] for i in indices_validos]
-                padres_seleccionados = seleccion_por_torneo(padres_validos, fitnesses_validos, k=3)
-                if len(padres_seleccionados) >= 2:
-                    padre1, padre2 = random.sample(padres_seleccionados, 2)
-                    if random.random() < 0.8:
-                        hijo1, hijo2 = cruza_uniforme(padre1, padre2, prob_cruza=0.4)
-                    else:
-                        hijo1, hijo2 = padre1.copy(), padre2.copy()
-                    hijo1 = reparar_individuo_suave(hijo1, catalogo, area_total, presupuesto_total)
-                    hijo2 = reparar_individuo_suave(hijo2, catalogo, area_total, presupuesto_total)
-                    nueva_poblacion.extend([hijo1, hijo2])
-            else:
-                nuevos = generar_poblacion_inicial(catalogo, area_total, presupuesto_total, 2)
-                nueva_poblacion.extend(nuevos[:2])
+        elite = np.empty((0, len(catalogo)), dtype=TIPO_GENOMA)
+        if elitismo and len(fitnesses):
+            mejores = np.argsort(-fitnesses, kind='stable')[:elite_size]
+            elite = poblacion[mejores[fitnesses[mejores] > 0]]
+
+        # Etapa memética: ascenso de colina sobre la élite con evaluación delta
+        if busqueda_local and len(elite):
+            with perfilador.fase('busqueda_local'):
+                aceptados = ascenso_colina(elite, np.arange(len(elite)), catalogo, area_total, presupuesto_total,
+                                           evaluaciones, pasos=busqueda_local, rng=rng)
+            perfilador.contar('movimientos_locales', aceptados)
+
+        # Reproducción: todas las parejas de la generación se eligen de una vez
+        n_hijos = tam - len(elite)
+        with perfilador.fase('seleccion'):
+            parejas = seleccionar_parejas(fitnesses, (n_hijos + 1) // 2, metodo=metodo_seleccion, rng=rng)
+        if parejas is None:
+            with perfilador.fase('inicializacion'):
+                hijos = como_matriz(generar_poblacion_inicial(catalogo, area_total, presupuesto_total, n_hijos,
+                                                              rng=rng), len(catalogo))
+        else:
+            with perfilador.fase('cruza'):
+                # El 80 % de las parejas se cruza; el resto pasa sus copias tal cual
+                cruzan = rng.random(len(parejas)) < 0.8
+                hijos1, hijos2 = cruza_uniforme(poblacion[parejas[:, 0]], poblacion[parejas[:, 1]],
+                                                prob_cruza=0.4 * cruzan[:, None], rng=rng)
+                hijos = np.stack([hijos1, hijos2], axis=1).reshape(-1, len(catalogo))
+            perfilador.contar('hijos', len(hijos))
+            # Toda la descendencia se repara en un solo paso (las reparaciones son los hijos inválidos)
+            with perfilador.fase('reparacion'):
+                hijos = reparar_poblacion(hijos, catalogo, area_total, presupuesto_total, perfilador=perfilador)
 
-        nueva_poblacion = nueva_poblacion[:tam_poblacion]
+        nueva_poblacion = np.vstack([elite, hijos])[:tam]
 
         # Mutación
         inicio_mutacion = elite_size if elitismo else 0
-        for i in range(inicio_mutacion, len(nueva_poblacion)):
-            if random.random() < tasa_mutacion:
-                nueva_poblacion[i] = mutacion_conservadora(
-                    nueva_poblacion[i], catalogo, area_total, presupuesto_total, intensidad=0.2
-                )
+        with perfilador.fase('mutacion'):
+            mutadas = inicio_mutacion + np.flatnonzero(rng.random(max(0, len(nueva_poblacion) - inicio_mutacion))
+                                                       < tasa_mutacion)
+            mutar_poblacion(nueva_poblacion, mutadas, catalogo, area_total, presupuesto_total, intensidad=0.2, rng=rng)
+            perfilador.contar('mutaciones', len(mutadas))
 
         # 📌 Poda final por diversidad
-        nueva_poblacion = poda_por_diversidad(nueva_poblacion, umbral_similitud=0.95)
+        with perfilador.fase('diversidad'):
+            nueva_poblacion = poda_por_diversidad(nueva_poblacion, catalogo, area_total, presupuesto_total,
+                                                  umbral_similitud=0.95, rng=rng)
 
         poblacion = nueva_poblacion
+        estado['poblacion'] = poblacion
+        estado['generacion'] += 1
+
+        parada_temprana = not estado['sin_parada_temprana']
+        if parada_temprana and estado['generaciones_sin_mejora'] > PACIENCIA and gen > MIN_GENERACIONES:
+            estado['convergio'] = True
+            if verbose:
+                print(f"Parada temprana en generación {gen+1} por convergencia")
+
+        gap = calcular_gap(estado['mejor_ganancia'], cota_superior) if cota_superior is not None else None
+        if parada_temprana and gap is not None and gap_objetivo is not None and gap <= gap_objetivo:
+            estado['convergio'] = True
+            if verbose:
+                print(f"Parada temprana en generación {gen+1}: gap {gap:.4%} respecto de la cota LP")
+
+        # Límite de tiempo: se ajusta el tamaño de la población a lo que queda por generación
+        if limite is not None:
+            ahora = time.monotonic()
+            costo = (ahora - inicio_generacion) / max(1, tam)
+            if estado['costo_individuo'] is not None:
+                costo = SUAVIZADO_COSTO * costo + (1 - SUAVIZADO_COSTO) * estado['costo_individuo']
+            estado['costo_individuo'] = costo
+            restante = limite - ahora
+            if restante < costo * tam_minimo:
+                estado['tiempo_agotado'] = True
+                if verbose:
+                    print(f"Límite de tiempo alcanzado en generación {gen+1}")
+            else:
+                faltantes = horizonte - estado['generacion']
+                if parada_temprana:
+                    faltantes = min(faltantes, max(PACIENCIA + 1 - estado['generaciones_sin_mejora'],
+                                                   MIN_GENERACIONES + 2 - estado['generacion']))
+                por_generacion = restante / max(1, faltantes)
+                estado['tam_efectivo'] = int(min(tam_poblacion, max(tam_minimo, por_generacion / max(costo, 1e-9))))
+
+        yield {
+            'generacion': estado['generacion'],
+            'mejor_fitness': estado['mejor_fitness'],
+            'fitness_actual': fitness_actual if len(fitnesses) else None,
+            'validos': individuos_validos if len(fitnesses) else 0,
+            'tam_poblacion': len(poblacion),
+            'mejor': resumen_genoma(estado['mejor_individuo'], catalogo) if estado['mejor_individuo'] is not None else None,
+            'gap': gap,
+            'convergio': estado['convergio'],
+            'tiempo_agotado': estado['tiempo_agotado'],
+        }
+
+        if estado['convergio'] or estado['tiempo_agotado']:
+            break
+
+def evolucionar(estado, catalogo, area_total, presupuesto_total, generaciones, al_generar=None, **opciones):
+    """Avanza el estado hasta `generaciones` generaciones más o hasta la parada temprana.
 
-        if generaciones_sin_mejora > 30 and gen > 50:
-            print(f"Parada temprana en generación {gen+1} por convergencia")
+    El estado se modifica en sitio y también se devuelve, de modo que una corrida
+    puede continuarse por tramos (por ejemplo, entre migraciones de islas).
+    `al_generar` recibe el progreso de cada generación; el resto de opciones son
+    las de `iterar_generaciones`.
+    """
+    for progreso in iterar_generaciones(estado, catalogo, area_total, presupuesto_total, generaciones, **opciones):
+        if al_generar is not None:
+            al_generar(progreso)
+    return estado
+
+def iterar_algoritmo_genetico(catalogo, area_total, presupuesto_total, generaciones=100, tam_poblacion=50,
+                              rng=None, cache=None, **opciones):
+    """Versión iterativa de `algoritmo_genetico`: emite el progreso de cada generación.
+
+    El consumidor puede dejar de iterar en cualquier momento; al agotarse, el
+    generador devuelve (vía StopIteration.value) el estado final de la corrida.
+    """
+    catalogo = compilar_catalogo(catalogo)
+    estado = crear_estado(catalogo, area_total, presupuesto_total, tam_poblacion, rng=rng)
+    yield from iterar_generaciones(estado, catalogo, area_total, presupuesto_total, generaciones,
+                                   tam_poblacion=tam_poblacion, cache=cache, **opciones)
+    return estado
+
+
+def algoritmo_genetico(catalogo, area_total, presupuesto_total,
+                      generaciones=100, tam_poblacion=50, tasa_mutacion=0.1, elitismo=True,
+                      metodo_seleccion='torneo', cache=None,
+                      islas=1, intervalo_migracion=20, migrantes=2, topologia='anillo', procesos=None,
+                      cancelado=None, al_generar=None, semilla=None,
+                      modo='genetico', gap_objetivo=None, max_nodos=200000, iniciales=None,
+                      perfilador=None, limite_tiempo=None, busqueda_local=0,
+                      punto_control=None, intervalo_control=10, reanudar_desde=None, verbose=True):
+    """Ejecuta el AG y devuelve (mejor individuo, mejor fitness, historial por generación, evaluación).
+
+    `modo` elige entre AG, exacto, auto y Pareto; `reanudar_desde` retoma un punto de control y,
+    si aquella corrida había terminado, la continúa sin parada temprana hasta `generaciones`.
+    """
+    catalogo = compilar_catalogo(catalogo)
+    if modo not in MODOS:
+        raise ValueError(f"Modo desconocido: {modo}")
+    limite = time.monotonic() + limite_tiempo if limite_tiempo is not None else None
+
+    # Modo exacto: ramificación y acotamiento sobre la ganancia neta
+    if modo == 'exacto' or (modo == 'auto' and len(catalogo) <= LIMITE_EXACTO):
+        plazo = limite if modo == 'exacto' or limite is None else time.monotonic() + limite_tiempo / 2
+        def detener_exacto():
+            return (cancelado is not None and cancelado()) or (plazo is not None and time.monotonic() >= plazo)
+        def al_terminar_exacto(evento):
+            evento['tiempo_agotado'] = plazo is not None and time.monotonic() >= plazo
+            if al_generar is not None:
+                al_generar(evento)
+
+        if modo == 'exacto':
+            with (perfilador or PERFILADOR_NULO).fase('exacto'):
+                return algoritmo_exacto(catalogo, area_total, presupuesto_total, max_nodos=max_nodos,
+                                        cancelado=detener_exacto, al_generar=al_terminar_exacto, verbose=verbose)
+        with (perfilador or PERFILADOR_NULO).fase('exacto'):
+            resultado = resolver_exacto(catalogo, area_total, presupuesto_total, max_nodos=max_nodos,
+                                        cancelado=detener_exacto)
+        if resultado['optimo']:
+            if verbose:
+                print(f"Modo auto: solución exacta óptima en {resultado['nodos']} nodos")
+            al_terminar_exacto(evento_exacto(resultado))
+            evaluacion = EvaluacionIndividuo.desde_genoma(resultado['individuo'], catalogo, area_total,
+                                                          presupuesto_total)
+            return resultado['individuo'], resultado['ganancia'], resultado['historial'], evaluacion
+        if verbose:
+            print(f"Modo auto: sin prueba de optimalidad en {resultado['nodos']} nodos, se usa el AG")
+
+    # Modo Pareto: NSGA-II sobre los cuatro objetivos sin ponderar
+    if modo == 'pareto':
+        from pareto import algoritmo_pareto, elegir_punto, matriz_objetivos
+        frente = algoritmo_pareto(catalogo, area_total, presupuesto_total, generaciones=generaciones,
+                                  tam_poblacion=tam_poblacion, tasa_mutacion=tasa_mutacion, cache=cache,
+                                  cancelado=cancelado, al_generar=al_generar, semilla=semilla, iniciales=iniciales,
+                                  perfilador=perfilador, limite_tiempo=limite_tiempo, verbose=verbose)
+        if not frente['evaluaciones']:
+            return None, -float('inf'), frente['historial'], None
+        elegido = elegir_punto(matriz_objetivos(frente['objetivos']))
+        evaluacion = frente['evaluaciones'][elegido]
+        return (frente['genomas'][elegido].tolist(), evaluacion.resumen['ganancia_neta'], frente['historial'],
+                evaluacion)
+
+    cota_superior = None
+    if gap_objetivo is not None:
+        cota_superior = cota_lp(catalogo, area_total, presupuesto_total)['cota']
+
+    # Modo islas: varias subpoblaciones en paralelo con migración periódica
+    if islas > 1:
+        from islas import algoritmo_genetico_islas
+        return algoritmo_genetico_islas(
+            catalogo, area_total, presupuesto_total, generaciones=generaciones,
+            tam_poblacion=tam_poblacion, tasa_mutacion=tasa_mutacion, elitismo=elitismo,
+            metodo_seleccion=metodo_seleccion, islas=islas, intervalo_migracion=intervalo_migracion,
+            migrantes=migrantes, topologia=topologia, procesos=procesos, cancelado=cancelado,
+            al_generar=al_generar, semilla=semilla, cota_superior=cota_superior, gap_objetivo=gap_objetivo,
+            iniciales=iniciales, perfilador=perfilador, limite=limite, busqueda_local=busqueda_local,
+            punto_control=punto_control, intervalo_control=intervalo_control, reanudar_desde=reanudar_desde,
+            verbose=verbose
+        )
+
+    perfilador = perfilador if perfilador is not None else PERFILADOR_NULO
+    with perfilador.fase('inicializacion'):
+        if reanudar_desde is not None:
+            estado = retomar_estados(reanudar_desde, catalogo, area_total, presupuesto_total)[0][0]
+            if verbose:
+                print(f"Corrida retomada en la generación {estado['generacion']}")
+        else:
+            estado = crear_estado(catalogo, area_total, presupuesto_total, tam_poblacion,
+                                  rng=np.random.default_rng(semilla), iniciales=iniciales)
+
+    # Por tramos de `intervalo_control` generaciones si hay que guardar puntos de control
+    while estado['generacion'] < generaciones:
+        tramo = generaciones - estado['generacion']
+        if punto_control is not None:
+            tramo = min(tramo, max(1, intervalo_control))
+        generacion_previa = estado['generacion']
+        evolucionar(estado, catalogo, area_total, presupuesto_total, tramo,
+                    tam_poblacion=tam_poblacion, tasa_mutacion=tasa_mutacion, elitismo=elitismo,
+                    metodo_seleccion=metodo_seleccion, cache=cache, cancelado=cancelado, al_generar=al_generar,
+                    cota_superior=cota_superior, gap_objetivo=gap_objetivo, perfilador=perfilador, limite=limite,
+                    horizonte=generaciones, busqueda_local=busqueda_local, verbose=verbose)
+        if punto_control is not None:
+            with perfilador.fase('punto_control'):
+                guardar_punto_control(punto_control, [estado], estado['generacion'], area_total, presupuesto_total)
+        if (estado['convergio'] or estado['tiempo_agotado'] or estado['generacion'] == generacion_previa or
+                (cancelado is not None and cancelado())):
             break
 
-    return mejor_individuo_global, mejor_fitness_global, mejor_fitness_por_generacion
+    if verbose and cache is not None:
+        estadisticas = cache.estadisticas()
+        print(f"Caché de evaluaciones: {estadisticas['aciertos']} aciertos | {estadisticas['fallos']} fallos "
+              f"({estadisticas['tasa_aciertos']:.1%})")
+
+    mejor = estado['mejor_individuo'].tolist() if estado['mejor_individuo'] is not None else None
+    return mejor, estado['mejor_fitness'], estado['historial'], estado['mejor_evaluacion']
@@ -0,0 +1,43 @@
+import numpy as np
+
+# =======================
+# REPRESENTACIÓN DE GENOMAS
+# =======================
+# Un genoma es una fila de enteros de 32 bits con la cantidad de plantas de cada
+# semilla; la población es una matriz (individuos x semillas) de ese tipo, de
+# modo que los operadores trabajan sobre ella sin bucles por gen. Con catálogos
+# grandes casi todos los genes son cero, así que para guardar o transferir
+# genomas entre procesos existe además la forma dispersa (índices, cantidades).
+
+TIPO_GENOMA = np.int32
+
+def como_matriz(poblacion, n_genes):
+    """Población como matriz contigua de TIPO_GENOMA (sin copiar si ya lo es)"""
+    return np.ascontiguousarray(np.asarray(poblacion, dtype=TIPO_GENOMA).reshape(-1, n_genes))
+
+def a_disperso(genoma):
+    """(índices, cantidades) de los genes distintos de cero"""
+    genoma = np.asarray(genoma, dtype=TIPO_GENOMA)
+    indices = np.flatnonzero(genoma).astype(TIPO_GENOMA)
+    return indices, genoma[indices]
+
+def a_denso(indices, cantidades, n_genes):
+    genoma = np.zeros(n_genes, dtype=TIPO_GENOMA)
+    genoma[indices] = cantidades
+    return genoma
+
+def comprimir_poblacion(matriz):
+    """Forma dispersa por filas de una población (punteros de fila, índices y cantidades)"""
+    filas, indices = np.nonzero(matriz)
+    return {
+        'forma': matriz.shape,
+        'punteros': np.searchsorted(filas, np.arange(matriz.shape[0] + 1)).astype(np.int64),
+        'indices': indices.astype(TIPO_GENOMA),
+        'cantidades': matriz[filas, indices],
+    }
+
+def expandir_poblacion(comprimida):
+    matriz = np.zeros(comprimida['forma'], dtype=TIPO_GENOMA)
+    filas = np.repeat(np.arange(comprimida['forma'][0]), np.diff(comprimida['punteros']))
+    matriz[filas, comprimida['indices']] = comprimida['cantidades']
+    return matriz
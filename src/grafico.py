@@ -0,0 +1,96 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# =======================
+# HISTORIAL COMPACTO
+# =======================
+def reducir_historial(historial, max_puntos=None):
+    """Submuestrea el historial de fitness a lo sumo `max_puntos` puntos.
+
+    Devuelve (generaciones, fitness); `generaciones` es None si no hubo que
+    reducir. Se conservan siempre la primera y la última generación.
+    """
+    fitness = [float(f) for f in historial]
+    if max_puntos is None or len(fitness) <= max_puntos:
+        return None, fitness
+    max_puntos = max(2, max_puntos)
+    indices = np.unique(np.linspace(0, len(fitness) - 1, max_puntos).round().astype(int))
+    return indices.tolist(), [fitness[i] for i in indices]
+
+# =======================
+# GRÁFICO PNG
+# =======================
+def generar_grafico_png(historial):
+    """Gráfico de evolución del fitness como bytes PNG.
+
+    matplotlib se importa aquí y no al cargar el módulo, para que los procesos
+    que solo ejecutan el AG no paguen su arranque. Se usa la API orientada a
+    objetos con el lienzo Agg, que no comparte estado global entre hilos.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figura = Figure(figsize=(10, 5))
+    FigureCanvasAgg(figura)
+    ejes = figura.add_subplot()
+    ejes.plot(historial, marker='o', color='green')
+    ejes.set_title("Evolución del Fitness por Generación")
+    ejes.set_xlabel("Generación")
+    ejes.set_ylabel("Fitness del Mejor Individuo")
+    ejes.grid(True)
+    figura.tight_layout()
+
+    img = io.BytesIO()
+    figura.savefig(img, format='png')
+    return img.getvalue()
+
+class CacheGraficos:
+    """PNG ya renderizados, indexados por el hash del historial.
+
+    Guarda un LRU en memoria y, si se indica `directorio`, una copia en disco
+    que sobrevive a reinicios del servidor.
+    """
+
+    def __init__(self, capacidad=64, directorio=None):
+        self.capacidad = capacidad
+        self.directorio = directorio
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def clave(historial):
+        texto = json.dumps([float(f) for f in historial])
+        return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+    def obtener(self, historial):
+        """Devuelve (clave, bytes PNG), renderizando el gráfico solo si no estaba guardado"""
+        clave = self.clave(historial)
+        with self._lock:
+            png = self._entradas.get(clave)
+            if png is not None:
+                self._entradas.move_to_end(clave)
+                return clave, png
+
+        ruta = os.path.join(self.directorio, f'{clave}.png') if self.directorio else None
+        if ruta and os.path.exists(ruta):
+            with open(ruta, 'rb') as f:
+                png = f.read()
+        else:
+            png = generar_grafico_png(historial)
+            if ruta:
+                os.makedirs(self.directorio, exist_ok=True)
+                temporal = f'{ruta}.{os.getpid()}.tmp'
+                with open(temporal, 'wb') as f:
+                    f.write(png)
+                os.replace(temporal, ruta)
+
+        with self._lock:
+            self._entradas[clave] = png
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+        return clave, png
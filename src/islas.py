@@ -0,0 +1,227 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
+from catalogo import compilar_catalogo
+from evaluacion import evaluar_poblacion
+from genetico import crear_estado, evolucionar, resumen_genoma
+from exacto import calcular_gap
+from genoma import comprimir_poblacion, expandir_poblacion
+from perfilado import Perfilador, PERFILADOR_NULO
+from puntos_control import guardar_punto_control, retomar_estados
+
+TOPOLOGIAS = ('anillo', 'completa')
+
+# =======================
+# PROCESOS TRABAJADORES
+# =======================
+# El catálogo y el evento de cancelación de la corrida viven en cada proceso
+# durante toda la corrida; entre tramos solo viaja el estado de cada isla.
+_catalogo_proceso = None
+_cancelacion_proceso = None
+
+# Cada cuántos segundos se consulta `cancelado` mientras las islas corren un tramo
+ESPERA_CANCELACION = 0.1
+
+def _inicializar_proceso(catalogo, cancelacion):
+    global _catalogo_proceso, _cancelacion_proceso
+    _catalogo_proceso = catalogo
+    _cancelacion_proceso = cancelacion
+
+def _empaquetar(estado):
+    """Estado con la población en forma dispersa, para enviarlo entre procesos"""
+    return dict(estado, poblacion=comprimir_poblacion(estado['poblacion'])) if estado is not None else None
+
+def _desempaquetar(estado):
+    return dict(estado, poblacion=expandir_poblacion(estado['poblacion'])) if estado is not None else None
+
+def _ejecutar_tramo(estado, area_total, presupuesto_total, generaciones, parametros, semilla, iniciales=None,
+                    perfilar=False):
+    """Avanza una isla un tramo de generaciones (entre dos migraciones).
+
+    El estado viaja entre procesos con la población en forma dispersa. Devuelve
+    el estado y, si se pidió `perfilar`, el resumen del perfilado del tramo.
+    """
+    perfilador = Perfilador() if perfilar else None
+    estado = _desempaquetar(estado)
+    if estado is None:
+        estado = crear_estado(_catalogo_proceso, area_total, presupuesto_total,
+                              parametros['tam_poblacion'], rng=np.random.default_rng(semilla), iniciales=iniciales)
+    if not estado['convergio']:
+        opciones = {'perfilador': perfilador} if perfilar else {}
+        evolucionar(estado, _catalogo_proceso, area_total, presupuesto_total, generaciones,
+                    verbose=False, cancelado=_cancelacion_proceso.is_set, **parametros, **opciones)
+    return _empaquetar(estado), perfilador.resumen() if perfilar else None
+
+def _esperar_tramos(futuros, cancelado, cancelacion):
+    """Resultados de un tramo de todas las islas.
+
+    Mientras corren se consulta `cancelado`; si se cumple, se avisa a las islas
+    por el evento compartido y cada una se detiene en su próxima generación.
+    """
+    if cancelado is not None:
+        while wait(futuros, timeout=ESPERA_CANCELACION).not_done:
+            if cancelado():
+                cancelacion.set()
+                break
+    return [futuro.result() for futuro in futuros]
+
+# =======================
+# MIGRACIÓN
+# =======================
+def destinos_migracion(n_islas, topologia):
+    """Lista de islas que reciben los emigrantes de cada isla"""
+    if topologia == 'anillo':
+        return [[(i + 1) % n_islas] for i in range(n_islas)]
+    if topologia == 'completa':
+        return [[j for j in range(n_islas) if j != i] for i in range(n_islas)]
+    raise ValueError(f"Topología de migración desconocida: {topologia}")
+
+def migrar(estados, catalogo, area_total, presupuesto_total, migrantes, topologia):
+    """Copia los mejores individuos de cada isla sobre los peores de sus destinos"""
+    fitnesses = [evaluar_poblacion(estado['poblacion'], catalogo, area_total, presupuesto_total)[0]
+                 for estado in estados]
+    entrantes = [[] for _ in estados]
+    for origen, destinos in enumerate(destinos_migracion(len(estados), topologia)):
+        mejores = np.argsort(fitnesses[origen])[::-1][:migrantes]
+        for destino in destinos:
+            entrantes[destino].extend((fitnesses[origen][i], estados[origen]['poblacion'][i]) for i in mejores)
+
+    for destino, recibidos in enumerate(entrantes):
+        if estados[destino]['convergio'] or not recibidos:
+            continue
+        recibidos.sort(key=lambda par: par[0], reverse=True)
+        peores = np.argsort(fitnesses[destino])[:migrantes]
+        for i, (_, individuo) in zip(peores, recibidos):
+            estados[destino]['poblacion'][i] = individuo.copy()
+
+def combinar_historiales(historiales):
+    """Mejor fitness por generación entre todas las islas (las que pararon antes conservan su último valor)"""
+    largo = max(len(h) for h in historiales)
+    return [max(h[min(g, len(h) - 1)] for h in historiales if h) for g in range(largo)]
+
+# =======================
+# ALGORITMO GENÉTICO EN ISLAS
+# =======================
+def algoritmo_genetico_islas(catalogo, area_total, presupuesto_total,
+                             generaciones=100, tam_poblacion=50, tasa_mutacion=0.1, elitismo=True,
+                             metodo_seleccion='torneo', islas=4, intervalo_migracion=20, migrantes=2,
+                             topologia='anillo', procesos=None, cancelado=None, al_generar=None,
+                             semilla=None, cota_superior=None, gap_objetivo=None, iniciales=None,
+                             perfilador=None, limite=None, busqueda_local=0,
+                             punto_control=None, intervalo_control=10, reanudar_desde=None, verbose=True):
+    """Ejecuta `islas` subpoblaciones del AG en un pool de procesos con migración periódica.
+
+    Cada `intervalo_migracion` generaciones los mejores `migrantes` individuos de
+    cada isla se copian a sus vecinas según la topología ('anillo' o 'completa').
+    Devuelve lo mismo que `algoritmo_genetico`, con el historial combinado.
+    `cancelado` se propaga a las islas, que lo consultan en cada generación, y
+    `al_generar` recibe el progreso entre tramos.
+    `cota_superior` y `gap_objetivo` se pasan a cada isla (ver `iterar_generaciones`)
+    y los genomas `iniciales` se siembran en todas las islas. Si se da un
+    `perfilador`, cada isla perfila sus tramos y los resúmenes se combinan en él.
+    Con un `limite` de tiempo (instante de `time.monotonic()`) cada isla ajusta su
+    población al plazo y la corrida termina cuando alguna lo agota.
+    `busqueda_local` activa en cada isla la etapa memética.
+    `punto_control` e `intervalo_control` guardan el estado de todas las islas
+    tras la migración, y `reanudar_desde` retoma uno (ver `algoritmo_genetico`).
+    """
+    if topologia not in TOPOLOGIAS:
+        raise ValueError(f"Topología de migración desconocida: {topologia}")
+    catalogo = compilar_catalogo(catalogo)
+    intervalo_migracion = max(1, intervalo_migracion)
+    procesos = min(islas, procesos or os.cpu_count() or 1)
+    parametros = {
+        'tam_poblacion': tam_poblacion,
+        'tasa_mutacion': tasa_mutacion,
+        'elitismo': elitismo,
+        'metodo_seleccion': metodo_seleccion,
+        'cota_superior': cota_superior,
+        'gap_objetivo': gap_objetivo,
+        'limite': limite,
+        'horizonte': generaciones,
+        'busqueda_local': busqueda_local,
+    }
+    semillas = np.random.SeedSequence(semilla).spawn(islas)
+
+    estados = [None] * islas
+    realizadas = 0
+    if reanudar_desde is not None:
+        estados, realizadas = retomar_estados(reanudar_desde, catalogo, area_total, presupuesto_total)
+        if len(estados) != islas:
+            raise ValueError(f"El punto de control tiene {len(estados)} islas, no {islas}")
+        if verbose:
+            print(f"Corrida retomada en la generación {realizadas}")
+    guardada = realizadas
+    cancelacion = multiprocessing.Event()
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_proceso,
+                             initargs=(catalogo, cancelacion)) as pool:
+        while realizadas < generaciones:
+            if cancelado is not None and cancelado():
+                if verbose:
+                    print(f"Corrida cancelada en generación {realizadas}")
+                break
+            tramo = min(intervalo_migracion, generaciones - realizadas)
+            futuros = [pool.submit(_ejecutar_tramo, _empaquetar(estado), area_total, presupuesto_total, tramo,
+                                   parametros, semilla_isla, iniciales, perfilador is not None)
+                       for estado, semilla_isla in zip(estados, semillas)]
+            tramos = _esperar_tramos(futuros, cancelado, cancelacion)
+            estados = [_desempaquetar(estado) for estado, _ in tramos]
+            if perfilador is not None:
+                for _, resumen in tramos:
+                    perfilador.combinar(resumen)
+            # Las islas que convergieron o se cancelaron pueden haber corrido menos que el tramo
+            realizadas = max(estado['generacion'] for estado in estados)
+            if cancelacion.is_set():
+                if verbose:
+                    print(f"Corrida cancelada en generación {realizadas}")
+                break
+
+            mejor_estado = max(estados, key=lambda estado: estado['mejor_fitness'])
+            if verbose:
+                print(f"Gen {realizadas:3d} | Islas: {islas} | Mejor Global: {mejor_estado['mejor_fitness']:.4f}")
+            gap = calcular_gap(mejor_estado['mejor_ganancia'], cota_superior) if cota_superior is not None else None
+            if al_generar is not None:
+                al_generar({
+                    'generacion': realizadas,
+                    'mejor_fitness': mejor_estado['mejor_fitness'],
+                    'fitness_actual': mejor_estado['historial'][-1] if mejor_estado['historial'] else None,
+                    'validos': None,
+                    'tam_poblacion': sum(len(estado['poblacion']) for estado in estados),
+                    'mejor': resumen_genoma(mejor_estado['mejor_individuo'], catalogo)
+                             if mejor_estado['mejor_individuo'] is not None else None,
+                    'gap': gap,
+                    'convergio': all(estado['convergio'] for estado in estados),
+                    'tiempo_agotado': any(estado['tiempo_agotado'] for estado in estados),
+                })
+
+            if all(estado['convergio'] for estado in estados):
+                if verbose:
+                    print(f"Parada temprana en generación {realizadas}: todas las islas convergieron")
+                break
+            if gap is not None and gap_objetivo is not None and gap <= gap_objetivo:
+                if verbose:
+                    print(f"Parada temprana en generación {realizadas}: gap {gap:.4%} respecto de la cota LP")
+                break
+            if any(estado['tiempo_agotado'] for estado in estados):
+                if verbose:
+                    print(f"Límite de tiempo alcanzado en generación {realizadas}")
+                break
+            if realizadas < generaciones and migrantes > 0:
+                with (perfilador or PERFILADOR_NULO).fase('migracion'):
+                    migrar(estados, catalogo, area_total, presupuesto_total, migrantes, topologia)
+            if punto_control is not None and realizadas - guardada >= intervalo_control:
+                with (perfilador or PERFILADOR_NULO).fase('punto_control'):
+                    guardar_punto_control(punto_control, estados, realizadas, area_total, presupuesto_total)
+                guardada = realizadas
+
+    if punto_control is not None and estados[0] is not None and guardada != realizadas:
+        with (perfilador or PERFILADOR_NULO).fase('punto_control'):
+            guardar_punto_control(punto_control, estados, realizadas, area_total, presupuesto_total)
+
+    if estados[0] is None:
+        return None, -float('inf'), [], None
+    mejor_estado = max(estados, key=lambda estado: estado['mejor_fitness'])
+    historial = combinar_historiales([estado['historial'] for estado in estados])
+    mejor = mejor_estado['mejor_individuo'].tolist() if mejor_estado['mejor_individuo'] is not None else None
+    return mejor, mejor_estado['mejor_fitness'], historial, mejor_estado['mejor_evaluacion']
@@ -2,6 +2,7 @@ import json
 import os
 from genetico import algoritmo_genetico
 from reporte import generar_reporte_individuo, graficar_evolucion_fitness
+from catalogo import compilar_catalogo
 
 def main():
     print("=== AGROGEN: Optimización de Cultivos con Algoritmos Genéticos ===")
@@ -25,6 +26,8 @@ def main():
         print("❌ Error: El catálogo debe contener al menos 2 tipos de semillas.")
         return
     
+    catalogo_semillas = compilar_catalogo(catalogo_semillas)
+
     # Entradas del usuario
     try:
         area_total = float(input("Ingresa área total del terreno (m²): "))
@@ -52,7 +55,7 @@ def main():
     print(f"\n🚀 Ejecutando algoritmo genético...\n")
     
     # Ejecutar algoritmo genético
-    mejor, fitness, historial = algoritmo_genetico(
+    mejor, fitness, historial, evaluacion = algoritmo_genetico(
         catalogo=catalogo_semillas,
         area_total=area_total,
         presupuesto_total=presupuesto_total,
@@ -66,7 +69,7 @@ def main():
     print(f"🏆 Fitness final: {fitness:.4f}")
     
     # Reportes
-    generar_reporte_individuo(mejor, catalogo_semillas, area_total, presupuesto_total)
+    generar_reporte_individuo(evaluacion)
     graficar_evolucion_fitness(historial)
 
 if __name__ == "__main__":
@@ -0,0 +1,81 @@
+import threading
+
+# Límites (en segundos) de los histogramas de latencia
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+def _etiquetas(etiquetas, extra=None):
+    pares = sorted(etiquetas) + ([extra] if extra else [])
+    if not pares:
+        return ''
+    def escapar(valor):
+        return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{clave}="{escapar(valor)}"' for clave, valor in pares) + '}'
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+class RegistroMetricas:
+    """Contadores, medidores e histogramas exportables en el formato de texto de Prometheus.
+
+    Cada serie se identifica por nombre y etiquetas (argumentos con nombre). Los
+    métodos son seguros entre hilos.
+    """
+
+    def __init__(self):
+        self._descripciones = {}
+        self._valores = {}
+        self._histogramas = {}
+        self._lock = threading.Lock()
+
+    def describir(self, nombre, tipo, ayuda):
+        self._descripciones[nombre] = (tipo, ayuda)
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def fijar(self, nombre, valor, **etiquetas):
+        with self._lock:
+            self._valores[(nombre, tuple(sorted(etiquetas.items())))] = valor
+
+    def observar(self, nombre, valor, buckets=BUCKETS_LATENCIA, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = {'buckets': buckets, 'conteos': [0] * len(buckets),
+                                                         'suma': 0.0, 'total': 0}
+            for i, limite in enumerate(histograma['buckets']):
+                if valor <= limite:
+                    histograma['conteos'][i] += 1
+            histograma['suma'] += valor
+            histograma['total'] += 1
+
+    def exportar(self):
+        """Texto en formato de exposición de Prometheus (versión 0.0.4)"""
+        with self._lock:
+            valores = sorted(self._valores.items())
+            histogramas = sorted((clave, dict(h, conteos=list(h['conteos']))) for clave, h in self._histogramas.items())
+
+        lineas = []
+        descritas = set()
+        def cabecera(nombre, tipo_por_defecto):
+            if nombre not in descritas:
+                tipo, ayuda = self._descripciones.get(nombre, (tipo_por_defecto, ''))
+                if ayuda:
+                    lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} {tipo}')
+                descritas.add(nombre)
+
+        for (nombre, etiquetas), valor in valores:
+            cabecera(nombre, 'untyped')
+            lineas.append(f'{nombre}{_etiquetas(etiquetas)} {_numero(valor)}')
+        for (nombre, etiquetas), histograma in histogramas:
+            cabecera(nombre, 'histogram')
+            for limite, conteo in zip(histograma['buckets'], histograma['conteos']):
+                lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas, ("le", limite))} {conteo}')
+            lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas, ("le", "+Inf"))} {histograma["total"]}')
+            lineas.append(f'{nombre}_sum{_etiquetas(etiquetas)} {_numero(histograma["suma"])}')
+            lineas.append(f'{nombre}_count{_etiquetas(etiquetas)} {histograma["total"]}')
+        return '\n'.join(lineas) + '\n'
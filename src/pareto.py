@@ -0,0 +1,287 @@
+import time
+import numpy as np
+from evaluacion import evaluar_poblacion, EvaluacionIndividuo
+from poblacion import generar_poblacion_inicial
+from catalogo import compilar_catalogo
+from genoma import como_matriz
+from seleccion import seleccionar_parejas
+from genetico import crear_estado, cruza_uniforme, mutar_poblacion, reparar_poblacion, resumen_genoma
+from perfilado import PERFILADOR_NULO
+
+# =======================
+# OBJETIVOS
+# =======================
+# Los mismos cuatro objetivos que el fitness ponderado, pero sin combinarlos:
+# cada individuo queda como un punto en el espacio de objetivos.
+OBJETIVOS = ('ganancia_neta', 'produccion_total', 'uso_terreno', 'tiempo_promedio')
+# +1 se maximiza, -1 se minimiza
+SENTIDOS = np.array([1.0, 1.0, 1.0, -1.0])
+# Filas por bloque al comparar todos contra todos (acota la memoria intermedia)
+BLOQUE_DOMINANCIA = 512
+
+def matriz_objetivos(metricas):
+    """Objetivos de cada individuo (filas) expresados de modo que todos se maximizan"""
+    return np.column_stack([np.asarray(metricas[nombre], dtype=float) for nombre in OBJETIVOS]) * SENTIDOS
+
+def candidatos_frente(metricas):
+    """Individuos que pueden estar en el frente: válidos y con al menos un cultivo.
+
+    El plan vacío es válido y tiene el menor tiempo posible, pero no es un
+    compromiso útil entre los objetivos.
+    """
+    return metricas['valido'] & (metricas['tipos_cultivo'] > 0)
+
+def leer_pesos(pesos):
+    """Vector de pesos (suma 1) a partir de un diccionario objetivo -> peso; None da pesos iguales"""
+    if pesos is None:
+        return np.full(len(OBJETIVOS), 1 / len(OBJETIVOS))
+    if not isinstance(pesos, dict):
+        raise ValueError('Los pesos deben ser un objeto {objetivo: peso}')
+    desconocidos = set(pesos) - set(OBJETIVOS)
+    if desconocidos:
+        raise ValueError(f"Objetivos desconocidos: {', '.join(sorted(desconocidos))}")
+    vector = np.array([float(pesos.get(nombre, 0)) for nombre in OBJETIVOS])
+    if (vector < 0).any() or not np.isfinite(vector).all() or vector.sum() <= 0:
+        raise ValueError('Los pesos deben ser no negativos y no todos cero')
+    return vector / vector.sum()
+
+# =======================
+# ORDENAMIENTO NO DOMINADO
+# =======================
+
+def matriz_dominancia(objetivos):
+    """domina[i, j] es True si i es al menos tan bueno como j en todo y mejor en algo"""
+    n = len(objetivos)
+    domina = np.empty((n, n), dtype=bool)
+    for inicio in range(0, n, BLOQUE_DOMINANCIA):
+        bloque = objetivos[inicio:inicio + BLOQUE_DOMINANCIA, None, :]
+        domina[inicio:inicio + BLOQUE_DOMINANCIA] = ((bloque >= objetivos[None]).all(axis=2) &
+                                                    (bloque > objetivos[None]).any(axis=2))
+    return domina
+
+def rangos_no_dominados(objetivos, valido=None, penalizacion=None):
+    """Frente de cada individuo (0 = no dominado) con el ordenamiento rápido de NSGA-II.
+
+    Se cuenta de una vez cuántos individuos dominan a cada uno y se pelan los
+    frentes restando las dominancias del frente recién extraído. Los individuos
+    inválidos quedan detrás de todos los válidos, en frentes ordenados por
+    penalización creciente.
+    """
+    n = len(objetivos)
+    valido = np.ones(n, dtype=bool) if valido is None else np.asarray(valido, dtype=bool)
+    rangos = np.full(n, -1, dtype=np.int64)
+
+    validos = np.flatnonzero(valido)
+    domina = matriz_dominancia(objetivos[validos])
+    dominadores = domina.sum(axis=0)
+    pendiente = np.ones(len(validos), dtype=bool)
+    rango = 0
+    while pendiente.any():
+        frente = np.flatnonzero(pendiente & (dominadores == 0))
+        rangos[validos[frente]] = rango
+        pendiente[frente] = False
+        dominadores -= domina[frente].sum(axis=0)
+        rango += 1
+
+    invalidos = np.flatnonzero(~valido)
+    if len(invalidos):
+        castigo = np.zeros(len(invalidos)) if penalizacion is None else np.asarray(penalizacion)[invalidos]
+        rangos[invalidos] = rango + np.unique(castigo, return_inverse=True)[1]
+    return rangos
+
+def distancia_hacinamiento(objetivos, rangos):
+    """Distancia de hacinamiento de cada individuo dentro de su frente (extremos = infinito)"""
+    distancias = np.zeros(len(objetivos))
+    for rango in np.unique(rangos):
+        frente = np.flatnonzero(rangos == rango)
+        if len(frente) <= 2:
+            distancias[frente] = np.inf
+            continue
+        valores = objetivos[frente]
+        orden = np.argsort(valores, axis=0, kind='stable')
+        ordenados = np.take_along_axis(valores, orden, axis=0)
+        amplitud = ordenados[-1] - ordenados[0]
+        aporte = np.zeros_like(valores)
+        aporte[1:-1] = np.divide(ordenados[2:] - ordenados[:-2], amplitud,
+                                 out=np.zeros_like(ordenados[2:]), where=amplitud > 0)
+        aporte[[0, -1]] = np.inf
+        acumulado = np.zeros_like(valores)
+        np.put_along_axis(acumulado, orden, aporte, axis=0)
+        distancias[frente] = acumulado.sum(axis=1)
+    return distancias
+
+def clave_seleccion(rangos, distancias, valido):
+    """Valor escalar que ordena como (frente, -hacinamiento): mayor es mejor, inválidos en 0.
+
+    Permite reutilizar los métodos de selección del AG (torneo binario por
+    frente y, a igual frente, por hacinamiento).
+    """
+    finitas = np.isfinite(distancias)
+    desempate = np.full(len(distancias), 0.5)
+    desempate[finitas] = distancias[finitas] / (1 + distancias[finitas]) * 0.5
+    return np.where(valido, (rangos.max(initial=0) + 1 - rangos) + desempate, 0.0)
+
+def seleccion_ambiental(rangos, distancias, n):
+    """Índices de los `n` sobrevivientes: frentes completos y el último cortado por hacinamiento"""
+    return np.lexsort((-distancias, rangos))[:n]
+
+def elegir_punto(objetivos, pesos=None):
+    """Posición del punto del frente que maximiza la suma ponderada de objetivos normalizados.
+
+    `objetivos` es la matriz del frente (todos a maximizar) y `pesos` un
+    diccionario objetivo -> peso (ver `leer_pesos`).
+    """
+    objetivos = np.asarray(objetivos, dtype=float)
+    minimo, maximo = objetivos.min(axis=0), objetivos.max(axis=0)
+    normalizados = np.divide(objetivos - minimo, maximo - minimo,
+                             out=np.ones_like(objetivos), where=maximo > minimo)
+    return int(np.argmax(normalizados @ leer_pesos(pesos)))
+
+# =======================
+# NSGA-II
+# =======================
+
+def _clasificar(poblacion, catalogo, area_total, presupuesto_total, cache, perfilador):
+    with perfilador.fase('evaluacion'):
+        _, metricas = evaluar_poblacion(poblacion, catalogo, area_total, presupuesto_total, cache=cache)
+    perfilador.contar('evaluaciones', len(poblacion))
+    with perfilador.fase('ordenamiento'):
+        objetivos = matriz_objetivos(metricas)
+        rangos = rangos_no_dominados(objetivos, candidatos_frente(metricas), metricas['penalizacion'])
+        distancias = distancia_hacinamiento(objetivos, rangos)
+    return metricas, objetivos, rangos, distancias
+
+def iterar_pareto(estado, catalogo, area_total, presupuesto_total, generaciones, tam_poblacion=50,
+                  tasa_mutacion=0.1, cache=None, verbose=True, cancelado=None, perfilador=PERFILADOR_NULO,
+                  limite=None):
+    """Generador de NSGA-II: avanza el estado una generación por iteración y emite su progreso.
+
+    Los hijos se obtienen con los operadores del AG (torneo por frente y
+    hacinamiento, cruza uniforme, reparación y mutación) y compiten con los
+    padres: de la unión sobreviven los mejores frentes. Guarda en el estado la
+    población con sus métricas, objetivos y frentes. Se detiene al completar
+    `generaciones`, al cancelarse o cuando la próxima generación ya no cabe
+    antes de `limite` (un instante de `time.monotonic()`).
+    """
+    rng = estado['rng']
+    if 'rangos' not in estado:
+        (estado['metricas'], estado['objetivos'],
+         estado['rangos'], estado['distancias']) = _clasificar(estado['poblacion'], catalogo, area_total,
+                                                               presupuesto_total, cache, perfilador)
+
+    for _ in range(generaciones):
+        inicio_generacion = time.monotonic()
+        if cancelado is not None and cancelado():
+            if verbose:
+                print(f"Corrida cancelada en generación {estado['generacion']}")
+            break
+        poblacion = estado['poblacion']
+
+        with perfilador.fase('seleccion'):
+            clave = clave_seleccion(estado['rangos'], estado['distancias'], candidatos_frente(estado['metricas']))
+            parejas = seleccionar_parejas(clave, (tam_poblacion + 1) // 2, metodo='torneo', rng=rng, k=2)
+        if parejas is None:
+            with perfilador.fase('inicializacion'):
+                hijos = como_matriz(generar_poblacion_inicial(catalogo, area_total, presupuesto_total,
+                                                              tam_poblacion, rng=rng), len(catalogo))
+        else:
+            with perfilador.fase('cruza'):
+                cruzan = rng.random(len(parejas)) < 0.8
+                hijos1, hijos2 = cruza_uniforme(poblacion[parejas[:, 0]], poblacion[parejas[:, 1]],
+                                                prob_cruza=0.4 * cruzan[:, None], rng=rng)
+                hijos = np.stack([hijos1, hijos2], axis=1).reshape(-1, len(catalogo))[:tam_poblacion]
+            perfilador.contar('hijos', len(hijos))
+            with perfilador.fase('reparacion'):
+                hijos = reparar_poblacion(hijos, catalogo, area_total, presupuesto_total, perfilador=perfilador)
+        with perfilador.fase('mutacion'):
+            mutadas = np.flatnonzero(rng.random(len(hijos)) < tasa_mutacion)
+            mutar_poblacion(hijos, mutadas, catalogo, area_total, presupuesto_total, intensidad=0.2, rng=rng)
+            perfilador.contar('mutaciones', len(mutadas))
+
+        # Padres e hijos compiten juntos; los genomas repetidos se cuentan una vez
+        union = np.vstack([poblacion, hijos])
+        union = union[np.sort(np.unique(union, axis=0, return_index=True)[1])]
+        metricas, objetivos, rangos, distancias = _clasificar(union, catalogo, area_total, presupuesto_total,
+                                                              cache, perfilador)
+        sobrevivientes = seleccion_ambiental(rangos, distancias, tam_poblacion)
+        estado['poblacion'] = union[sobrevivientes]
+        estado['metricas'] = {clave: valores[sobrevivientes] for clave, valores in metricas.items()}
+        estado['objetivos'] = objetivos[sobrevivientes]
+        # Los frentes se recalculan sobre los sobrevivientes: el corte puede dejar huecos
+        estado['rangos'] = rangos_no_dominados(estado['objetivos'], candidatos_frente(estado['metricas']),
+                                               estado['metricas']['penalizacion'])
+        estado['distancias'] = distancia_hacinamiento(estado['objetivos'], estado['rangos'])
+        estado['generacion'] += 1
+
+        valido = estado['metricas']['valido']
+        tam_frente = int(((estado['rangos'] == 0) & candidatos_frente(estado['metricas'])).sum())
+        mejor_ganancia = float(estado['metricas']['ganancia_neta'][valido].max()) if valido.any() else None
+        if mejor_ganancia is not None:
+            estado['historial'].append(mejor_ganancia)
+            if mejor_ganancia > estado['mejor_ganancia']:
+                estado['mejor_ganancia'] = mejor_ganancia
+                estado['mejor_individuo'] = estado['poblacion'][np.flatnonzero(valido)[
+                    np.argmax(estado['metricas']['ganancia_neta'][valido])]].copy()
+        if verbose:
+            print(f"Gen {estado['generacion']:3d} | Frente: {tam_frente} | Válidos: {int(valido.sum())}/"
+                  f"{len(estado['poblacion'])}")
+
+        if limite is not None and limite - time.monotonic() < time.monotonic() - inicio_generacion:
+            estado['tiempo_agotado'] = True
+            if verbose:
+                print(f"Límite de tiempo alcanzado en generación {estado['generacion']}")
+
+        yield {
+            'generacion': estado['generacion'],
+            'mejor_fitness': mejor_ganancia,
+            'fitness_actual': mejor_ganancia,
+            'validos': int(valido.sum()),
+            'tam_poblacion': len(estado['poblacion']),
+            'mejor': resumen_genoma(estado['mejor_individuo'], catalogo)
+                     if estado['mejor_individuo'] is not None else None,
+            'gap': None,
+            'frente': tam_frente,
+            'convergio': False,
+            'tiempo_agotado': estado['tiempo_agotado'],
+        }
+
+        if estado['tiempo_agotado']:
+            break
+
+def frente_final(estado, catalogo, area_total, presupuesto_total):
+    """Frente no dominado de la población: genomas, objetivos (columnas) y evaluaciones, por ganancia"""
+    metricas = estado['metricas']
+    puntos = np.flatnonzero((estado['rangos'] == 0) & candidatos_frente(metricas))
+    puntos = puntos[np.argsort(-metricas['ganancia_neta'][puntos], kind='stable')]
+    return {
+        'genomas': estado['poblacion'][puntos],
+        'objetivos': {nombre: np.asarray(metricas[nombre])[puntos] for nombre in OBJETIVOS},
+        'evaluaciones': [EvaluacionIndividuo.desde_genoma(estado['poblacion'][i], catalogo, area_total,
+                                                          presupuesto_total,
+                                                          metricas={clave: valores[i]
+                                                                    for clave, valores in metricas.items()})
+                         for i in puntos],
+        'historial': list(estado['historial']),
+    }
+
+def algoritmo_pareto(catalogo, area_total, presupuesto_total, generaciones=100, tam_poblacion=50,
+                     tasa_mutacion=0.1, cache=None, cancelado=None, al_generar=None, semilla=None,
+                     iniciales=None, perfilador=None, limite_tiempo=None, verbose=True):
+    """Modo multiobjetivo (NSGA-II): devuelve el frente de Pareto completo de una sola corrida.
+
+    El resultado es el de `frente_final`; cualquier compromiso entre los
+    objetivos se elige después con `elegir_punto` sin volver a correr. El
+    historial es la mejor ganancia neta de cada generación.
+    """
+    catalogo = compilar_catalogo(catalogo)
+    perfilador = perfilador if perfilador is not None else PERFILADOR_NULO
+    limite = time.monotonic() + limite_tiempo if limite_tiempo is not None else None
+    with perfilador.fase('inicializacion'):
+        estado = crear_estado(catalogo, area_total, presupuesto_total, tam_poblacion,
+                              rng=np.random.default_rng(semilla), iniciales=iniciales)
+    for progreso in iterar_pareto(estado, catalogo, area_total, presupuesto_total, generaciones,
+                                  tam_poblacion=tam_poblacion, tasa_mutacion=tasa_mutacion, cache=cache,
+                                  cancelado=cancelado, perfilador=perfilador, limite=limite, verbose=verbose):
+        if al_generar is not None:
+            al_generar(progreso)
+    return frente_final(estado, catalogo, area_total, presupuesto_total)
@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager
+
+# =======================
+# GANCHOS DE PERFILADO
+# =======================
+# Cualquier objeto con los métodos `fase(nombre)` (administrador de contexto que
+# mide el tiempo de un bloque) y `contar(nombre, n)` sirve como perfilador. El
+# AG los recibe por parámetro; sin perfilador usa PERFILADOR_NULO, cuyos métodos
+# no hacen nada, así que el costo con el perfilado apagado es una llamada vacía
+# por fase y generación.
+
+class _FaseNula:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+class PerfiladorNulo:
+    """Perfilador que no registra nada"""
+    _fase = _FaseNula()
+
+    def fase(self, nombre):
+        return self._fase
+
+    def contar(self, nombre, n=1):
+        pass
+
+PERFILADOR_NULO = PerfiladorNulo()
+
+class Perfilador:
+    """Tiempos acumulados por fase y contadores de eventos de una corrida"""
+
+    def __init__(self):
+        self.tiempos = {}
+        self.llamadas = {}
+        self.contadores = {}
+
+    @contextmanager
+    def fase(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.tiempos[nombre] = self.tiempos.get(nombre, 0.0) + time.perf_counter() - inicio
+            self.llamadas[nombre] = self.llamadas.get(nombre, 0) + 1
+
+    def contar(self, nombre, n=1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + int(n)
+
+    def combinar(self, resumen):
+        """Suma el resumen de otro perfilador (p. ej. el de una isla en otro proceso)"""
+        for nombre, fase in resumen['fases'].items():
+            self.tiempos[nombre] = self.tiempos.get(nombre, 0.0) + fase['segundos']
+            self.llamadas[nombre] = self.llamadas.get(nombre, 0) + fase['llamadas']
+        for nombre, valor in resumen['contadores'].items():
+            self.contar(nombre, valor)
+
+    def resumen(self):
+        return {
+            'fases': {nombre: {'segundos': segundos, 'llamadas': self.llamadas[nombre]}
+                      for nombre, segundos in self.tiempos.items()},
+            'contadores': dict(self.contadores),
+        }
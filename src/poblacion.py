@@ -1,132 +1,91 @@
-import random
+import numpy as np
+from catalogo import compilar_catalogo
+from genoma import TIPO_GENOMA
 
-def calcular_rentabilidad(planta):
-    """Calcula la rentabilidad por unidad de espacio y tiempo"""
-    costo_total = (planta['fertilizante_por_planta'] * planta['costo_fertilizante_unitario'] +
-                   planta['trabajadores_requeridos_por_planta'] * planta['costo_trabajador_unitario'])
-    ganancia_neta = (planta['rendimiento'] * planta['ganancia_unitaria']) - costo_total
-    
-    rentabilidad_espacial = ganancia_neta / planta['espacio'] if planta['espacio'] > 0 else 0
-    rentabilidad_temporal = ganancia_neta / planta['tiempo'] if planta['tiempo'] > 0 else 0
-    
-    return rentabilidad_espacial * 0.7 + rentabilidad_temporal * 0.3
+# Individuos que se construyen a la vez (acota la memoria de las matrices de orden)
+BLOQUE_INICIALIZACION = 4096
+# Tope de cantidad por gen (cabe en TIPO_GENOMA)
+MAX_CANTIDAD = np.iinfo(TIPO_GENOMA).max - 1
 
-def generar_poblacion_inicial(catalogo, area_total, presupuesto_total, tam_poblacion):
-    """Genera población inicial con diversas estrategias"""
-    poblacion = []
-    
-    plantas_con_indice = [(i, planta, calcular_rentabilidad(planta)) 
-                         for i, planta in enumerate(catalogo)]
-    plantas_ordenadas = sorted(plantas_con_indice, key=lambda x: x[2], reverse=True)
-    
-    for _ in range(tam_poblacion):
-        individuo = [0] * len(catalogo)
-        estrategia = random.choice(['greedy', 'diversificada', 'aleatoria', 'balanceada'])
-        
-        if estrategia == 'greedy':
-            area_usada = 0
-            costo_usado = 0
-            
-            for i, planta, rentabilidad in plantas_ordenadas:
-                if rentabilidad <= 0:
-                    continue
-                    
-                max_por_area = int((area_total - area_usada) // planta['espacio']) if planta['espacio'] > 0 else 0
-                
-                costo_unitario = (planta['fertilizante_por_planta'] * planta['costo_fertilizante_unitario'] +
-                                planta['trabajadores_requeridos_por_planta'] * planta['costo_trabajador_unitario'])
-                max_por_presupuesto = int((presupuesto_total - costo_usado) / costo_unitario) if costo_unitario > 0 else 0
-                
-                max_posible = max(0, min(max_por_area, max_por_presupuesto))
-                
-                if max_posible > 0:
-                    cantidad = random.randint(int(max_posible * 0.7), max_posible)
-                    individuo[i] = cantidad
-                    
-                    area_usada += cantidad * planta['espacio']
-                    costo_usado += cantidad * costo_unitario
-        
-        elif estrategia == 'diversificada':
-            area_usada = 0
-            costo_usado = 0
-            
-            plantas_mezcladas = plantas_ordenadas.copy()
-            random.shuffle(plantas_mezcladas)
-            
-            for i, planta, rentabilidad in plantas_mezcladas:
-                if rentabilidad <= 0:
-                    continue
-                
-                max_por_area = int((area_total - area_usada) // planta['espacio']) if planta['espacio'] > 0 else 0
-                
-                costo_unitario = (planta['fertilizante_por_planta'] * planta['costo_fertilizante_unitario'] +
-                                planta['trabajadores_requeridos_por_planta'] * planta['costo_trabajador_unitario'])
-                max_por_presupuesto = int((presupuesto_total - costo_usado) / costo_unitario) if costo_unitario > 0 else 0
-                
-                max_posible = max(0, min(max_por_area, max_por_presupuesto))
-                
-                if max_posible > 0:
-                    cantidad = random.randint(1, min(max_posible, max(1, int(max_posible * 0.3))))
-                    individuo[i] = cantidad
-                    
-                    area_usada += cantidad * planta['espacio']
-                    costo_usado += cantidad * costo_unitario
-        
-        elif estrategia == 'balanceada':
-            area_usada = 0
-            costo_usado = 0
-            
-            plantas_top = plantas_ordenadas[:len(plantas_ordenadas)//2]
-            random.shuffle(plantas_top)
-            
-            for i, planta, rentabilidad in plantas_top:
-                if rentabilidad <= 0:
-                    continue
-                
-                max_por_area = int((area_total - area_usada) // planta['espacio']) if planta['espacio'] > 0 else 0
-                
-                costo_unitario = (planta['fertilizante_por_planta'] * planta['costo_fertilizante_unitario'] +
-                                planta['trabajadores_requeridos_por_planta'] * planta['costo_trabajador_unitario'])
-                max_por_presupuesto = int((presupuesto_total - costo_usado) / costo_unitario) if costo_unitario > 0 else 0
-                
-                max_posible = max(0, min(max_por_area, max_por_presupuesto))
-                
-                if max_posible > 0:
-                    cantidad = random.randint(int(max_posible * 0.4), int(max_posible * 0.8))
-                    if cantidad > 0:
-                        individuo[i] = cantidad
-                        
-                        area_usada += cantidad * planta['espacio']
-                        costo_usado += cantidad * costo_unitario
-        
-        else:
-            area_usada = 0
-            costo_usado = 0
-            
-            indices_disponibles = list(range(len(catalogo)))
-            random.shuffle(indices_disponibles)
-            
-            for i in indices_disponibles:
-                planta = catalogo[i]
-                
-                if random.random() < 0.5:
-                    continue
-                
-                max_por_area = int((area_total - area_usada) // planta['espacio']) if planta['espacio'] > 0 else 0
-                
-                costo_unitario = (planta['fertilizante_por_planta'] * planta['costo_fertilizante_unitario'] +
-                                planta['trabajadores_requeridos_por_planta'] * planta['costo_trabajador_unitario'])
-                max_por_presupuesto = int((presupuesto_total - costo_usado) / costo_unitario) if costo_unitario > 0 else 0
-                
-                max_posible = max(0, min(max_por_area, max_por_presupuesto))
-                
-                if max_posible > 0:
-                    cantidad = random.randint(1, max_posible)
-                    individuo[i] = cantidad
-                    
-                    area_usada += cantidad * planta['espacio']
-                    costo_usado += cantidad * costo_unitario
-        
-        poblacion.append(individuo)
-    
-    return poblacion
\ No newline at end of file
+GREEDY, DIVERSIFICADA, ALEATORIA, BALANCEADA = range(4)
+# Cantidad a plantar según la estrategia, dado el máximo m que cabe:
+# entre max(MINIMO, ⌊m·FACTOR_MINIMO⌋) y min(m, max(TOPE, ⌊m·FACTOR_TOPE⌋))
+MINIMO = np.array([0, 1, 1, 0])
+FACTOR_MINIMO = np.array([0.7, 0.0, 0.0, 0.4])
+TOPE = np.array([0, 1, 0, 0])
+FACTOR_TOPE = np.array([1.0, 0.3, 1.0, 0.8])
+
+def max_posible(catalogo, genes, area_disponible, presupuesto_disponible):
+    """Máximo de plantas de cada tipo en `genes` que caben en el área y presupuesto disponibles"""
+    espacio = catalogo.espacio[genes]
+    costo_unitario = catalogo.costo_unitario[genes]
+    max_por_area = np.divide(area_disponible, espacio, out=np.zeros(espacio.shape), where=espacio > 0)
+    max_por_presupuesto = np.divide(presupuesto_disponible, costo_unitario,
+                                    out=np.zeros(espacio.shape), where=costo_unitario > 0)
+    maximo = np.clip(np.floor(np.minimum(max_por_area, max_por_presupuesto)), 0, MAX_CANTIDAD)
+    return maximo.astype(np.int64)
+
+def _ordenes(catalogo, estrategias, rng):
+    """Orden en que cada individuo recorre las semillas según su estrategia (-1 = sin más semillas)"""
+    plantas_ordenadas = catalogo.orden_rentabilidad
+    plantas_rentables = plantas_ordenadas[catalogo.rentabilidad[plantas_ordenadas] > 0]
+    mitad = plantas_ordenadas[:len(plantas_ordenadas) // 2]
+    balanceadas = mitad[catalogo.rentabilidad[mitad] > 0]
+
+    ordenes = np.full((len(estrategias), len(catalogo)), -1, dtype=TIPO_GENOMA)
+    for estrategia, base, mezclar in ((GREEDY, plantas_rentables, False),
+                                      (DIVERSIFICADA, plantas_rentables, True),
+                                      (BALANCEADA, balanceadas, True),
+                                      (ALEATORIA, np.arange(len(catalogo)), True)):
+        filas = np.flatnonzero(estrategias == estrategia)
+        if len(filas) == 0 or len(base) == 0:
+            continue
+        bloque = np.broadcast_to(base, (len(filas), len(base)))
+        ordenes[filas, :len(base)] = rng.permuted(bloque, axis=1) if mezclar else bloque
+    return ordenes
+
+def _generar_bloque(catalogo, area_total, presupuesto_total, n, rng):
+    estrategias = rng.integers(4, size=n)
+    # Los huecos del orden (-1) apuntan a una columna extra que se descarta al final
+    genes = _ordenes(catalogo, estrategias, rng).astype(np.int64) % (len(catalogo) + 1)
+    plantables = np.append((catalogo.espacio > 0) & (catalogo.costo_unitario > 0), False)
+
+    # Un solo sorteo por gen: las aleatorias saltean la mitad inferior y reescalan la superior a [0, 1)
+    estrategia = estrategias[:, None]
+    sorteo = rng.random(genes.shape)
+    aleatoria = estrategia == ALEATORIA
+    planta = plantables[genes] & ~(aleatoria & (sorteo < 0.5))
+    sorteo = np.where(aleatoria, 2 * sorteo - 1, sorteo)
+
+    # Cada semilla ocupa una fracción de lo que queda; lo que queda al llegar a ella sale del producto acumulado
+    fraccion = np.where(planta, FACTOR_MINIMO[estrategia] + (FACTOR_TOPE - FACTOR_MINIMO)[estrategia] * sorteo, 0.0)
+    queda = np.ones(genes.shape)
+    np.cumprod(1 - fraccion[:, :-1], axis=1, out=queda[:, 1:])
+    maximo = max_posible(catalogo, np.minimum(genes, len(catalogo) - 1), area_total * queda, presupuesto_total * queda)
+    cantidad = np.minimum(maximo, np.maximum(MINIMO[estrategia], (maximo * fraccion).astype(np.int64)))
+
+    poblacion = np.zeros((n, len(catalogo) + 1), dtype=TIPO_GENOMA)
+    np.put_along_axis(poblacion, genes, np.where(planta, cantidad, 0), axis=1)
+    return poblacion[:, :-1]
+
+def generar_poblacion_inicial(catalogo, area_total, presupuesto_total, tam_poblacion, rng=None):
+    """Genera la población inicial como matriz, mezclando cuatro estrategias.
+
+    Cada individuo sigue al azar una estrategia: 'greedy' (semillas rentables
+    por ranking, cerca del máximo), 'diversificada' (rentables en orden aleatorio,
+    pocas de cada una), 'balanceada' (la mitad más rentable, cantidades
+    intermedias) o 'aleatoria' (todas, salteando la mitad). Las semillas se
+    agregan mientras quepan en el área y el presupuesto restantes, así que los
+    individuos salen factibles. Todo el bloque se construye a la vez: lo que
+    queda al llegar a cada semilla se estima por defecto a partir de las
+    fracciones ya ocupadas, y una sola reparación en bloque cubre el redondeo.
+    """
+    from genetico import reparar_poblacion
+    catalogo = compilar_catalogo(catalogo)
+    rng = rng if rng is not None else np.random.default_rng()
+    bloques = [_generar_bloque(catalogo, area_total, presupuesto_total,
+                               min(BLOQUE_INICIALIZACION, tam_poblacion - inicio), rng)
+               for inicio in range(0, tam_poblacion, BLOQUE_INICIALIZACION)]
+    if not bloques:
+        return np.zeros((0, len(catalogo)), dtype=TIPO_GENOMA)
+    return reparar_poblacion(np.vstack(bloques), catalogo, area_total, presupuesto_total)
@@ -0,0 +1,121 @@
+import json
+import os
+import numpy as np
+from genoma import TIPO_GENOMA, comprimir_poblacion, expandir_poblacion
+from evaluacion import EvaluacionIndividuo
+
+# =======================
+# PUNTOS DE CONTROL DE CORRIDAS
+# =======================
+# Un punto de control es un .npz comprimido con el estado completo de una
+# corrida (uno por isla): población en forma dispersa, mejor individuo,
+# historial, contadores y estado del generador aleatorio. Con él la corrida se
+# retoma exactamente donde quedó, en otro proceso o tras un reinicio.
+
+VERSION_PUNTO_CONTROL = 1
+# Campos escalares del estado que se guardan tal cual
+ESCALARES = ('mejor_fitness', 'mejor_ganancia', 'generaciones_sin_mejora', 'generacion', 'convergio',
+             'tiempo_agotado', 'sin_parada_temprana', 'tam_efectivo', 'costo_individuo')
+
+def guardar_punto_control(ruta, estados, generacion, area_total, presupuesto_total):
+    """Guarda en `ruta` los estados de una corrida y la generación alcanzada.
+
+    La escritura es atómica (archivo temporal y reemplazo), así que un corte a
+    mitad de la escritura deja el punto de control anterior intacto.
+    """
+    arreglos = {}
+    meta = {
+        'version': VERSION_PUNTO_CONTROL,
+        'generacion': int(generacion),
+        'area_total': area_total,
+        'presupuesto_total': presupuesto_total,
+        'estados': [],
+    }
+    for i, estado in enumerate(estados):
+        comprimida = comprimir_poblacion(estado['poblacion'])
+        arreglos[f'{i}_forma'] = np.array(comprimida['forma'], dtype=np.int64)
+        arreglos[f'{i}_punteros'] = comprimida['punteros']
+        arreglos[f'{i}_indices'] = comprimida['indices']
+        arreglos[f'{i}_cantidades'] = comprimida['cantidades']
+        arreglos[f'{i}_historial'] = np.asarray(estado['historial'], dtype=float)
+        if estado['mejor_individuo'] is not None:
+            arreglos[f'{i}_mejor'] = np.asarray(estado['mejor_individuo'], dtype=TIPO_GENOMA)
+        escalares = {campo: estado[campo] for campo in ESCALARES}
+        escalares['rng'] = estado['rng'].bit_generator.state
+        meta['estados'].append(escalares)
+    arreglos['meta'] = np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, exist_ok=True)
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with open(temporal, 'wb') as f:
+        np.savez_compressed(f, **arreglos)
+    os.replace(temporal, ruta)
+
+def leer_meta(ruta):
+    with np.load(ruta) as datos:
+        return json.loads(datos['meta'].tobytes().decode('utf-8'))
+
+def cargar_punto_control(ruta, n_genes=None, area_total=None, presupuesto_total=None):
+    """(estados, generación) guardados en `ruta`.
+
+    Si se dan, se verifica que el punto de control corresponda al mismo tamaño
+    de catálogo, área y presupuesto (ValueError si no). El 'mejor_evaluacion'
+    de cada estado queda en None: depende del catálogo y lo recalcula quien
+    retoma la corrida.
+    """
+    with np.load(ruta) as datos:
+        meta = json.loads(datos['meta'].tobytes().decode('utf-8'))
+        if meta['version'] != VERSION_PUNTO_CONTROL:
+            raise ValueError(f"Versión de punto de control no soportada: {meta['version']}")
+        if ((area_total is not None and meta['area_total'] != area_total) or
+                (presupuesto_total is not None and meta['presupuesto_total'] != presupuesto_total)):
+            raise ValueError('El punto de control es de otra área o presupuesto')
+
+        estados = []
+        for i, escalares in enumerate(meta['estados']):
+            forma = tuple(int(x) for x in datos[f'{i}_forma'])
+            if n_genes is not None and forma[1] != n_genes:
+                raise ValueError('El punto de control es de un catálogo de otro tamaño')
+            poblacion = expandir_poblacion({'forma': forma, 'punteros': datos[f'{i}_punteros'],
+                                            'indices': datos[f'{i}_indices'],
+                                            'cantidades': datos[f'{i}_cantidades']})
+            estado_rng = escalares.pop('rng')
+            escalares.setdefault('sin_parada_temprana', False)
+            rng = np.random.Generator(getattr(np.random, estado_rng['bit_generator'])())
+            rng.bit_generator.state = estado_rng
+            estados.append(dict(escalares,
+                                poblacion=poblacion,
+                                mejor_individuo=datos[f'{i}_mejor'] if f'{i}_mejor' in datos.files else None,
+                                mejor_evaluacion=None,
+                                historial=datos[f'{i}_historial'].tolist(),
+                                rng=rng))
+    return estados, meta['generacion']
+
+def preparar_continuacion(estado):
+    """Deja un estado terminado (convergido o sin tiempo) listo para correr todas las generaciones que se pidan más.
+
+    Sin parada temprana: la convergencia volvería a cortarla a las PACIENCIA generaciones sin mejora.
+    """
+    if estado['convergio'] or estado['tiempo_agotado']:
+        estado['convergio'] = False
+        estado['tiempo_agotado'] = False
+        estado['generaciones_sin_mejora'] = 0
+        estado['sin_parada_temprana'] = True
+    return estado
+
+def retomar_estados(ruta, catalogo, area_total, presupuesto_total):
+    """Estados de un punto de control listos para seguir evolucionando con `catalogo`, y su generación.
+
+    Si la corrida había terminado (todas las islas convergieron o alguna agotó
+    el tiempo) los estados se preparan para continuar; si no, quedan tal cual.
+    """
+    estados, generacion = cargar_punto_control(ruta, len(catalogo), area_total, presupuesto_total)
+    terminada = all(estado['convergio'] for estado in estados) or any(estado['tiempo_agotado'] for estado in estados)
+    for estado in estados:
+        if terminada:
+            preparar_continuacion(estado)
+        if estado['mejor_individuo'] is not None:
+            estado['mejor_evaluacion'] = EvaluacionIndividuo.desde_genoma(estado['mejor_individuo'], catalogo,
+                                                                          area_total, presupuesto_total)
+    return estados, generacion
@@ -0,0 +1,56 @@
+import numpy as np
+
+# =======================
+# MÉTODOS DE SELECCIÓN
+# =======================
+# Cada método recibe el vector de fitness de los candidatos y devuelve `n`
+# índices (posiciones dentro de ese vector) elegidos en una sola pasada.
+
+def seleccion_torneo(fitnesses, n, rng, k=3):
+    """Torneos de tamaño k: todos los participantes se sortean a la vez"""
+    participantes = rng.integers(0, len(fitnesses), size=(n, min(k, len(fitnesses))))
+    ganadores = np.argmax(fitnesses[participantes], axis=1)
+    return participantes[np.arange(n), ganadores]
+
+def seleccion_ranking(fitnesses, n, rng, presion=1.5):
+    """Ranking lineal: la probabilidad depende de la posición, no de la escala del fitness"""
+    m = len(fitnesses)
+    if m == 1:
+        return np.zeros(n, dtype=int)
+    rangos = np.empty(m)
+    rangos[np.argsort(fitnesses, kind='stable')] = np.arange(m)
+    probabilidades = ((2 - presion) + 2 * (presion - 1) * rangos / (m - 1)) / m
+    return rng.choice(m, size=n, p=probabilidades / probabilidades.sum())
+
+def seleccion_sus(fitnesses, n, rng):
+    """Muestreo universal estocástico: n punteros equiespaciados sobre la ruleta"""
+    acumulado = np.cumsum(fitnesses)
+    paso = acumulado[-1] / n
+    punteros = rng.uniform(0, paso) + paso * np.arange(n)
+    seleccionados = np.minimum(np.searchsorted(acumulado, punteros, side='right'), len(fitnesses) - 1)
+    # Los punteros salen ordenados; se mezclan para no emparejar vecinos siempre
+    rng.shuffle(seleccionados)
+    return seleccionados
+
+METODOS_SELECCION = {
+    'torneo': seleccion_torneo,
+    'ranking': seleccion_ranking,
+    'sus': seleccion_sus,
+}
+
+def seleccionar_parejas(fitnesses, n_parejas, metodo='torneo', rng=None, **opciones):
+    """Elige todas las parejas de padres de una generación en una sola pasada.
+
+    Solo participan los individuos con fitness positivo (válidos). Devuelve una
+    matriz (n_parejas x 2) de índices sobre la población, o None si hay menos de
+    dos candidatos.
+    """
+    if metodo not in METODOS_SELECCION:
+        raise ValueError(f"Método de selección desconocido: {metodo}")
+    rng = rng if rng is not None else np.random.default_rng()
+    fitnesses = np.asarray(fitnesses, dtype=float)
+    candidatos = np.flatnonzero(fitnesses > 0)
+    if len(candidatos) < 2:
+        return None
+    elegidos = METODOS_SELECCION[metodo](fitnesses[candidatos], 2 * n_parejas, rng, **opciones)
+    return candidatos[elegidos].reshape(n_parejas, 2)
@@ -0,0 +1,360 @@
+import json
+import os
+import re
+import tempfile
+import time
+import numpy as np
+from genetico import algoritmo_genetico, crear_estado, evolucionar, MODOS
+from islas import TOPOLOGIAS
+from pareto import algoritmo_pareto, elegir_punto, leer_pesos, matriz_objetivos, OBJETIVOS
+from exacto import cota_lp, calcular_gap
+from arranque import AlmacenSoluciones, poblacion_arranque
+from cache_resultados import huella_archivo
+from perfilado import Perfilador
+from puntos_control import leer_meta
+from catalogo import compilar_catalogo, validar_plantas, ruta_binaria, abrir_catalogo, compilar_archivo
+
+RUTA_CATALOGO = os.path.join(os.path.dirname(__file__), '..', 'data', 'catalogo_semillas.json')
+
+# Mejores genomas de consultas anteriores para el arranque en caliente; con
+# AGROGEN_SOLUCIONES_DIR se comparten entre procesos y reinicios
+almacen_soluciones = AlmacenSoluciones(directorio=os.environ.get('AGROGEN_SOLUCIONES_DIR'))
+
+# Tope de pasos de búsqueda local por generación que acepta la API
+MAX_BUSQUEDA_LOCAL = 200
+
+# Topes del modo islas: islas por corrida y procesos que abre cada corrida (cada
+# trabajo del pool de la API abre los suyos, así que se multiplican)
+MAX_ISLAS = 16
+MAX_PROCESOS_ISLAS = int(os.environ.get('AGROGEN_MAX_PROCESOS_ISLAS') or min(4, os.cpu_count() or 1))
+
+# Puntos de control de los trabajos (ver puntos_control.py), uno por id, y cada
+# cuántas generaciones se guardan
+DIRECTORIO_PUNTOS_CONTROL = (os.environ.get('AGROGEN_PUNTOS_CONTROL_DIR') or
+                             os.path.join(tempfile.gettempdir(), 'agrogen_puntos_control'))
+INTERVALO_PUNTO_CONTROL = 10
+# Tope de generaciones que se pueden agregar al continuar una corrida
+MAX_GENERACIONES_EXTRA = 1000
+
+# Catálogos ya abiertos en este proceso: ruta -> ((mtime, tamaño) del JSON, catálogo)
+_catalogos_abiertos = {}
+
+class ErrorSolicitud(ValueError):
+    """Parámetros de la solicitud inválidos (se responde con 400)"""
+
+class ErrorCatalogo(RuntimeError):
+    """No se pudo cargar el catálogo de semillas (se responde con 500)"""
+
+def leer_parametros(data):
+    """Valida el cuerpo de una solicitud de optimización y devuelve sus parámetros"""
+    if not data:
+        raise ErrorSolicitud('No se recibieron datos')
+
+    try:
+        area_total = float(data.get('area', 0))
+        presupuesto_total = float(data.get('budget', 0))
+        # Opciones del modo islas (por defecto, una sola población)
+        islas = int(data.get('islas', 1))
+        procesos = data.get('procesos')
+        procesos = int(procesos) if procesos not in (None, '') else None
+        intervalo_migracion = int(data.get('intervalo_migracion', 20))
+        migrantes = int(data.get('migrantes', 2))
+        semilla = data.get('semilla')
+        semilla = int(semilla) if semilla not in (None, '') else None
+        # Submuestreo opcional del historial que se devuelve al cliente
+        max_puntos = data.get('max_puntos')
+        max_puntos = int(max_puntos) if max_puntos not in (None, '') else None
+        # Brecha relativa a la cota LP con la que el AG puede parar antes
+        gap = data.get('gap')
+        gap = float(gap) if gap not in (None, '') else None
+        # Plazo de la corrida en milisegundos (modo "anytime")
+        deadline_ms = data.get('deadline_ms')
+        deadline_ms = int(deadline_ms) if deadline_ms not in (None, '') else None
+        # Pasos de búsqueda local de la élite por generación (AG memético)
+        busqueda_local = int(data.get('busqueda_local', 0) or 0)
+    except (TypeError, ValueError):
+        raise ErrorSolicitud('Parámetros numéricos inválidos')
+
+    if area_total <= 0 or presupuesto_total <= 0:
+        raise ErrorSolicitud('Área y presupuesto deben ser mayores a 0')
+    if islas < 1 or intervalo_migracion < 1 or migrantes < 0 or (procesos is not None and procesos < 1):
+        raise ErrorSolicitud('Parámetros de islas inválidos')
+    if islas > MAX_ISLAS:
+        raise ErrorSolicitud(f'islas debe estar entre 1 y {MAX_ISLAS}')
+    topologia = data.get('topologia', 'anillo')
+    if topologia not in TOPOLOGIAS:
+        raise ErrorSolicitud(f"Topología inválida; debe ser una de: {', '.join(TOPOLOGIAS)}")
+    if semilla is not None and semilla < 0:
+        raise ErrorSolicitud('La semilla debe ser un entero no negativo')
+    if max_puntos is not None and max_puntos < 2:
+        raise ErrorSolicitud('max_puntos debe ser al menos 2')
+    modo = data.get('modo', 'genetico')
+    if modo not in MODOS:
+        raise ErrorSolicitud(f"Modo inválido; debe ser uno de: {', '.join(MODOS)}")
+    if gap is not None and not 0 <= gap < 1:
+        raise ErrorSolicitud('El gap debe estar entre 0 y 1')
+    if deadline_ms is not None and deadline_ms <= 0:
+        raise ErrorSolicitud('deadline_ms debe ser mayor a 0')
+    if not 0 <= busqueda_local <= MAX_BUSQUEDA_LOCAL:
+        raise ErrorSolicitud(f'busqueda_local debe estar entre 0 y {MAX_BUSQUEDA_LOCAL}')
+    # Pesos de los objetivos con los que se elige el punto del frente (modo pareto)
+    pesos = data.get('pesos')
+    try:
+        leer_pesos(pesos)
+    except (TypeError, ValueError) as e:
+        raise ErrorSolicitud(f'Pesos inválidos: {e}')
+
+    return {
+        'area': area_total,
+        'budget': presupuesto_total,
+        'generaciones': 300,
+        'tam_poblacion': 100,
+        'tasa_mutacion': 0.2,
+        'semilla': semilla,
+        'islas': islas,
+        # Procesos de la corrida en islas: nunca más que las islas ni que el tope del servidor
+        'procesos': min(procesos or islas, islas, MAX_PROCESOS_ISLAS),
+        'intervalo_migracion': intervalo_migracion,
+        'migrantes': migrantes,
+        'topologia': topologia,
+        'max_puntos': max_puntos,
+        'modo': modo,
+        'gap': gap,
+        'deadline_ms': deadline_ms,
+        'busqueda_local': busqueda_local,
+        # Ids de punto de control donde guardar la corrida y del que retomarla (los fija /jobs)
+        'punto_control': None,
+        'reanudar_desde': None,
+        'pesos': {nombre: float(peso) for nombre, peso in pesos.items()} if pesos is not None else None,
+        # Sembrar además la población con soluciones de consultas anteriores cercanas. Es
+        # opcional porque depende de lo que ya resolvió el proceso: con él, la misma
+        # solicitud con la misma semilla puede dar otro resultado
+        'arranque': str(data.get('arranque', False)).lower() in ('true', '1', 'si', 'sí'),
+        # Incluir en la respuesta los tiempos por fase y contadores de la corrida
+        'perfil': str(data.get('perfil', False)).lower() in ('true', '1', 'si', 'sí'),
+    }
+
+def cargar_catalogo(ruta=RUTA_CATALOGO):
+    """Catálogo compilado, mapeado en memoria desde su versión binaria en columnas.
+
+    La primera vez (o cuando cambia la fecha de modificación o el tamaño del
+    JSON) se valida el JSON y se recompila el binario; si la carpeta no es
+    escribible se compila solo en memoria. Cada proceso guarda el catálogo
+    abierto y solo vuelve a mirar el disco si cambió el JSON.
+    """
+    try:
+        firma = os.stat(ruta)
+    except FileNotFoundError:
+        raise ErrorCatalogo(f'Archivo no encontrado: {os.path.abspath(ruta)}')
+    firma = (firma.st_mtime_ns, firma.st_size)
+    abierto = _catalogos_abiertos.get(ruta)
+    if abierto is not None and abierto[0] == firma:
+        return abierto[1]
+
+    try:
+        catalogo = abrir_catalogo(ruta_binaria(ruta), ruta_json=ruta)
+        if catalogo is None:
+            try:
+                catalogo = compilar_archivo(ruta)
+            except OSError:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    plantas = json.load(f)
+                validar_plantas(plantas)
+                catalogo = compilar_catalogo(plantas)
+    except FileNotFoundError:
+        raise ErrorCatalogo(f'Archivo no encontrado: {os.path.abspath(ruta)}')
+    except json.JSONDecodeError:
+        raise ErrorCatalogo('Error al decodificar el archivo JSON')
+    except ValueError as e:
+        raise ErrorCatalogo(f'Catálogo inválido: {e}')
+    _catalogos_abiertos[ruta] = (firma, catalogo)
+    return catalogo
+
+def calentar(catalogo, generaciones=2, tam_poblacion=16):
+    """Corre una optimización mínima y silenciosa para inicializar los núcleos de NumPy y del AG.
+
+    Recorre inicialización, evaluación, selección, cruza, reparación, mutación,
+    búsqueda local y la cota LP, de modo que la primera solicitud real no pague
+    esos arranques.
+    """
+    area_total = float(np.median(catalogo.espacio)) * tam_poblacion if len(catalogo) else 1.0
+    presupuesto_total = float(np.median(catalogo.costo_unitario)) * tam_poblacion if len(catalogo) else 1.0
+    estado = crear_estado(catalogo, area_total, presupuesto_total, tam_poblacion, rng=np.random.default_rng(0))
+    evolucionar(estado, catalogo, area_total, presupuesto_total, generaciones, tam_poblacion=tam_poblacion,
+                verbose=False, busqueda_local=1)
+    cota_lp(catalogo, area_total, presupuesto_total)
+
+def generar_reporte_individuo(evaluacion):
+    """Reporte detallado del mejor individuo a partir de su `EvaluacionIndividuo`"""
+    return evaluacion.a_dict()
+
+def elegir_del_frente(frente, pesos=None):
+    """Punto de un frente ya calculado (el 'frente' de un resultado) según los pesos de los objetivos"""
+    objetivos = matriz_objetivos({nombre: np.asarray(frente['objetivos'][nombre]) for nombre in OBJETIVOS})
+    elegido = elegir_punto(objetivos, pesos)
+    return {
+        'elegido': elegido,
+        'objetivos': {nombre: frente['objetivos'][nombre][elegido] for nombre in OBJETIVOS},
+        'reporte': frente['reportes'][elegido],
+        'genoma': frente['genomas'][elegido],
+    }
+
+def ruta_punto_control(id_punto):
+    """Archivo del punto de control `id_punto` (un id hexadecimal)"""
+    if not re.fullmatch(r'[0-9a-f]+', id_punto or ''):
+        raise ValueError(f"Id de punto de control inválido: {id_punto!r}")
+    return os.path.join(DIRECTORIO_PUNTOS_CONTROL, f'{id_punto}.npz')
+
+def generacion_punto_control(id_punto):
+    """Generación alcanzada en el punto de control `id_punto`, o None si no existe"""
+    ruta = ruta_punto_control(id_punto)
+    return leer_meta(ruta)['generacion'] if os.path.exists(ruta) else None
+
+def purgar_puntos_control(edad_maxima):
+    """Borra los puntos de control no modificados en los últimos `edad_maxima` segundos"""
+    if not os.path.isdir(DIRECTORIO_PUNTOS_CONTROL):
+        return
+    limite = time.time() - edad_maxima
+    for nombre in os.listdir(DIRECTORIO_PUNTOS_CONTROL):
+        ruta = os.path.join(DIRECTORIO_PUNTOS_CONTROL, nombre)
+        try:
+            if os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+        except OSError:
+            pass
+
+def parametros_continuacion(parametros, data, punto_control):
+    """Parámetros de un trabajo que continúa la corrida de `parametros` por data['generaciones'] más.
+
+    La corrida original debe haber dejado un punto de control (ver
+    `generacion_punto_control`); la nueva lo retoma y guarda el suyo en
+    `punto_control`.
+    """
+    try:
+        extra = int((data or {}).get('generaciones', 100))
+    except (TypeError, ValueError):
+        raise ErrorSolicitud('Parámetros numéricos inválidos')
+    if not 1 <= extra <= MAX_GENERACIONES_EXTRA:
+        raise ErrorSolicitud(f'generaciones debe estar entre 1 y {MAX_GENERACIONES_EXTRA}')
+    generacion = generacion_punto_control(parametros['punto_control'])
+    return dict(parametros, generaciones=generacion + extra, punto_control=punto_control,
+                reanudar_desde=parametros['punto_control'])
+
+def ejecutar_optimizacion(parametros, cancelado=None, progreso=None, catalogo=None, vecinos=None):
+    """Ejecuta el algoritmo genético y arma la respuesta de /optimize.
+
+    `cancelado` es un callable opcional que se consulta entre generaciones y
+    `progreso` recibe el resumen de cada generación. Si la corrida se cancela,
+    devuelve la mejor solución hallada hasta ese momento marcada con
+    'cancelado', o None si aún no había ninguna. Si no se pasa un `catalogo` ya
+    compilado se carga del archivo. La población inicial se siembra con el
+    redondeo LP y con los `vecinos` dados (soluciones con 'area', 'presupuesto'
+    y 'genoma', p. ej. de un mismo barrido); con 'arranque' también con las de
+    consultas anteriores guardadas en `almacen_soluciones`. El resultado
+    incluye en 'perfil' los tiempos por fase y contadores de la corrida.
+
+    Con 'deadline_ms' el plazo cuenta desde el inicio de esta función (carga
+    del catálogo y arranque incluidos) y el resultado indica en 'convergio' si
+    la corrida llegó a converger y en 'tiempo_agotado' si la cortó el plazo.
+
+    En modo 'pareto' el resultado trae además el 'frente' completo (objetivos
+    en columnas, reporte y genoma de cada punto) y 'reporte' es el punto que
+    eligen los 'pesos' de la solicitud.
+
+    Con 'punto_control' (un id) la corrida del AG guarda su estado cada
+    `INTERVALO_PUNTO_CONTROL` generaciones, y con 'reanudar_desde' retoma el de
+    otra corrida hasta completar 'generaciones' en total (sin arranque en
+    caliente).
+    """
+    inicio = time.monotonic()
+    perfilador = Perfilador()
+    with perfilador.fase('carga_catalogo'):
+        catalogo = catalogo if catalogo is not None else cargar_catalogo()
+    area_total = parametros['area']
+    presupuesto_total = parametros['budget']
+
+    iniciales = None
+    reanudar_desde = parametros.get('reanudar_desde')
+    punto_control = parametros.get('punto_control')
+    if parametros['modo'] != 'exacto' and reanudar_desde is None:
+        with perfilador.fase('arranque'):
+            vecinos = list(vecinos or [])
+            if parametros['arranque']:
+                vecinos += almacen_soluciones.vecinos(huella_archivo(RUTA_CATALOGO), area_total, presupuesto_total)
+            iniciales = poblacion_arranque(catalogo, area_total, presupuesto_total, vecinos,
+                                           rng=np.random.default_rng(parametros['semilla']))
+
+    # Se conserva el último evento de progreso: trae las banderas de convergencia
+    ultimo = {}
+    def al_generar(evento):
+        ultimo.update(evento)
+        if progreso is not None:
+            progreso(evento)
+
+    limite_tiempo = None
+    if parametros['deadline_ms'] is not None:
+        limite_tiempo = max(0.0, parametros['deadline_ms'] / 1000 - (time.monotonic() - inicio))
+
+    opciones = dict(catalogo=catalogo, area_total=area_total, presupuesto_total=presupuesto_total,
+                    generaciones=parametros['generaciones'], tam_poblacion=parametros['tam_poblacion'],
+                    tasa_mutacion=parametros['tasa_mutacion'], cancelado=cancelado, al_generar=al_generar,
+                    semilla=parametros['semilla'], iniciales=iniciales, perfilador=perfilador,
+                    limite_tiempo=limite_tiempo)
+    frente = None
+    if parametros['modo'] == 'pareto':
+        # Se devuelve el frente completo; los pesos solo eligen el punto que va en 'reporte'
+        frente = algoritmo_pareto(**opciones)
+        historial = frente['historial']
+        mejor = evaluacion = None
+        if frente['evaluaciones']:
+            elegido = elegir_punto(matriz_objetivos(frente['objetivos']), parametros['pesos'])
+            mejor = frente['genomas'][elegido].tolist()
+            evaluacion = frente['evaluaciones'][elegido]
+    else:
+        mejor, fitness, historial, evaluacion = algoritmo_genetico(
+            elitismo=True,
+            islas=parametros['islas'],
+            procesos=parametros.get('procesos'),
+            intervalo_migracion=parametros['intervalo_migracion'],
+            migrantes=parametros['migrantes'],
+            topologia=parametros['topologia'],
+            modo=parametros['modo'],
+            gap_objetivo=parametros['gap'],
+            busqueda_local=parametros['busqueda_local'],
+            punto_control=ruta_punto_control(punto_control) if punto_control else None,
+            intervalo_control=INTERVALO_PUNTO_CONTROL,
+            reanudar_desde=ruta_punto_control(reanudar_desde) if reanudar_desde else None,
+            **opciones
+        )
+    if mejor is None:
+        return None
+    cancelada = cancelado is not None and cancelado()
+    # Se guarda siempre (solo leerlo es opcional) para que las consultas con 'arranque' tengan vecinos
+    if not cancelada:
+        almacen_soluciones.registrar(huella_archivo(RUTA_CATALOGO), area_total, presupuesto_total, mejor)
+
+    with perfilador.fase('reporte'):
+        reporte = generar_reporte_individuo(evaluacion)
+        cota = cota_lp(catalogo, area_total, presupuesto_total)['cota']
+    resultado = {
+        'reporte': reporte,
+        'historial': [float(f) for f in historial],
+        'genoma': [int(x) for x in mejor],
+        # Cota superior de la ganancia neta y brecha de la solución respecto de ella
+        'cota_lp': cota,
+        'gap': calcular_gap(reporte['resumen']['ganancia_neta'], cota),
+        'modo': parametros['modo'],
+        'convergio': bool(ultimo.get('convergio', False)),
+        'tiempo_agotado': bool(ultimo.get('tiempo_agotado', False)),
+        'perfil': perfilador.resumen(),
+    }
+    if frente is not None:
+        resultado['frente'] = {
+            'objetivos': {nombre: valores.tolist() for nombre, valores in frente['objetivos'].items()},
+            'reportes': [evaluacion.a_dict() for evaluacion in frente['evaluaciones']],
+            'genomas': frente['genomas'].tolist(),
+            'elegido': elegido,
+        }
+    if cancelada:
+        resultado['cancelado'] = True
+    return resultado
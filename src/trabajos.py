@@ -0,0 +1,229 @@
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+class ColaLlena(RuntimeError):
+    """Se alcanzó el máximo de trabajos pendientes"""
+
+# Eventos de progreso que se retienen por trabajo; si nadie los lee, se descartan los más viejos
+MAX_EVENTOS_PROGRESO = 256
+
+def _publicador(cola):
+    """Publica en la cola acotada descartando el evento más viejo si está llena"""
+    def publicar(evento):
+        try:
+            cola.put_nowait(evento)
+        except queue.Full:
+            try:
+                cola.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                cola.put_nowait(evento)
+            except queue.Full:
+                pass
+    return publicar
+
+def _ejecutar_tarea(tarea, parametros, evento_cancelacion, cola_progreso):
+    """Punto de entrada en el proceso trabajador.
+
+    La tarea consulta el evento de cancelación y publica su progreso en la cola
+    compartida entre generaciones; un trabajo sin seguimiento no recibe ninguno
+    de los dos.
+    """
+    return tarea(parametros,
+                 cancelado=evento_cancelacion.is_set if evento_cancelacion is not None else None,
+                 progreso=_publicador(cola_progreso) if cola_progreso is not None else None)
+
+class GestorTrabajos:
+    """Trabajos de optimización asíncronos sobre un pool de procesos acotado.
+
+    Cada trabajo se identifica con un id, se ejecuta en un proceso del pool y
+    puede cancelarse: la tarea recibe un callable `cancelado` que consulta un
+    evento compartido entre generaciones, y un callable `progreso` que publica en
+    una cola compartida los eventos que luego lee `eventos()`. El estado se guarda
+    en memoria y los trabajos terminados se descartan pasado `ttl_segundos`. Al
+    terminar un trabajo se liberan el evento y la cola compartidos: los eventos
+    aún no leídos pasan a memoria del proceso principal.
+
+    Si la tarea devuelve un diccionario con 'cancelado', el trabajo queda como
+    cancelado pero conserva ese resultado parcial. `al_completar`, si se da,
+    recibe en el proceso principal el resultado de cada trabajo que termina sin
+    error (p. ej. para registrar métricas).
+    """
+
+    def __init__(self, tarea, max_procesos=2, max_pendientes=32, ttl_segundos=3600, al_completar=None):
+        self.tarea = tarea
+        self.al_completar = al_completar
+        self.max_procesos = max_procesos
+        self.max_pendientes = max_pendientes
+        self.ttl_segundos = ttl_segundos
+        self._trabajos = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._manager = None
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_procesos)
+        return self._executor
+
+    def _compartidos(self):
+        """Evento de cancelación y cola de progreso compartidos con el proceso trabajador"""
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        return self._manager.Event(), self._manager.Queue(MAX_EVENTOS_PROGRESO)
+
+    def _purgar(self):
+        limite = time.time() - self.ttl_segundos
+        vencidos = [id_trabajo for id_trabajo, trabajo in self._trabajos.items()
+                    if trabajo['finalizado'] is not None and trabajo['finalizado'] < limite]
+        for id_trabajo in vencidos:
+            del self._trabajos[id_trabajo]
+
+    def _al_terminar(self, trabajo):
+        def marcar(futuro):
+            self._liberar_compartidos(trabajo)
+            trabajo['finalizado'] = time.time()
+            if (self.al_completar is not None and not futuro.cancelled()
+                    and futuro.exception() is None and futuro.result() is not None):
+                self.al_completar(futuro.result())
+        return marcar
+
+    @staticmethod
+    def _liberar_compartidos(trabajo):
+        """Suelta los proxies del Manager de un trabajo terminado, conservando los eventos no leídos"""
+        cola = trabajo['progreso']
+        if cola is not None:
+            while True:
+                try:
+                    trabajo['restantes'].append(cola.get_nowait())
+                except queue.Empty:
+                    break
+        trabajo['progreso'] = None
+        trabajo['evento'] = None
+
+    def activos(self):
+        """Cantidad de trabajos pendientes o en ejecución"""
+        with self._lock:
+            return sum(1 for trabajo in self._trabajos.values() if trabajo['finalizado'] is None)
+
+    def enviar(self, parametros, seguimiento=True):
+        """Encola un trabajo y devuelve su id sin esperar el resultado.
+
+        Con `seguimiento=False` (p. ej. una llamada síncrona) el trabajo no
+        publica progreso ni puede cancelarse una vez iniciado, y no paga la
+        comunicación con el Manager en cada generación.
+        """
+        with self._lock:
+            self._purgar()
+            activos = sum(1 for trabajo in self._trabajos.values() if trabajo['finalizado'] is None)
+            if activos >= self.max_pendientes:
+                raise ColaLlena('Demasiados trabajos en curso, intenta más tarde')
+
+            evento, cola = self._compartidos() if seguimiento else (None, None)
+            try:
+                futuro = self._pool().submit(_ejecutar_tarea, self.tarea, parametros, evento, cola)
+            except BrokenProcessPool:
+                # Un proceso murió: se cierra el pool roto y se reemplaza completo
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                futuro = self._pool().submit(_ejecutar_tarea, self.tarea, parametros, evento, cola)
+
+            trabajo = {
+                'id': uuid.uuid4().hex,
+                'parametros': parametros,
+                'creado': time.time(),
+                'finalizado': None,
+                'futuro': futuro,
+                'evento': evento,
+                'progreso': cola,
+                'restantes': deque(),
+            }
+            self._trabajos[trabajo['id']] = trabajo
+        futuro.add_done_callback(self._al_terminar(trabajo))
+        return trabajo['id']
+
+    def parametros(self, id_trabajo):
+        """Parámetros con que se envió el trabajo; None si no existe"""
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+        return trabajo['parametros'] if trabajo is not None else None
+
+    def estado(self, id_trabajo):
+        """Estado y, si terminó, resultado o error del trabajo; None si no existe"""
+        with self._lock:
+            self._purgar()
+            trabajo = self._trabajos.get(id_trabajo)
+        if trabajo is None:
+            return None
+
+        futuro = trabajo['futuro']
+        info = {'job_id': trabajo['id'], 'creado': trabajo['creado'], 'finalizado': trabajo['finalizado']}
+        if futuro.cancelled():
+            info['estado'] = 'cancelado'
+        elif not futuro.done():
+            evento = trabajo['evento']
+            if evento is not None and evento.is_set():
+                info['estado'] = 'cancelado'
+            else:
+                info['estado'] = 'ejecutando' if futuro.running() else 'pendiente'
+        elif futuro.exception() is not None:
+            info['estado'] = 'error'
+            info['error'] = str(futuro.exception())
+        elif futuro.result() is None:
+            info['estado'] = 'cancelado'
+        else:
+            info['estado'] = 'cancelado' if futuro.result().get('cancelado') else 'completado'
+            info['resultado'] = futuro.result()
+        return info
+
+    def eventos(self, id_trabajo, espera=0.5):
+        """Generador con el progreso publicado por el trabajo hasta que termina.
+
+        Cada evento se entrega a un solo consumidor: si varios clientes leen el
+        mismo trabajo, se reparten los eventos.
+        """
+        with self._lock:
+            trabajo = self._trabajos[id_trabajo]
+        while True:
+            cola = trabajo['progreso']
+            if cola is None:
+                # Terminó: quedan solo los eventos que se rescataron de la cola
+                while trabajo['restantes']:
+                    yield trabajo['restantes'].popleft()
+                return
+            try:
+                yield cola.get(timeout=espera)
+            except queue.Empty:
+                pass
+
+    def cancelar(self, id_trabajo):
+        """Pide la cancelación; devuelve False si el trabajo no existe"""
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+        if trabajo is None:
+            return False
+        evento = trabajo['evento']
+        if not trabajo['futuro'].cancel() and evento is not None:
+            evento.set()
+        return True
+
+    def esperar(self, id_trabajo, timeout=None):
+        """Bloquea hasta que el trabajo termina y devuelve su resultado (o relanza su error)"""
+        with self._lock:
+            trabajo = self._trabajos[id_trabajo]
+        return trabajo['futuro'].result(timeout=timeout)
+
+    def cerrar(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None